@@ -0,0 +1,144 @@
+"""Admission control for the API server.
+
+Each request is assigned to a lane: point lookups, which are cheap, or bulk requests, which return
+data about many users or permissions.  A lane limits how many requests may run at once, overall
+and per endpoint, and how many may wait for a slot.  Once that queue is full, further requests are
+rejected immediately so that the server sheds load instead of letting latency grow for everyone.
+
+Because the lanes are independent, a flood of bulk requests fills the bulk lane and is shed there
+without delaying point lookups.  Requests that give up waiting, because the client disconnected or
+the wait timed out, are removed from the queue so that they no longer count towards its limit.
+
+All methods must be called from the IOLoop thread.
+"""
+
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING
+
+from tornado.concurrent import Future
+
+if TYPE_CHECKING:
+    from typing import Deque, Dict, Tuple
+
+POINT_LANE = "point"
+BULK_LANE = "bulk"
+
+
+class Overloaded(Exception):
+    """A request was rejected because its lane's queue is full."""
+
+    pass
+
+
+class Abandoned(Exception):
+    """A waiting request was removed from its lane's queue because its client went away."""
+
+    pass
+
+
+class Lane:
+    """Concurrency limits and wait queue for one class of requests."""
+
+    def __init__(self, max_concurrent, max_per_endpoint, max_queued):
+        # type: (int, int, int) -> None
+        self.max_concurrent = max_concurrent
+        self.max_per_endpoint = max_per_endpoint
+        self.max_queued = max_queued
+        self.running = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.abandoned = 0
+        self._running_by_endpoint = defaultdict(int)  # type: Dict[str, int]
+        self._waiting = deque()  # type: Deque[Tuple[str, Future[None]]]
+
+    @property
+    def queued(self):
+        # type: () -> int
+        return len(self._waiting)
+
+    def admit(self, endpoint):
+        # type: (str) -> Future[None]
+        """Admit a request for endpoint, returning a Future that resolves once it may run.
+
+        The decision to run, queue, or reject the request is made immediately.
+
+        Raises:
+            Overloaded: if the request cannot run immediately and the queue is full
+        """
+        future = Future()  # type: Future[None]
+        if self._can_run(endpoint):
+            self._start(endpoint)
+            future.set_result(None)
+        elif len(self._waiting) < self.max_queued:
+            self._waiting.append((endpoint, future))
+        else:
+            self.rejected += 1
+            raise Overloaded()
+        return future
+
+    def cancel(self, future):
+        # type: (Future[None]) -> bool
+        """Remove the waiting request for future from the queue.
+
+        Returns:
+            False if the request was not waiting, in which case it has been started and must be
+            released as usual.
+        """
+        for waiter in self._waiting:
+            if waiter[1] is future:
+                self._waiting.remove(waiter)
+                self.abandoned += 1
+                return True
+        return False
+
+    def release(self, endpoint):
+        # type: (str) -> None
+        """Mark a request for endpoint as finished and start waiting requests that can now run.
+
+        Waiting requests are started in order, skipping those for endpoints at their limit.
+        """
+        self.running -= 1
+        self._running_by_endpoint[endpoint] -= 1
+        for waiter in list(self._waiting):
+            if self.running >= self.max_concurrent:
+                break
+            waiting_endpoint, future = waiter
+            if self._running_by_endpoint[waiting_endpoint] < self.max_per_endpoint:
+                self._waiting.remove(waiter)
+                self._start(waiting_endpoint)
+                future.set_result(None)
+
+    def _can_run(self, endpoint):
+        # type: (str) -> bool
+        return (
+            self.running < self.max_concurrent
+            and self._running_by_endpoint[endpoint] < self.max_per_endpoint
+        )
+
+    def _start(self, endpoint):
+        # type: (str) -> None
+        self.running += 1
+        self.admitted += 1
+        self._running_by_endpoint[endpoint] += 1
+
+
+class AdmissionController:
+    """Admission control for all API requests, with one Lane per class of request."""
+
+    def __init__(self, lanes, retry_after, queue_timeout):
+        # type: (Dict[str, Lane], int, int) -> None
+        self.lanes = lanes
+        self.retry_after = retry_after
+        self.queue_timeout = queue_timeout
+
+    def admit(self, lane, endpoint):
+        # type: (str, str) -> Future[None]
+        return self.lanes[lane].admit(endpoint)
+
+    def cancel(self, lane, future):
+        # type: (str, Future[None]) -> bool
+        return self.lanes[lane].cancel(future)
+
+    def release(self, lane, endpoint):
+        # type: (str, str) -> None
+        self.lanes[lane].release(endpoint)
@@ -0,0 +1,136 @@
+"""Per-checkpoint caches for the API server.
+
+Most API responses are a pure function of the graph, so they can be reused until the graph is
+updated to a new checkpoint.  CheckpointCache holds such values and discards all of them as soon as
+a value for a newer checkpoint is stored or requested.
+
+TokenCache uses the same mechanism for user tokens loaded from the database, with a short TTL on
+top, so that token validation doesn't need a database query per request.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import Generic, TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from typing import Hashable, Optional, Tuple
+
+V = TypeVar("V")
+
+
+class CheckpointCache(Generic[V]):
+    """Bounded cache of values that are valid for a single graph checkpoint.
+
+    Entries are evicted in least-recently-used order once max_entries is reached.  If ttl is set,
+    entries also expire that many seconds after they were stored.  The cache is safe to use from
+    multiple threads.
+    """
+
+    def __init__(self, max_entries=64, ttl=None):
+        # type: (int, Optional[float]) -> None
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._checkpoint = 0
+        self._entries = OrderedDict()  # type: OrderedDict[Hashable, Tuple[float, V]]
+        self._lock = Lock()
+
+    def get(self, checkpoint, key):
+        # type: (int, Hashable) -> Optional[V]
+        with self._lock:
+            self._maybe_expire(checkpoint)
+            entry = self._entries.get(key) if checkpoint == self._checkpoint else None
+            if entry is None or (self.ttl is not None and entry[0] <= monotonic()):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, checkpoint, key, value):
+        # type: (int, Hashable, V) -> None
+        with self._lock:
+            self._maybe_expire(checkpoint)
+            if checkpoint != self._checkpoint:
+                return
+            expires = monotonic() + self.ttl if self.ttl is not None else 0.0
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _maybe_expire(self, checkpoint):
+        # type: (int) -> None
+        """Drop all entries if checkpoint is newer than the checkpoint of the cached entries.
+
+        Must be called with the lock held.  Values for older checkpoints, which may be computed by
+        a request that started before a graph update, are neither returned nor stored.
+        """
+        if checkpoint > self._checkpoint:
+            self._checkpoint = checkpoint
+            self._entries.clear()
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """The data about a user token needed to validate it."""
+
+    identity: str
+    owner: str
+    hashed_secret: str
+    enabled: bool
+
+
+class TokenCache:
+    """Cache of user tokens, keyed by owner and token name, for token validation.
+
+    Creating or disabling a token, or disabling its owner, updates the checkpoint, so entries are
+    dropped when the graph picks up the change and are never used for more than ttl seconds.
+    Tokens that don't exist are cached separately, in a smaller cache, so that a flood of invalid
+    tokens cannot evict valid ones.
+    """
+
+    def __init__(self, ttl=30, max_entries=10000, max_unknown_entries=1000):
+        # type: (float, int, int) -> None
+        self._tokens = CheckpointCache(max_entries, ttl)  # type: CheckpointCache[CachedToken]
+        self._unknown = CheckpointCache(max_unknown_entries, ttl)  # type: CheckpointCache[bool]
+
+    @property
+    def hits(self):
+        # type: () -> int
+        return self._tokens.hits + self._unknown.hits
+
+    @property
+    def misses(self):
+        # type: () -> int
+        """Lookups of tokens in neither cache.
+
+        Every lookup that isn't a hit in the token cache also checks the unknown token cache, so
+        the misses of the unknown token cache are the misses of the TokenCache as a whole.
+        """
+        return self._unknown.misses
+
+    def get(self, checkpoint, username, name):
+        # type: (int, str, str) -> Tuple[bool, Optional[CachedToken]]
+        """Look up a token.
+
+        Returns:
+            Whether the token was found in the cache and, if so, the cached token or None if the
+            token is cached as not existing.
+        """
+        token = self._tokens.get(checkpoint, (username, name))
+        if token is not None:
+            return True, token
+        if self._unknown.get(checkpoint, (username, name)):
+            return True, None
+        return False, None
+
+    def set(self, checkpoint, username, name, token):
+        # type: (int, str, str, Optional[CachedToken]) -> None
+        if token is None:
+            self._unknown.set(checkpoint, (username, name), True)
+        else:
+            self._tokens.set(checkpoint, (username, name), token)
@@ -3,62 +3,148 @@ import re
 import sys
 import traceback
 from contextlib import closing
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 from io import StringIO
 from typing import TYPE_CHECKING
 
+from tornado.escape import json_encode
+from tornado.gen import with_timeout
+from tornado.util import TimeoutError
 from tornado.web import HTTPError, RequestHandler
 
+from grouper.api.admission import Abandoned, BULK_LANE, Overloaded, POINT_LANE
+from grouper.api.cache import CachedToken
+from grouper.api.pagination import InvalidPagination, paginate, parse_limit
 from grouper.constants import TOKEN_FORMAT
-from grouper.graph import NoSuchGroup, NoSuchUser
+from grouper.graph import (
+    GROUP_DETAIL_FIELDS,
+    NoSuchGroup,
+    NoSuchPermission,
+    NoSuchUser,
+    PERMISSION_DETAIL_FIELDS,
+    USER_DETAIL_FIELDS,
+)
 from grouper.models.base.session import Session
-from grouper.models.public_key import PublicKey
-from grouper.models.user import User as SQLUser
-from grouper.models.user_token import UserToken
+from grouper.models.user_token import secret_matches, UserToken
+from grouper.query_stats import set_query_caller
 from grouper.usecases.list_grants import ListGrantsUI
 from grouper.usecases.list_permissions import ListPermissionsUI
 from grouper.usecases.list_users import ListUsersUI
 from grouper.util import try_update
 
 if TYPE_CHECKING:
+    from grouper.api.admission import AdmissionController
+    from grouper.api.cache import CheckpointCache, TokenCache
+    from grouper.api.workers import DatabasePool, WorkerPool
     from grouper.entities.pagination import PaginatedList
     from grouper.entities.permission import Permission
     from grouper.entities.permission_grant import UniqueGrantsOfPermission
-    from grouper.entities.user import User
+    from grouper.entities.user import User, UserPublicKey
     from grouper.graph import GroupGraph
     from grouper.plugin.proxy import PluginProxy
     from grouper.usecases.factory import UseCaseFactory
+    from tornado.concurrent import Future
     from types import TracebackType
-    from typing import Any, Dict, Iterable, Optional, Tuple, Type
+    from typing import (
+        AbstractSet,
+        Any,
+        Callable,
+        Dict,
+        Iterable,
+        List,
+        Optional,
+        Set,
+        Tuple,
+        Type,
+        TypeVar,
+    )
+
+    T = TypeVar("T")
+
+
+try:
+    import msgpack
+
+    MSGPACK_SUPPORTED = True
+except ImportError:
+    MSGPACK_SUPPORTED = False
+
+# Content types of API responses.  Clients may request MessagePack instead of JSON with an Accept
+# header naming any of MSGPACK_MEDIA_TYPES, if the msgpack module is available.
+JSON_CONTENT_TYPE = "application/json; charset=UTF-8"
+MSGPACK_CONTENT_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = frozenset(["application/msgpack", "application/x-msgpack"])
+
+# Fields that can be requested from the user endpoints.  The first set are sections of the user
+# metadata, returned under the "user" key.  The rest are the graph sections of the user details.
+USER_METADATA_FIELDS = frozenset(
+    ["enabled", "role_user", "passwords", "public_keys", "metadata", "service_account"]
+)
+USER_FIELDS = USER_METADATA_FIELDS | USER_DETAIL_FIELDS
+
+
+def accept_quality(accept, media_types):
+    # type: (str, AbstractSet[str]) -> float
+    """Return the highest quality value an Accept header gives to any of media_types."""
+    quality = 0.0
+    for media_range in accept.split(","):
+        media_type, *params = media_range.split(";")
+        if media_type.strip().lower() not in media_types:
+            continue
+        value = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    value = float(param_value)
+                except ValueError:
+                    value = 0.0
+        quality = max(quality, value)
+    return quality
+
+
+class UnknownFields(Exception):
+    """The fields argument to a request named sections that endpoint doesn't return."""
 
+    pass
 
-def get_individual_user_info(handler, name, service_account):
-    # type: (GraphHandler, str, Optional[bool]) -> Dict[str, Any]
+
+def get_individual_user_info(graph, name, service_account, fields=None):
+    # type: (GroupGraph, str, Optional[bool], Optional[AbstractSet[str]]) -> Dict[str, Any]
     """This is a helper function to retrieve all information about a user.
 
     Args:
-        handler: the GraphHandler for this request
+        graph: the graph, or a snapshot of it, from which to retrieve the data
         name: the name of the user whose data is being retrieved
         service_account: a boolean indicating if this request is for a service account or not. This
             can be None if you want to support users and service accounts (deprecated)
+        fields: the subset of USER_FIELDS to return, or None to return everything
 
     Returns:
-        A dictionary containing all of the user's data
+        A dictionary containing all of the user's data, or the requested subset of it
 
     Raises:
         NoSuchUser: When no user with the given name exists, or has the the wrong serviceaccount
             type
     """
-    with handler.graph.lock:
-        if name not in handler.graph.user_metadata:
+    with graph.lock:
+        if name not in graph.user_metadata:
             raise NoSuchUser
-        md = handler.graph.user_metadata[name]
+        md = graph.user_metadata[name]
         if service_account is not None:
             is_service_account = md["role_user"] or "service_account" in md
             if service_account != is_service_account:
                 raise NoSuchUser
 
-        details = handler.graph.get_user_details(name, expose_aliases=False)
+        # Only walk the graph if the groups or permissions of the user were requested.
+        if fields is None or fields & {"groups", "permissions"}:
+            details = graph.get_user_details(name, expose_aliases=False, fields=fields)
+        else:
+            details = {}
+        if fields is not None:
+            md = {k: v for k, v in md.items() if k in fields}
+
         out = {"user": {"name": name}}
         # Updates the output with the user's metadata
         try_update(out["user"], md)
@@ -73,11 +159,96 @@ class GraphHandler(RequestHandler):
         self.graph = kwargs["graph"]  # type: GroupGraph
         self.usecase_factory = kwargs["usecase_factory"]  # type: UseCaseFactory
         self.plugins = kwargs["plugins"]  # type: PluginProxy
+        self.response_cache = kwargs["response_cache"]  # type: CheckpointCache[Any]
+        self.token_cache = kwargs["token_cache"]  # type: TokenCache
+        self.workers = kwargs["workers"]  # type: WorkerPool
+        self.database_pool = kwargs["database_pool"]  # type: DatabasePool
+        self.admission = kwargs["admission"]  # type: AdmissionController
+        self.stale_graph_age = kwargs["stale_graph_age"]  # type: int
+        set_query_caller(type(self).__name__)
 
         self._request_start_time = datetime.utcnow()
+        self._content_type = JSON_CONTENT_TYPE
+        self._request_checkpoint = 0
+        self._stale = False
+        self._admitted_lane = None  # type: Optional[str]
+        self._admission = None  # type: Optional[Tuple[str, Future[None]]]
+
+    async def prepare(self):
+        # type: () -> None
+        """Negotiate the response encoding, serve cached responses, and apply admission control.
+
+        Successful responses to GET requests are a function of the graph, so the encoded response
+        is cached by encoding, staleness, and URI for the checkpoint at which the request started.
+        The graph is stale if it hasn't been refreshed from the database recently, which clients
+        see in the response envelope.  Requests that cannot be answered from the cache wait for a
+        slot in their admission control lane, or fail with 503 if the lane is overloaded or the
+        wait times out.  If the client disconnects while waiting, the request leaves the queue.
+        """
+        self._content_type = self._negotiate_content_type()
+        self.set_header("Vary", "Accept")
+        self._request_checkpoint, _ = self.graph.current_checkpoint()
+        self._stale = self.graph.is_stale(self.stale_graph_age)
+        if self.request.method == "GET":
+            cache_key = (self._content_type, self._stale, self.request.uri)
+            response = self.response_cache.get(self._request_checkpoint, cache_key)
+            if response is not None:
+                self.set_header("Content-Type", self._content_type)
+                self.finish(response)
+                return
+
+        lane = self.get_lane()
+        try:
+            admitted = self.admission.admit(lane, type(self).__name__)
+        except Overloaded:
+            self._reject_overloaded()
+            return
+        if not admitted.done():
+            self._admission = (lane, admitted)
+            timeout = timedelta(seconds=self.admission.queue_timeout)
+            try:
+                await with_timeout(timeout, admitted)
+            except TimeoutError:
+                if self.admission.cancel(lane, admitted):
+                    self._reject_overloaded()
+                    return
+            except Abandoned:
+                # The client disconnected while waiting, so there is no one to respond to.
+                self.set_status(503)
+                self.finish()
+                return
+            finally:
+                self._admission = None
+        self._admitted_lane = lane
+
+    def _reject_overloaded(self):
+        # type: () -> None
+        self.set_status(503)
+        self.set_header("Retry-After", str(self.admission.retry_after))
+        self.error([(503, "Server overloaded, try again later")])
+        self.finish()
+
+    def on_connection_close(self):
+        # type: () -> None
+        if self._admission:
+            lane, admitted = self._admission
+            if self.admission.cancel(lane, admitted):
+                admitted.set_exception(Abandoned())
+
+    def get_lane(self):
+        # type: () -> str
+        """Return the admission control lane for this request.
+
+        Handlers that return data about many users or permissions should override this to return
+        BULK_LANE for those requests.
+        """
+        return POINT_LANE
 
     def on_finish(self):
         # type: () -> None
+        if self._admitted_lane:
+            self.admission.release(self._admitted_lane, type(self).__name__)
+            self._admitted_lane = None
         handler = self.__class__.__name__
         response_status = self.get_status()
         duration_ms = int((datetime.utcnow() - self._request_start_time).total_seconds() * 1000)
@@ -100,32 +271,113 @@ class GraphHandler(RequestHandler):
     def error(self, errors):
         # type: (Iterable[Tuple[int, Any]]) -> None
         out = [{"code": code, "message": message} for code, message in errors]
-        with self.graph.lock:
-            checkpoint = self.graph.checkpoint
-            checkpoint_time = self.graph.checkpoint_time
-        self.write(
+        checkpoint, checkpoint_time = self.graph.current_checkpoint()
+        self._write_response(
             {
                 "status": "error",
                 "errors": out,
                 "checkpoint": checkpoint,
                 "checkpoint_time": checkpoint_time,
+                "stale": self._stale,
             }
         )
 
     def success(self, data):
         # type: (Any) -> None
-        with self.graph.lock:
-            checkpoint = self.graph.checkpoint
-            checkpoint_time = self.graph.checkpoint_time
-        self.write(
+        checkpoint, checkpoint_time = self.graph.current_checkpoint()
+        response = self._write_response(
             {
                 "status": "ok",
                 "data": data,
                 "checkpoint": checkpoint,
                 "checkpoint_time": checkpoint_time,
+                "stale": self._stale,
             }
         )
 
+        # Only cache the response if the graph didn't change while it was being generated, since
+        # otherwise data may not match the checkpoint.
+        if self.request.method == "GET" and checkpoint == self._request_checkpoint:
+            cache_key = (self._content_type, self._stale, self.request.uri)
+            self.response_cache.set(checkpoint, cache_key, response)
+
+    def _negotiate_content_type(self):
+        # type: () -> str
+        """Use MessagePack if supported and the client prefers it to JSON, otherwise JSON."""
+        if not MSGPACK_SUPPORTED:
+            return JSON_CONTENT_TYPE
+        accept = self.request.headers.get("Accept", "")
+        msgpack_quality = accept_quality(accept, MSGPACK_MEDIA_TYPES)
+        if msgpack_quality > 0 and msgpack_quality >= accept_quality(accept, {"application/json"}):
+            return MSGPACK_CONTENT_TYPE
+        return JSON_CONTENT_TYPE
+
+    def _write_response(self, response):
+        # type: (Dict[str, Any]) -> bytes
+        """Encode the response envelope with the negotiated encoding and write it."""
+        if self._content_type == MSGPACK_CONTENT_TYPE:
+            encoded = msgpack.packb(response, use_bin_type=True)
+        else:
+            encoded = json_encode(response).encode()
+        self.set_header("Content-Type", self._content_type)
+        self.write(encoded)
+        return encoded
+
+    def get_fields(self, allowed):
+        # type: (AbstractSet[str]) -> Optional[Set[str]]
+        """Parse the fields argument restricting which sections of the response to return.
+
+        Fields may be given as a comma-separated list, as repeated arguments, or both.  Returns
+        None if no fields argument was given, meaning that all sections should be returned.
+
+        Raises:
+            UnknownFields: if any requested field is not in allowed
+        """
+        arguments = self.get_arguments("fields")
+        if not arguments:
+            return None
+        fields = {f.strip() for a in arguments for f in a.split(",") if f.strip()}
+        unknown = fields - allowed
+        if unknown:
+            raise UnknownFields(", ".join(sorted(unknown)))
+        return fields
+
+    def is_paginated(self):
+        # type: () -> bool
+        """Whether the request asked for a page of a list rather than the whole list."""
+        return self.get_argument("limit", None) is not None or bool(
+            self.get_argument("cursor", "")
+        )
+
+    def get_page(self, listing):
+        # type: (str) -> Tuple[List[str], Optional[str]]
+        """Return the requested page of one of the graph listings and the next page cursor.
+
+        Raises:
+            InvalidPagination: if the limit or cursor arguments are invalid
+        """
+        checkpoint, names = self.graph.get_listing(listing)
+        limit = parse_limit(self.get_argument("limit", None))
+        return paginate(names, checkpoint, self.get_argument("cursor", None), limit)
+
+    async def run_in_worker(self, fn, *args):
+        # type: (Callable[..., T], *Any) -> T
+        """Run fn(*args) on the worker pool and return its result.
+
+        Use this for work that may hold the IOLoop for a long time, such as walking the graph for
+        many users.  fn must not write the response.  Concurrency is limited per handler class.
+        """
+        return await self.workers.run(type(self).__name__, fn, *args)
+
+    async def run_in_database_pool(self, fn, *args):
+        # type: (Callable[..., T], *Any) -> T
+        """Run fn(*args), which queries the database, off the IOLoop and return its result.
+
+        Raises:
+            tornado.util.TimeoutError: if the query took longer than the database timeout
+        """
+        return await self.database_pool.run(fn, *args, caller=type(self).__name__)
+
     def raise_and_log_exception(self, exc):
         # type: (Exception) -> None
         try:
@@ -139,6 +391,18 @@ class GraphHandler(RequestHandler):
         self.raise_and_log_exception(HTTPError(404))
         self.error([(404, message)])
 
+    def badrequest(self, message):
+        # type: (str) -> None
+        self.set_status(400)
+        self.raise_and_log_exception(HTTPError(400))
+        self.error([(400, message)])
+
+    def unavailable(self, message):
+        # type: (str) -> None
+        self.set_status(503)
+        self.raise_and_log_exception(HTTPError(503))
+        self.error([(503, message)])
+
     def write_error(self, status_code, **kwargs):
         # type: (int, **Any) -> None
         """Overrides tornado's uncaught exception handler to return JSON results."""
@@ -162,28 +426,39 @@ class Users(GraphHandler):
             # because there are too many existing integrations that expect the
             # /users/foo@example.com endpoint to work for both. :(
             try:
-                return self.success(get_individual_user_info(self, name, service_account=None))
+                fields = self.get_fields(USER_FIELDS)
+                return self.success(
+                    get_individual_user_info(self.graph, name, service_account=None, fields=fields)
+                )
+            except UnknownFields as e:
+                return self.badrequest(f"Unknown fields: {e}")
             except NoSuchUser:
                 return self.notfound(f"User ({name}) not found.")
 
-        with self.graph.lock:
-            return self.success(
-                {
-                    "users": sorted(
-                        [
-                            k
-                            for k, v in self.graph.user_metadata.items()
-                            if (
-                                include_service_accounts
-                                or not ("service_account" in v or v["role_user"])
-                            )
-                        ]
-                    )
-                }
-            )
+        listing = "all_users" if include_service_accounts else "users"
+        if self.is_paginated():
+            try:
+                users, next_cursor = self.get_page(listing)
+            except InvalidPagination as e:
+                return self.badrequest(str(e))
+            return self.success({"users": users, "next_cursor": next_cursor})
+
+        _, users = self.graph.get_listing(listing)
+        return self.success({"users": users})
 
 
 class UserMetadata(GraphHandler, ListUsersUI):
+    """Return the metadata and public keys of all users.
+
+    The use case runs on the worker pool, so listed_users only records the response data.
+    """
+
+    _listed = None  # type: Optional[Dict[str, Any]]
+
+    def get_lane(self):
+        # type: () -> str
+        return BULK_LANE
+
     def listed_users(self, users):
         # type: (Dict[str, User]) -> None
         users_dict = {}  # type: Dict[str, Dict[str, Any]]
@@ -202,12 +477,13 @@ class UserMetadata(GraphHandler, ListUsersUI):
                 "metadata": metadata,
                 "public_keys": public_keys,
             }
-        self.success({"users": users_dict})
+        self._listed = {"users": users_dict}
 
-    def get(self, *args, **kwargs):
+    async def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
         usecase = self.usecase_factory.create_list_users_usecase(self)
-        usecase.list_users()
+        await self.run_in_worker(usecase.list_users)
+        self.success(self._listed)
 
 
 class MultiUsers(GraphHandler):
@@ -217,25 +493,114 @@ class MultiUsers(GraphHandler):
     multiple returning the data of multiple users to save on API call overhead.
     """
 
-    def get(self, *args, **kwargs):
+    def get_lane(self):
+        # type: () -> str
+        return BULK_LANE
+
+    async def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
+        try:
+            fields = self.get_fields(USER_FIELDS)
+        except UnknownFields as e:
+            return self.badrequest(f"Unknown fields: {e}")
+
         usernames = self.get_arguments("username")
-        if not usernames:
-            usernames = iter(self.graph.user_metadata)
+        data = await self.run_in_worker(self._get_users, usernames, fields)
+        self.success(data)
+
+    def _get_users(self, usernames, fields):
+        # type: (List[str], Optional[Set[str]]) -> Dict[str, Dict[str, Any]]
+        # Walk a snapshot so that the graph lock is not held, blocking the IOLoop, while walking.
+        graph = self.graph.snapshot()
+        data = {}
+        for username in usernames or list(graph.user_metadata):
+            try:
+                data[username] = get_individual_user_info(
+                    graph, username, service_account=None, fields=fields
+                )
+            except NoSuchUser:
+                continue
+        return data
 
-        with self.graph.lock:
-            data = {}
-            for username in usernames:
-                try:
-                    data[username] = get_individual_user_info(self, username, service_account=None)
-                except NoSuchUser:
-                    continue
-            self.success(data)
 
+class AuthorizedKeys(GraphHandler):
+    """Return the public keys of a user in authorized_keys format, for AuthorizedKeysCommand.
+
+    If the permission argument is given, keys are only returned if the user has that permission,
+    optionally with a matching argument.  Otherwise the response is empty, so sshd will not accept
+    any key.  Keys come from an index built once per checkpoint, so the lookup does not depend on
+    the user's group memberships.
+    """
 
-class UsersPublicKeys(GraphHandler):
     def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
+        name = kwargs["name"]  # type: str
+        permission = self.get_argument("permission", None)
+        argument = self.get_argument("argument", None)
+        if argument is not None and permission is None:
+            return self.badrequest("argument requires permission")
+
+        keys = self.graph.get_authorized_keys(name, permission, argument)
+        if keys is None:
+            return self.notfound(f"User ({name}) not found.")
+        self.set_header("Content-Type", "text/plain; charset=UTF-8")
+        self.write(keys)
+
+
+class UsersPublicKeys(GraphHandler):
+    """Export the public keys of all users, or of a user or fingerprint, as CSV.
+
+    The unfiltered export is generated from the graph once per checkpoint and cached.  Responses
+    carry an ETag derived from the checkpoint so that clients can use conditional requests.
+    """
+
+    # Size of the chunks in which the CSV is written to the client.
+    CHUNK_SIZE = 64 * 1024
+
+    def get_lane(self):
+        # type: () -> str
+        if self.get_argument("username", None) or self.get_argument("fingerprint", None):
+            return POINT_LANE
+        return BULK_LANE
+
+    async def get(self, *args, **kwargs):
+        # type: (*Any, **Any) -> None
+        username = self.get_argument("username", None)
+        fingerprint = self.get_argument("fingerprint", None)
+
+        # The response only depends on the graph checkpoint and the URL, so answer conditional
+        # requests before generating anything.  The graph may advance before the keys are read
+        # below, which at worst makes the client fetch the newer keys again on its next request.
+        checkpoint, _ = self.graph.current_checkpoint()
+        self.set_header("Content-Type", "text/csv")
+        self.set_header("Etag", f'"{checkpoint}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        if fingerprint:
+            key = self.graph.get_public_key_by_fingerprint(fingerprint)
+            keys = [key] if key and (not username or key.user == username) else []
+            data = self._to_csv(keys)
+        elif username:
+            _, keys = self.graph.get_public_keys(username)
+            data = self._to_csv(keys)
+        else:
+            cached = self.response_cache.get(checkpoint, "public-keys-csv")
+            if cached is None:
+                keys_checkpoint, keys = self.graph.get_public_keys()
+                data = self._to_csv(keys)
+                self.response_cache.set(keys_checkpoint, "public-keys-csv", data)
+            else:
+                data = cached
+
+        for start in range(0, len(data), self.CHUNK_SIZE):
+            self.write(data[start : start + self.CHUNK_SIZE])
+            await self.flush()
+
+    @staticmethod
+    def _to_csv(keys):
+        # type: (Iterable[UserPublicKey]) -> bytes
         fh = StringIO()
         w_csv = csv.writer(fh, lineterminator="\n")
 
@@ -252,39 +617,66 @@ class UsersPublicKeys(GraphHandler):
             ]
         )
 
-        with closing(Session()) as session:
-            user_key_list = session.query(PublicKey, SQLUser).filter(
-                SQLUser.id == PublicKey.user_id
+        for key in keys:
+            w_csv.writerow(
+                [
+                    key.user,
+                    key.created_on.isoformat(),
+                    key.key_type,
+                    key.key_size,
+                    key.fingerprint,
+                    key.fingerprint_sha256,
+                    key.comment,
+                ]
             )
-            for key, user in user_key_list:
-                w_csv.writerow(
-                    [
-                        user.name,
-                        key.created_on.isoformat(),
-                        key.key_type,
-                        key.key_size,
-                        key.fingerprint,
-                        key.fingerprint_sha256,
-                        key.comment,
-                    ]
-                )
 
-        self.set_header("Content-Type", "text/csv")
-        self.write(fh.getvalue())
+        return fh.getvalue().encode()
+
+
+class PublicKeyByFingerprint(GraphHandler):
+    """Find the owner of a public key by its MD5 or SHA256 fingerprint.
+
+    SHA256 fingerprints may contain slashes, which may be given either literally or URL-encoded.
+    """
+
+    def get(self, *args, **kwargs):
+        # type: (*Any, **Any) -> None
+        fingerprint = kwargs["fingerprint"]  # type: str
+        key = self.graph.get_public_key_by_fingerprint(fingerprint)
+        if key is None:
+            return self.notfound(f"Public key ({fingerprint}) not found.")
+        return self.success(
+            {
+                "user": key.user,
+                "public_key": {
+                    "id": key.id,
+                    "public_key": key.public_key,
+                    "fingerprint": key.fingerprint,
+                    "fingerprint_sha256": key.fingerprint_sha256,
+                    "key_type": key.key_type,
+                    "key_size": key.key_size,
+                    "comment": key.comment,
+                    "created_on": str(key.created_on),
+                },
+            }
+        )
 
 
 class Grants(GraphHandler, ListGrantsUI):
+    """Return the grants of all permissions, or of a single permission.
+
+    Listing all grants runs on the worker pool, so the UI callbacks only record the response data.
+    """
+
+    _listed = None  # type: Optional[Dict[str, Any]]
+
+    def get_lane(self):
+        # type: () -> str
+        return POINT_LANE if self.path_kwargs.get("name") else BULK_LANE
+
     def listed_grants(self, grants):
         # type: (Dict[str, UniqueGrantsOfPermission]) -> None
-        grants_dict = {
-            k: {
-                "users": v.users,
-                "role_users": v.role_users,
-                "service_accounts": v.service_accounts,
-            }
-            for k, v in grants.items()
-        }
-        self.success({"permissions": grants_dict})
+        self._listed = {"permissions": self._grants_to_dict(grants)}
 
     def listed_grants_of_permission(self, permission, grants):
         # type: (str, UniqueGrantsOfPermission) -> None
@@ -293,32 +685,66 @@ class Grants(GraphHandler, ListGrantsUI):
             "role_users": grants.role_users,
             "service_accounts": grants.service_accounts,
         }
-        self.success({"permission": permission, "grants": grants_dict})
+        self._listed = {"permission": permission, "grants": grants_dict}
 
-    def get(self, *args, **kwargs):
+    async def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
         permission = kwargs.get("name")  # type: Optional[str]
+        if not permission and self.is_paginated():
+            try:
+                permissions, next_cursor = self.get_page("grants")
+            except InvalidPagination as e:
+                return self.badrequest(str(e))
+            grants = {p: self.graph.all_grants_of_permission(p) for p in permissions}
+            return self.success(
+                {"permissions": self._grants_to_dict(grants), "next_cursor": next_cursor}
+            )
+
         usecase = self.usecase_factory.create_list_grants_usecase(self)
         if permission:
             usecase.list_grants_of_permission(permission)
         else:
-            usecase.list_grants()
+            await self.run_in_worker(usecase.list_grants)
+        self.success(self._listed)
+
+    @staticmethod
+    def _grants_to_dict(grants):
+        # type: (Dict[str, UniqueGrantsOfPermission]) -> Dict[str, Dict[str, Any]]
+        return {
+            k: {
+                "users": v.users,
+                "role_users": v.role_users,
+                "service_accounts": v.service_accounts,
+            }
+            for k, v in grants.items()
+        }
 
 
 class Groups(GraphHandler):
-    def get(self, *args, **kwargs):
+    async def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
         name = kwargs.get("name")  # type: Optional[str]
-        with self.graph.lock:
-            if not name:
-                return self.success({"groups": self.graph.groups})
-
+        if not name and self.is_paginated():
             try:
-                details = self.graph.get_group_details(name, expose_aliases=False)
-            except NoSuchGroup:
-                return self.notfound("Group (%s) not found." % name)
+                groups, next_cursor = self.get_page("groups")
+            except InvalidPagination as e:
+                return self.badrequest(str(e))
+            return self.success({"groups": groups, "next_cursor": next_cursor})
 
-            return self.success(details)
+        if not name:
+            return self.success({"groups": self.graph.groups})
+
+        try:
+            fields = self.get_fields(GROUP_DETAIL_FIELDS)
+            details = await self.run_in_worker(
+                partial(self.graph.get_group_details, name, expose_aliases=False, fields=fields)
+            )
+        except UnknownFields as e:
+            return self.badrequest(f"Unknown fields: {e}")
+        except NoSuchGroup:
+            return self.notfound("Group (%s) not found." % name)
+
+        return self.success(details)
 
 
 class Permissions(GraphHandler, ListPermissionsUI):
@@ -326,29 +752,51 @@ class Permissions(GraphHandler, ListPermissionsUI):
         # type: (PaginatedList[Permission], bool) -> None
         self.success({"permissions": [p.name for p in permissions.values]})
 
-    def get(self, *args, **kwargs):
+    async def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
         name = kwargs.get("name")  # type: Optional[str]
         if not name:
+            if self.is_paginated():
+                try:
+                    permissions, next_cursor = self.get_page("permissions")
+                except InvalidPagination as e:
+                    return self.badrequest(str(e))
+                return self.success({"permissions": permissions, "next_cursor": next_cursor})
+
             usecase = self.usecase_factory.create_list_permissions_usecase(self)
             usecase.simple_list_permissions()
             return
 
-        with self.graph.lock:
-            if name not in self.graph.permissions:
-                return self.notfound("Permission (%s) not found." % name)
+        try:
+            fields = self.get_fields(PERMISSION_DETAIL_FIELDS)
+        except UnknownFields as e:
+            return self.badrequest(f"Unknown fields: {e}")
 
-            details = self.graph.get_permission_details(name, expose_aliases=False)
+        try:
+            details = await self.run_in_worker(
+                partial(
+                    self.graph.get_permission_details, name, expose_aliases=False, fields=fields
+                )
+            )
+        except NoSuchPermission:
+            return self.notfound("Permission (%s) not found." % name)
 
-            out = {"permission": {"name": name}}
-            try_update(out, details)
-            self.success(out)
+        out = {"permission": {"name": name}}
+        try_update(out, details)
+        self.success(out)
 
 
 class TokenValidate(GraphHandler):
+    """Validate a user token.
+
+    Tokens are looked up in the TokenCache first, so that repeated validations of the same token
+    don't require database access.  Otherwise, the token is loaded on the database pool.  The
+    secret is always checked against the stored hash.
+    """
+
     validator = re.compile(TOKEN_FORMAT)
 
-    def post(self, *args, **kwargs):
+    async def post(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
         supplied_token = self.get_body_argument("token")
         match = TokenValidate.validator.match(supplied_token)
@@ -359,16 +807,37 @@ class TokenValidate(GraphHandler):
         token_secret = match.group("token_secret")
         username = match.group("name")
 
+        checkpoint, _ = self.graph.current_checkpoint()
+        cached, token = self.token_cache.get(checkpoint, username, token_name)
+        if not cached:
+            try:
+                token = await self.run_in_database_pool(self._load_token, username, token_name)
+            except TimeoutError:
+                return self.unavailable("Timed out waiting for the database")
+            self.token_cache.set(checkpoint, username, token_name, token)
+
+        if token is None:
+            return self.error(((2, "Token specified does not exist"),))
+        if not token.enabled:
+            return self.error(((3, "Token is disabled"),))
+        if not secret_matches(token.hashed_secret, token_secret):
+            return self.error(((4, "Token secret mismatch"),))
+        return self.success(
+            {"owner": username, "identity": token.identity, "act_as_owner": True, "valid": True}
+        )
+
+    @staticmethod
+    def _load_token(username, token_name):
+        # type: (str, str) -> Optional[CachedToken]
         with closing(Session()) as session:
             token = UserToken.get_by_value(session, username, token_name)
             if token is None:
-                return self.error(((2, "Token specified does not exist"),))
-            if not token.enabled:
-                return self.error(((3, "Token is disabled"),))
-            if not token.check_secret(token_secret):
-                return self.error(((4, "Token secret mismatch"),))
-            return self.success(
-                {"owner": username, "identity": str(token), "act_as_owner": True, "valid": True}
+                return None
+            return CachedToken(
+                identity=str(token),
+                owner=token.user.username,
+                hashed_secret=token.hashed_secret,
+                enabled=token.enabled,
             )
 
 
@@ -378,22 +847,24 @@ class ServiceAccounts(GraphHandler):
         name = kwargs.get("name")  # type: Optional[str]
         if name is not None:
             try:
-                return self.success(get_individual_user_info(self, name, service_account=True))
+                fields = self.get_fields(USER_FIELDS)
+                return self.success(
+                    get_individual_user_info(self.graph, name, service_account=True, fields=fields)
+                )
+            except UnknownFields as e:
+                return self.badrequest(f"Unknown fields: {e}")
             except NoSuchUser:
                 return self.notfound(f"User ({name}) not found.")
 
-        with self.graph.lock:
-            return self.success(
-                {
-                    "service_accounts": sorted(
-                        [
-                            k
-                            for k, v in self.graph.user_metadata.items()
-                            if "service_account" in v or v["role_user"]
-                        ]
-                    )
-                }
-            )
+        if self.is_paginated():
+            try:
+                service_accounts, next_cursor = self.get_page("service_accounts")
+            except InvalidPagination as e:
+                return self.badrequest(str(e))
+            return self.success({"service_accounts": service_accounts, "next_cursor": next_cursor})
+
+        _, service_accounts = self.graph.get_listing("service_accounts")
+        return self.success({"service_accounts": service_accounts})
 
 
 class NotFound(GraphHandler):
@@ -9,30 +9,65 @@ from typing import TYPE_CHECKING
 from tornado.httpserver import HTTPServer
 from tornado.ioloop import IOLoop
 
+from grouper.api.admission import AdmissionController, BULK_LANE, Lane, POINT_LANE
+from grouper.api.cache import CheckpointCache, TokenCache
 from grouper.api.routes import HANDLERS
 from grouper.api.settings import ApiSettings
+from grouper.api.workers import DatabasePool, WorkerPool
 from grouper.app import GrouperApplication
-from grouper.database import DbRefreshThread
+from grouper.database import DbRefreshThread, GraphSnapshotThread
 from grouper.error_reporting import setup_signal_handlers
 from grouper.graph import Graph
 from grouper.initialization import create_graph_usecase_factory
-from grouper.models.base.session import get_db_engine, Session
+from grouper.models.base.session import DbEngineManager, Session
 from grouper.plugin import set_global_plugin_proxy
 from grouper.plugin.exceptions import PluginsDirectoryDoesNotExist
 from grouper.plugin.proxy import PluginProxy
+from grouper.query_stats import configure_query_stats
+from grouper.repositories.factory import SessionFactory
 from grouper.setup import build_arg_parser, setup_logging
 
 if TYPE_CHECKING:
     from argparse import Namespace
     from grouper.graph import GroupGraph
     from grouper.usecases.factory import UseCaseFactory
+    from threading import Thread
     from typing import List
 
 
+def create_admission_controller(settings):
+    # type: (ApiSettings) -> AdmissionController
+    lanes = {
+        POINT_LANE: Lane(
+            settings.point_lane_max_concurrent,
+            settings.point_lane_max_per_endpoint,
+            settings.point_lane_max_queued,
+        ),
+        BULK_LANE: Lane(
+            settings.bulk_lane_max_concurrent,
+            settings.bulk_lane_max_per_endpoint,
+            settings.bulk_lane_max_queued,
+        ),
+    }
+    return AdmissionController(
+        lanes, settings.overload_retry_after, settings.admission_queue_timeout
+    )
+
+
 def create_api_application(graph, settings, plugins, usecase_factory):
     # type: (GroupGraph, ApiSettings, PluginProxy, UseCaseFactory) -> GrouperApplication
     tornado_settings = {"debug": settings.debug}
-    handler_settings = {"graph": graph, "plugins": plugins, "usecase_factory": usecase_factory}
+    handler_settings = {
+        "graph": graph,
+        "plugins": plugins,
+        "usecase_factory": usecase_factory,
+        "response_cache": CheckpointCache(),
+        "token_cache": TokenCache(ttl=settings.token_cache_ttl),
+        "workers": WorkerPool(settings.worker_threads, settings.max_workers_per_endpoint),
+        "database_pool": DatabasePool(settings.database_threads, settings.database_timeout),
+        "admission": create_admission_controller(settings),
+        "stale_graph_age": settings.stale_graph_age,
+    }
     handlers = [(route, handler_class, handler_settings) for (route, handler_class) in HANDLERS]
     return GrouperApplication(handlers, **tornado_settings)
 
@@ -50,16 +85,39 @@ def start_server(args, settings, plugins):
     logging.info("configure database session")
     if args.database_url:
         settings.database = args.database_url
-    Session.configure(bind=get_db_engine(settings.database))
+    configure_query_stats(settings.slow_query_threshold, plugins.log_slow_query)
+    Session.configure(bind=DbEngineManager().get_db_engine(settings.database))
     logging.info("database session is configured")
 
-    logging.info("Initializing DB Graph")
-    with closing(Session()) as session:
-        graph = Graph()
-        graph.update_from_db(session)
-    logging.info("DB Graph successfully initialized")
-
-    refresher = DbRefreshThread(settings, plugins, graph, settings.refresh_interval)
+    # Start from the graph published by grouper-graphd or, failing that, from a snapshot saved by
+    # this server, which is served while the refresh thread loads the graph from the database.  If
+    # there is neither, load the graph before accepting requests.
+    graph = Graph()
+    snapshot_path = settings.graph_builder_path or settings.graph_snapshot
+    if snapshot_path and graph.load_snapshot(snapshot_path):
+        logging.info("Loaded graph from %s at checkpoint %d", snapshot_path, graph.checkpoint)
+    else:
+        logging.info("Initializing DB Graph")
+        with closing(SessionFactory(settings).create_read_only_session()) as session:
+            graph.update_from_db(session)
+        logging.info("DB Graph successfully initialized")
+
+    if settings.graph_builder_path:
+        refresher = GraphSnapshotThread(
+            graph, settings.graph_builder_path, settings.min_refresh_interval
+        )  # type: Thread
+    else:
+        refresher = DbRefreshThread(
+            settings,
+            plugins,
+            graph,
+            settings.refresh_interval,
+            min_interval=settings.min_refresh_interval,
+            jitter=settings.refresh_jitter,
+            serve_stale=settings.serve_stale_graph,
+            max_backoff=settings.max_refresh_backoff,
+            snapshot_path=settings.graph_snapshot,
+        )
     refresher.daemon = True
     refresher.start()
 
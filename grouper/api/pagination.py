@@ -0,0 +1,89 @@
+"""Cursor pagination for API list endpoints.
+
+The graph maintains a sorted list of names for each API listing, rebuilt once per checkpoint.  A
+page is a slice of that list, and the cursor returned with each page records the checkpoint, the
+offset of the next page, and the last name returned.  If the graph has not changed since the
+cursor was issued, the offset is used directly.  Otherwise, the next page starts after the last
+name returned, found by binary search in the new list, so paging continues correctly across graph
+updates.
+
+Cursors are opaque to clients and should be passed back unmodified.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from bisect import bisect_right
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+# Maximum number of entries that may be requested in one page.
+MAX_PAGE_LIMIT = 10000
+
+
+class InvalidPagination(Exception):
+    """The limit or cursor of a paginated request was invalid."""
+
+    pass
+
+
+def encode_cursor(checkpoint, offset, last):
+    # type: (int, int, str) -> str
+    data = json.dumps([checkpoint, offset, last], separators=(",", ":"))
+    return urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor):
+    # type: (str) -> Tuple[int, int, str]
+    try:
+        checkpoint, offset, last = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+    except (BinasciiError, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidPagination("Invalid cursor")
+    if not (isinstance(checkpoint, int) and isinstance(offset, int) and isinstance(last, str)):
+        raise InvalidPagination("Invalid cursor")
+    return checkpoint, offset, last
+
+
+def parse_limit(limit):
+    # type: (Optional[str]) -> int
+    if limit is None:
+        return MAX_PAGE_LIMIT
+    try:
+        value = int(limit)
+    except ValueError:
+        raise InvalidPagination(f"Invalid limit: {limit}")
+    if value < 1 or value > MAX_PAGE_LIMIT:
+        raise InvalidPagination(f"Limit must be between 1 and {MAX_PAGE_LIMIT}")
+    return value
+
+
+def paginate(names, checkpoint, cursor, limit):
+    # type: (List[str], int, Optional[str], int) -> Tuple[List[str], Optional[str]]
+    """Return a page of a sorted list of names and the cursor for the next page.
+
+    Args:
+        names: Sorted list of names for the current checkpoint
+        checkpoint: Checkpoint of the graph from which names was taken
+        cursor: Cursor returned with the previous page, or None for the first page
+        limit: Maximum number of names to return
+
+    Returns:
+        The page of names and the cursor for the next page, or None if this is the last page.
+    """
+    start = 0
+    if cursor:
+        cursor_checkpoint, offset, last = decode_cursor(cursor)
+        same_checkpoint = cursor_checkpoint == checkpoint and 0 < offset <= len(names)
+        if same_checkpoint and names[offset - 1] == last:
+            start = offset
+        else:
+            start = bisect_right(names, last)
+
+    page = names[start : start + limit]
+    end = start + len(page)
+    if page and end < len(names):
+        return page, encode_cursor(checkpoint, end, page[-1])
+    else:
+        return page, None
@@ -6,11 +6,13 @@ additional arguments will be injected when the Tornado Application object is cre
 """
 
 from grouper.api.handlers import (
+    AuthorizedKeys,
     Grants,
     Groups,
     MultiUsers,
     NotFound,
     Permissions,
+    PublicKeyByFingerprint,
     ServiceAccounts,
     TokenValidate,
     UserMetadata,
@@ -19,9 +21,11 @@ from grouper.api.handlers import (
 )
 from grouper.constants import NAME_VALIDATION, PERMISSION_VALIDATION
 from grouper.handlers.health_check import HealthCheck
+from grouper.handlers.stats import Stats
 
 HANDLERS = [
     ("/debug/health", HealthCheck),
+    ("/debug/stats", Stats),
     ("/grants", Grants),
     (f"/grants/{PERMISSION_VALIDATION}", Grants),
     ("/groups", Groups),
@@ -29,10 +33,12 @@ HANDLERS = [
     ("/permissions", Permissions),
     (f"/permissions/{PERMISSION_VALIDATION}", Permissions),
     ("/public-keys", UsersPublicKeys),
+    ("/public-keys/(?P<fingerprint>.+)", PublicKeyByFingerprint),
     ("/service_accounts", ServiceAccounts),
     (f"/service_accounts/{NAME_VALIDATION}", ServiceAccounts),
     ("/user-metadata", UserMetadata),
     ("/users", Users),
+    (f"/users/{NAME_VALIDATION}/authorized_keys", AuthorizedKeys),
     (f"/users/{NAME_VALIDATION}", Users),
     ("/multi/users", MultiUsers),
     ("/token/validate", TokenValidate),
@@ -24,10 +24,30 @@ class ApiSettings(Settings):
 
         # Keep attributes here in the same order as in config/dev.yaml.
         self.address = None  # type: Optional[str]
+        self.database_threads = 4
+        self.database_timeout = 5
         self.debug = False
         self.num_processes = 1
         self.port = 8990
         self.refresh_interval = 60
+        self.min_refresh_interval = 5
+        self.refresh_jitter = 0.2
+        self.token_cache_ttl = 30
+        self.worker_threads = 4
+        self.max_workers_per_endpoint = 2
+        self.point_lane_max_concurrent = 100
+        self.point_lane_max_per_endpoint = 50
+        self.point_lane_max_queued = 1000
+        self.bulk_lane_max_concurrent = 4
+        self.bulk_lane_max_per_endpoint = 2
+        self.bulk_lane_max_queued = 16
+        self.overload_retry_after = 5
+        self.admission_queue_timeout = 10
+        self.serve_stale_graph = False
+        self.max_refresh_backoff = 600
+        self.stale_graph_age = 300
+        self.graph_snapshot = None  # type: Optional[str]
+        self.graph_builder_path = None  # type: Optional[str]
 
     def update_from_config(self, filename=None, section="api"):
         # type: (Optional[str], Optional[str]) -> None
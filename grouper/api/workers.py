@@ -0,0 +1,88 @@
+"""Thread pools for CPU-heavy API requests and blocking database queries.
+
+The API server handles requests on a single Tornado IOLoop thread, so a request that spends a long
+time walking the graph blocks every other request in that process.  Handlers for such requests
+hand the graph work to a WorkerPool and wait for the result without blocking the IOLoop.
+
+Each endpoint may only have a limited number of requests running on the pool at once.  Further
+requests for that endpoint wait on the IOLoop until one finishes, so a burst of bulk requests
+cannot take every worker thread and starve other endpoints.
+
+Handlers that query the database use a separate DatabasePool, so that a slow database cannot take
+the threads needed for graph work, and wait for the query for at most a fixed time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import TYPE_CHECKING, TypeVar
+
+from tornado.gen import with_timeout
+from tornado.ioloop import IOLoop
+from tornado.locks import Semaphore
+
+from grouper.query_stats import query_caller
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Optional
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """Bounded thread pool with per-endpoint concurrency limits.
+
+    Work run on the pool must not touch the request handler's response, since Tornado is not
+    thread-safe.  It should only compute and return data, which the handler then writes from the
+    IOLoop thread.
+    """
+
+    def __init__(self, max_workers, max_per_endpoint):
+        # type: (int, int) -> None
+        self.max_per_endpoint = max(1, min(max_per_endpoint, max_workers))
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="grouper-api-worker")
+        self._semaphores = {}  # type: Dict[str, Semaphore]
+
+    async def run(self, endpoint, fn, *args):
+        # type: (str, Callable[..., T], *Any) -> T
+        """Run fn(*args) on the pool, waiting for a free slot for endpoint first."""
+        if endpoint not in self._semaphores:
+            self._semaphores[endpoint] = Semaphore(self.max_per_endpoint)
+        async with self._semaphores[endpoint]:
+            return await IOLoop.current().run_in_executor(self._executor, fn, *args)
+
+
+class DatabasePool:
+    """Thread pool for blocking database queries made while handling requests.
+
+    Waiting for a query is bounded by timeout seconds, after which run raises
+    tornado.util.TimeoutError.  The query itself cannot be interrupted and keeps its thread until
+    it finishes, so the pool should be large enough to absorb a few slow queries.
+    """
+
+    def __init__(self, max_workers, timeout):
+        # type: (int, float) -> None
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="grouper-api-db")
+
+    async def run(self, fn, *args, caller=None):
+        # type: (Callable[..., T], *Any, Optional[str]) -> T
+        """Run fn(*args) on the pool and return its result.
+
+        If caller is given, queries made by fn are attributed to it in the query statistics.
+
+        Raises:
+            tornado.util.TimeoutError: if fn did not finish within the timeout
+        """
+        if caller:
+            future = IOLoop.current().run_in_executor(
+                self._executor, _run_as_caller, caller, fn, *args
+            )
+        else:
+            future = IOLoop.current().run_in_executor(self._executor, fn, *args)
+        return await with_timeout(timedelta(seconds=self.timeout), future)
+
+
+def _run_as_caller(caller, fn, *args):
+    # type: (str, Callable[..., T], *Any) -> T
+    with query_caller(caller):
+        return fn(*args)
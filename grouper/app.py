@@ -1,6 +1,7 @@
 """Code common to all Grouper UIs using Tornado.
 
-Provides GrouperApplication, a subclass of Tornado's Application class, with standardized logging.
+Provides GrouperApplication, a subclass of Tornado's Application class, with standardized logging
+and collection of request statistics for /debug/stats.
 """
 
 from typing import TYPE_CHECKING
@@ -8,13 +9,25 @@ from typing import TYPE_CHECKING
 from tornado.log import access_log
 from tornado.web import Application
 
+from grouper.stats import RequestStats
+
 if TYPE_CHECKING:
     from tornado.web import RequestHandler
+    from typing import Any
 
 
 class GrouperApplication(Application):
+    def __init__(self, *args, **kwargs):
+        # type: (*Any, **Any) -> None
+        super().__init__(*args, **kwargs)
+        self.stats = RequestStats()
+
     def log_request(self, handler):
         # type: (RequestHandler) -> None
+        self.stats.record(
+            type(handler).__name__, handler.get_status(), handler.request.request_time()
+        )
+
         if handler.get_status() < 400:
             log_method = access_log.info
         elif handler.get_status() < 500:
@@ -18,7 +18,7 @@ if TYPE_CHECKING:
     from grouper.models.base.session import Session
     from grouper.settings import Settings
     from sqlalchemy.orm.query import Query
-    from typing import Set
+    from typing import Any, Mapping, Optional, Set, Tuple
 
 
 class UserNotAuditor(Exception):
@@ -178,14 +178,22 @@ def get_auditors_group(settings: Settings, session: Session) -> Group:
     return group
 
 
-def get_group_audit_members_infos(session: Session, group: Group) -> List[AuditMemberInfo]:
+def get_group_audit_members_infos(
+    session: Session, group: Group, members: Optional[Mapping[Tuple[str, str], Any]] = None
+) -> List[AuditMemberInfo]:
     """Get audit information about the members of a group.
 
     Note that only current members of the group are relevant, i.e., members of the group at the
     time the current audit was started but are no longer part of the group are excluded, as are
     members of the group added after the audit was started.
+
+    members is the result of group.my_members(), if the caller has already loaded it.
     """
-    members_edge_ids = {member.edge_id for member in group.my_members().values()}
+    if not group.audit_id:
+        return []
+    if members is None:
+        members = group.my_members()
+    members_edge_ids = {member.edge_id for member in members.values()}
     user_members = (
         session.query(AuditMember, GroupEdge._role, User)
         .filter(
@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+
+from grouper.models.audit_log import AuditLog, AuditLogArchive
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from grouper.models.base.session import Session
+
+
+def archive_audit_log(session, cutoff, chunk_size):
+    # type: (Session, datetime, int) -> int
+    """Move audit log entries older than cutoff to the archive.
+
+    Entries are moved oldest first, at most chunk_size to a transaction, so that each transaction
+    stays small and the archive never holds an entry newer than one still in audit_log.
+
+    Returns:
+        The number of entries moved.
+    """
+    columns = [column.name for column in AuditLog.__table__.columns]
+    moved = 0
+    while True:
+        chunk = (
+            session.query(AuditLog.id)
+            .filter(AuditLog.log_time < cutoff)
+            .order_by(AuditLog.log_time, AuditLog.id)
+            .limit(chunk_size)
+        )
+        ids = [entry_id for entry_id, in chunk]
+        if not ids:
+            return moved
+
+        entries = select([AuditLog.__table__.c[c] for c in columns]).where(AuditLog.id.in_(ids))
+        session.execute(AuditLogArchive.__table__.insert().from_select(columns, entries))
+        session.query(AuditLog).filter(AuditLog.id.in_(ids)).delete(synchronize_session=False)
+        session.commit()
+        moved += len(ids)
@@ -0,0 +1,197 @@
+"""Batched writes of audit log entries.
+
+Audit log entries are not inserted one at a time as they are logged.  Instead, they are buffered
+on the session and inserted with a single executemany INSERT when its transaction commits, so a
+transaction that logs many entries makes one round trip to the database for all of them.  Code that
+reads the audit log within the transaction calls write_pending_entries first so that it sees them.
+If the transaction is rolled back, its buffered entries are discarded along with the rest of it.
+
+The IDs of the inserted entries are read back with one more query.  Once the transaction has
+committed, a background thread loads the entries by ID in batches, with their relationships, and
+passes them to plugins, so that plugins that ship entries elsewhere don't add their latency to the
+request that logged them.
+"""
+
+import atexit
+import logging
+from collections import defaultdict
+from contextlib import closing
+from queue import Queue
+from threading import Lock, Thread
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import joinedload
+
+from grouper.models.base.session import Session, SessionWithoutAdd
+
+if TYPE_CHECKING:
+    from grouper.models.audit_log import AuditLog
+    from grouper.plugin.proxy import PluginProxy
+    from sqlalchemy.engine import Connectable
+    from typing import Any, Dict, List, Optional, Tuple, Type
+
+    # Plugins to call, database, class, and IDs of a batch of committed entries.
+    _Batch = Tuple[PluginProxy, Connectable, Type[AuditLog], List[int]]
+
+# Key in Session.info for the entries waiting to be inserted.
+_PENDING_ENTRIES = "grouper.audit_log_writer.pending"
+
+# Key in Session.info for the class, ID, and plugins of entries inserted in this transaction.
+_WRITTEN_ENTRIES = "grouper.audit_log_writer.written"
+
+# Columns that identify an inserted entry when reading back IDs.  log_time is left out because the
+# database may store it with less precision than it was logged with.
+_MATCH_COLUMNS = (
+    "actor_id",
+    "action",
+    "description",
+    "on_user_id",
+    "on_group_id",
+    "on_permission_id",
+    "category",
+)
+
+# Maximum number of entries passed to plugins in one call.
+PLUGIN_BATCH_SIZE = 100
+
+
+def queue_audit_log_entry(session, entry, plugins):
+    # type: (Session, AuditLog, PluginProxy) -> None
+    """Insert entry when the session's transaction commits and then pass it to plugins."""
+    session.info.setdefault(_PENDING_ENTRIES, []).append((entry, plugins))
+
+
+def write_pending_entries(session):
+    # type: (Session) -> None
+    """Insert the entries buffered on session with a single statement.
+
+    The IDs of the new rows are then read back.  Any ID allocated for a new row is larger than the
+    largest ID visible beforehand, so the query only reads newer rows, which may include rows
+    committed meanwhile by other transactions.  Those are told apart by their columns.
+    """
+    pending = session.info.pop(_PENDING_ENTRIES, None)
+    if not pending:
+        return
+    entry_class = type(pending[0][0])
+    table = entry_class.__table__
+    columns = [c.name for c in table.columns if c.name != "id"]
+
+    last_id = session.execute(select([func.max(table.c.id)])).scalar() or 0
+    session.execute(table.insert(), [{c: getattr(e, c) for c in columns} for e, _ in pending])
+    rows = session.execute(
+        select([table.c.id] + [table.c[c] for c in _MATCH_COLUMNS])
+        .where(table.c.id > last_id)
+        .order_by(table.c.id)
+    )
+
+    written = session.info.setdefault(_WRITTEN_ENTRIES, [])
+    remaining = iter(pending)
+    entry, plugins = next(remaining)
+    for row in rows:
+        if all(row[c] == getattr(entry, c) for c in _MATCH_COLUMNS):
+            entry.id = row.id
+            written.append((entry_class, row.id, plugins))
+            next_entry = next(remaining, None)
+            if not next_entry:
+                return
+            entry, plugins = next_entry
+    logging.error("Could not find the IDs of inserted audit log entries")
+
+
+def _dispatch_committed_entries(session):
+    # type: (Session) -> None
+    written = session.info.pop(_WRITTEN_ENTRIES, None)
+    if not written:
+        return
+    ids_by_plugins = defaultdict(list)  # type: Dict[Tuple[Type[AuditLog], PluginProxy], List[int]]
+    for entry_class, entry_id, plugins in written:
+        ids_by_plugins[(entry_class, plugins)].append(entry_id)
+    for (entry_class, plugins), ids in ids_by_plugins.items():
+        _dispatcher.submit(plugins, session.get_bind(), entry_class, ids)
+
+
+def _discard_pending_entries(session, transaction):
+    # type: (Session, Any) -> None
+    if transaction.parent is None:
+        session.info.pop(_PENDING_ENTRIES, None)
+        session.info.pop(_WRITTEN_ENTRIES, None)
+
+
+event.listen(SessionWithoutAdd, "before_commit", write_pending_entries)
+event.listen(SessionWithoutAdd, "after_commit", _dispatch_committed_entries)
+event.listen(SessionWithoutAdd, "after_transaction_end", _discard_pending_entries)
+
+
+class PluginDispatcher:
+    """Background thread that passes committed audit log entries to plugins in batches.
+
+    Errors raised by plugins, or while loading the entries, are logged and otherwise ignored, since
+    the entries have already been committed.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._queue = Queue()  # type: Queue[_Batch]
+        self._lock = Lock()
+        self._thread = None  # type: Optional[Thread]
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, plugins, bind, entry_class, ids):
+        # type: (PluginProxy, Connectable, Type[AuditLog], List[int]) -> None
+        """Pass the entries of entry_class with the given IDs, loaded from bind, to plugins."""
+        with self._lock:
+            if not self._thread:
+                self._thread = Thread(target=self._run, name="audit-log-plugins", daemon=True)
+                self._thread.start()
+        for i in range(0, len(ids), PLUGIN_BATCH_SIZE):
+            self._queue.put((plugins, bind, entry_class, ids[i : i + PLUGIN_BATCH_SIZE]))
+
+    def flush(self):
+        # type: () -> None
+        """Wait until every submitted entry has been passed to plugins."""
+        self._queue.join()
+
+    def _run(self):
+        # type: () -> None
+        while True:
+            plugins, bind, entry_class, ids = self._queue.get()
+            try:
+                entries = self._load_entries(bind, entry_class, ids)
+                plugins.log_auditlog_entries(entries)
+            except Exception:
+                self.logger.exception("Plugin failed to log audit log entries")
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _load_entries(bind, entry_class, ids):
+        # type: (Connectable, Type[AuditLog], List[int]) -> List[AuditLog]
+        """Load the entries with their relationships and detach them from the session."""
+        with closing(Session(bind=bind)) as session:
+            entries = (
+                session.query(entry_class)
+                .options(
+                    joinedload(entry_class.actor),
+                    joinedload(entry_class.on_user),
+                    joinedload(entry_class.on_group),
+                    joinedload(entry_class.on_permission),
+                )
+                .filter(entry_class.id.in_(ids))
+                .order_by(entry_class.id)
+                .all()
+            )
+            session.expunge_all()
+        return entries
+
+
+_dispatcher = PluginDispatcher()
+
+# Don't exit with entries that plugins haven't seen yet.
+atexit.register(_dispatcher.flush)
+
+
+def flush_plugin_queue():
+    # type: () -> None
+    """Wait until all committed audit log entries have been passed to plugins."""
+    _dispatcher.flush()
@@ -3,13 +3,14 @@ import os
 import sys
 from collections import defaultdict
 from contextlib import closing
-from datetime import datetime
+from datetime import datetime, timedelta
 from time import sleep
 from typing import TYPE_CHECKING
 
 from sqlalchemy import and_
 
 from grouper.audit import get_auditors_group
+from grouper.audit_log import archive_audit_log
 from grouper.constants import PERMISSION_AUDITOR
 from grouper.email_util import (
     notify_edge_expiration,
@@ -19,10 +20,12 @@ from grouper.email_util import (
 from grouper.entities.group_edge import APPROVER_ROLE_INDICES
 from grouper.graph import Graph
 from grouper.models.base.session import Session
+from grouper.models.checkpoint_update import compact_checkpoint_updates
 from grouper.models.group import Group
 from grouper.models.group_edge import GroupEdge
 from grouper.models.user import User
 from grouper.perf_profile import prune_old_traces
+from grouper.query_stats import set_query_caller
 
 if TYPE_CHECKING:
     from grouper.background.settings import BackgroundSettings
@@ -33,7 +36,8 @@ if TYPE_CHECKING:
 class BackgroundProcessor:
     """Background process for running periodic tasks.
 
-    Currently, this sends asynchronous mail messages and handles edge expiration and notification.
+    Currently, this sends asynchronous mail messages, handles edge expiration and notification,
+    archives old audit log entries, and compacts the checkpoint updates.
     """
 
     def __init__(self, settings, plugins):
@@ -123,8 +127,19 @@ class BackgroundProcessor:
 
         session.commit()
 
+    def archive_audit_log(self, session):
+        # type: (Session) -> None
+        """Move audit log entries older than audit_log_archive_days to the archive, if set."""
+        if self.settings.audit_log_archive_days is None:
+            return
+        cutoff = datetime.utcnow() - timedelta(days=self.settings.audit_log_archive_days)
+        chunk_size = self.settings.audit_log_archive_chunk_size
+        moved = archive_audit_log(session, cutoff, chunk_size)
+        self.logger.info("Archived {} audit log entries".format(moved))
+
     def run(self):
         # type: () -> None
+        set_query_caller(type(self).__name__)
         initial_url = self.settings.database
         while True:
             try:
@@ -143,6 +158,12 @@ class BackgroundProcessor:
                     self.logger.info("Pruning old traces....")
                     prune_old_traces(session)
 
+                    self.logger.info("Archiving old audit log entries...")
+                    self.archive_audit_log(session)
+
+                    self.logger.info("Compacting checkpoint updates...")
+                    compact_checkpoint_updates(session)
+
                     session.commit()
 
                 self.plugins.log_background_run(success=True)
@@ -7,10 +7,11 @@ from grouper import __version__
 from grouper.background.background_processor import BackgroundProcessor
 from grouper.background.settings import BackgroundSettings
 from grouper.error_reporting import setup_signal_handlers
-from grouper.models.base.session import get_db_engine, Session
+from grouper.models.base.session import DbEngineManager, Session
 from grouper.plugin import set_global_plugin_proxy
 from grouper.plugin.exceptions import PluginsDirectoryDoesNotExist
 from grouper.plugin.proxy import PluginProxy
+from grouper.query_stats import configure_query_stats
 from grouper.settings import default_settings_path
 from grouper.setup import setup_logging
 
@@ -56,7 +57,8 @@ def start_processor(args, settings):
 
     # setup database
     logging.debug("configure database session")
-    Session.configure(bind=get_db_engine(settings.database))
+    configure_query_stats(settings.slow_query_threshold, plugins.log_slow_query)
+    Session.configure(bind=DbEngineManager().get_db_engine(settings.database))
 
     background = BackgroundProcessor(settings, plugins)
     background.run()
@@ -23,6 +23,8 @@ class BackgroundSettings(Settings):
         super().__init__()
 
         # Keep attributes here in the same order as in config/dev.yaml.
+        self.audit_log_archive_days = None  # type: Optional[int]
+        self.audit_log_archive_chunk_size = 1000
         self.sleep_interval = 60
 
     def update_from_config(self, filename=None, section="background"):
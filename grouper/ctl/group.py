@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import csv
+import json
 import logging
+import re
 import sys
 from contextlib import contextmanager
 from typing import TYPE_CHECKING
 
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import label
+
+from grouper.constants import NAME_VALIDATION
 from grouper.ctl.util import argparse_validate_date, ensure_valid_groupname, ensure_valid_username
-from grouper.models.audit_log import AuditLog
+from grouper.models.audit_log import AuditLog, AuditLogArchive
 from grouper.models.group import Group
+from grouper.models.permission import Permission
 from grouper.models.user import User
 from grouper.plugin.exceptions import PluginRejectedGroupMembershipUpdate
 
@@ -17,7 +24,10 @@ if TYPE_CHECKING:
     from grouper.ctl.settings import CtlSettings
     from grouper.models.base.session import Session
     from grouper.repositories.factory import SessionFactory
-    from typing import Iterator, IO
+    from typing import Any, Callable, Iterator, IO, List, Optional, Type, Union
+
+# Number of audit log entries fetched from the database at a time by log_dump.
+LOGDUMP_BATCH_SIZE = 1000
 
 
 @ensure_valid_groupname
@@ -39,16 +49,15 @@ def group_command(args: Namespace, settings: CtlSettings, session_factory: Sessi
 
         call_mutate(args, settings, session_factory)
 
-    elif args.subcommand == "log_dump":
-        logdump_group_command(session, group, args)
-
 
 def mutate_group_command(session: Session, group: Group, args: Namespace) -> None:
+    # New members are committed together, with their audit log entries, after the loop.  Members
+    # are removed one at a time, since a plugin rejecting a removal rolls back the session.
     for username in args.username:
         user = User.get(session, name=username)
         if not user:
             logging.error("no such user '{}'".format(username))
-            return
+            break
 
         if args.subcommand == "add_member":
             if args.member:
@@ -70,8 +79,8 @@ def mutate_group_command(session: Session, group: Group, args: Namespace) -> Non
                 "join_group",
                 "{} manually joined via grouper-ctl".format(username),
                 on_group_id=group.id,
+                commit=False,
             )
-            session.commit()
 
         elif args.subcommand == "remove_member":
             logging.info("Removing {} from group {}".format(username, args.groupname))
@@ -89,6 +98,8 @@ def mutate_group_command(session: Session, group: Group, args: Namespace) -> Non
             except PluginRejectedGroupMembershipUpdate as e:
                 logging.error("%s", e)
 
+    session.commit()
+
 
 @contextmanager
 def open_file_or_stdout_for_write(fn: str) -> Iterator[IO[str]]:
@@ -106,33 +117,113 @@ def open_file_or_stdout_for_write(fn: str) -> Iterator[IO[str]]:
             fh.close()
 
 
-def logdump_group_command(session: Session, group: Group, args: Namespace) -> None:
-    log_entries = session.query(AuditLog).filter(
-        AuditLog.on_group_id == group.id, AuditLog.log_time > args.start_date
-    )
+def logdump_command(
+    args: Namespace, settings: CtlSettings, session_factory: SessionFactory
+) -> None:
+    for groupname in args.groupname:
+        if not re.match("^{}$".format(NAME_VALIDATION), groupname):
+            logging.error("Invalid group name {}".format(groupname))
+            return
+    if bool(args.groupname) == args.all_groups:
+        logging.error("Specify either group names or --all-groups")
+        return
 
-    if args.end_date:
-        log_entries = log_entries.filter(AuditLog.log_time <= args.end_date)
+    session = session_factory.create_session()
+    group_ids: Optional[List[int]] = None
+    if not args.all_groups:
+        groups = session.query(Group.groupname, Group.id).filter(
+            Group.groupname.in_(args.groupname)
+        )
+        ids_by_name = dict(groups.all())
+        for groupname in args.groupname:
+            if groupname not in ids_by_name:
+                logging.error("No such group %s", groupname)
+                return
+        group_ids = list(ids_by_name.values())
+
+    # Archived entries are all older than those still in audit_log, so the archive only needs to
+    # be read if it has entries after the start of the range.  Dump them first to keep the output
+    # in date order.
+    models: List[Union[Type[AuditLog], Type[AuditLogArchive]]] = [AuditLog]
+    archived = session.query(AuditLogArchive.id).filter(AuditLogArchive.log_time > args.start_date)
+    if archived.first():
+        models.insert(0, AuditLogArchive)
 
     with open_file_or_stdout_for_write(args.outfile) as fh:
-        csv_w = csv.writer(fh)
-        for log_entry in log_entries:
-            if log_entry.on_user:
-                extra = "user: {}".format(log_entry.on_user.username)
-            elif log_entry.on_group:
-                extra = "group: {}".format(log_entry.on_group.groupname)
-            else:
-                extra = ""
-
-            csv_w.writerow(
-                [
-                    log_entry.log_time,
-                    log_entry.actor,
-                    log_entry.description,
-                    log_entry.action,
-                    extra,
-                ]
-            )
+        if args.format == "jsonl":
+            write_entry = _jsonl_entry_writer(fh)
+        else:
+            write_entry = _csv_entry_writer(fh, with_group=len(args.groupname) != 1)
+        for model in models:
+            for entry in _logdump_entries(session, model, group_ids, args):
+                write_entry(entry)
+
+
+def _logdump_entries(
+    session: Session,
+    model: Union[Type[AuditLog], Type[AuditLogArchive]],
+    group_ids: Optional[List[int]],
+    args: Namespace,
+) -> Iterator[Any]:
+    """Return the entries to dump from one audit log table, in date order.
+
+    The names of the related users and groups are selected in the same query rather than loaded
+    separately for each entry, and rows are streamed from the database in batches so that memory
+    use doesn't grow with the size of the dump.
+    """
+    actor = aliased(User)
+    on_user = aliased(User)
+    on_group = aliased(Group)
+    on_permission = aliased(Permission)
+    entries = (
+        session.query(
+            model.log_time,
+            label("actor", actor.username),
+            model.description,
+            model.action,
+            label("on_user", on_user.username),
+            label("on_group", on_group.groupname),
+            label("on_permission", on_permission.name),
+        )
+        .join(actor, model.actor_id == actor.id)
+        .join(on_group, model.on_group_id == on_group.id)
+        .outerjoin(on_user, model.on_user_id == on_user.id)
+        .outerjoin(on_permission, model.on_permission_id == on_permission.id)
+        .filter(model.log_time > args.start_date)
+    )
+    if group_ids is not None:
+        entries = entries.filter(model.on_group_id.in_(group_ids))
+    if args.end_date:
+        entries = entries.filter(model.log_time <= args.end_date)
+    return entries.order_by(model.log_time, model.id).yield_per(LOGDUMP_BATCH_SIZE)
+
+
+def _csv_entry_writer(fh: IO[str], with_group: bool) -> Callable[[Any], None]:
+    """Write entries as CSV, adding a column for the group if dumping more than one."""
+    csv_w = csv.writer(fh)
+
+    def write_entry(entry: Any) -> None:
+        if entry.on_user:
+            extra = "user: {}".format(entry.on_user)
+        else:
+            extra = "group: {}".format(entry.on_group)
+        row = [entry.log_time, entry.actor, entry.description, entry.action, extra]
+        if with_group:
+            row.append(entry.on_group)
+        csv_w.writerow(row)
+
+    return write_entry
+
+
+def _jsonl_entry_writer(fh: IO[str]) -> Callable[[Any], None]:
+    """Write entries as JSON Lines, one object per entry."""
+
+    def write_entry(entry: Any) -> None:
+        data = entry._asdict()
+        data["log_time"] = entry.log_time.isoformat()
+        fh.write(json.dumps(data, sort_keys=True) + "\n")
+
+    return write_entry
 
 
 def add_parser(subparsers: _SubParsersAction) -> None:
@@ -157,9 +248,10 @@ def add_parser(subparsers: _SubParsersAction) -> None:
     group_remove_parser.add_argument("username", nargs="+")
 
     group_logdump_parser = group_subparser.add_parser(
-        "log_dump", help="dump activity log fo a group"
+        "log_dump", help="dump activity log for groups"
     )
-    group_logdump_parser.add_argument("groupname")
+    group_logdump_parser.set_defaults(func=logdump_command)
+    group_logdump_parser.add_argument("groupname", nargs="*")
     group_logdump_parser.add_argument("start_date", type=argparse_validate_date)
     group_logdump_parser.add_argument(
         "--end_date",
@@ -170,3 +262,9 @@ def add_parser(subparsers: _SubParsersAction) -> None:
     group_logdump_parser.add_argument(
         "--outfile", type=str, default=None, help="file to write results to, None if stdout"
     )
+    group_logdump_parser.add_argument(
+        "--all-groups", action="store_true", help="dump the activity log for every group"
+    )
+    group_logdump_parser.add_argument(
+        "--format", choices=["csv", "jsonl"], default="csv", help="output format, CSV by default"
+    )
@@ -11,6 +11,7 @@ from grouper.initialization import create_sql_usecase_factory
 from grouper.plugin import set_global_plugin_proxy
 from grouper.plugin.exceptions import PluginsDirectoryDoesNotExist
 from grouper.plugin.proxy import PluginProxy
+from grouper.query_stats import configure_query_stats
 from grouper.repositories.factory import SessionFactory, SingletonSessionFactory
 from grouper.settings import default_settings_path
 from grouper.setup import setup_logging
@@ -77,6 +78,7 @@ def main(sys_argv=sys.argv, session=None):
         logging.fatal("Plugin directory does not exist: {}".format(e))
         sys.exit(1)
     set_global_plugin_proxy(plugins)
+    configure_query_stats(settings.slow_query_threshold, plugins.log_slow_query)
 
     # Set up factories.
     usecase_factory = create_sql_usecase_factory(settings, plugins, session_factory)
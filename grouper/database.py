@@ -2,29 +2,74 @@ import logging
 import os
 import sys
 from contextlib import closing
-from threading import Thread
+from random import random
+from threading import Event, Thread
 from time import sleep
 from typing import TYPE_CHECKING
 
-from grouper.models.base.session import Session
+from grouper.query_stats import set_query_caller
+from grouper.repositories.factory import SessionFactory
 
 if TYPE_CHECKING:
     from grouper.graph import GroupGraph
     from grouper.plugins.proxy import PluginProxy
     from grouper.settings import Settings
-    from typing import Any, NoReturn
+    from typing import Any, NoReturn, Optional
 
 
 class DbRefreshThread(Thread):
-    """Background thread for refreshing the in-memory cache of the graph."""
+    """Background thread for refreshing the in-memory cache of the graph.
 
-    def __init__(self, settings, plugins, graph, refresh_interval, *args, **kwargs):
-        # type: (Settings, PluginProxy, GroupGraph, int, *Any, **Any) -> None
+    The graph is refreshed min_interval seconds after a refresh that found changes.  While the
+    graph is unchanged, the interval doubles after each refresh, up to refresh_interval.  Each
+    wait is shortened by a random fraction of up to jitter, so that processes started together
+    don't all query the database at the same moment.  Calling wake refreshes the graph
+    immediately from the primary database rather than a replica, so that changes just committed by
+    this process are visible without waiting.
+
+    By default, any failure to refresh the graph exits the process.  If serve_stale is set, the
+    thread instead keeps the last good graph and retries with exponential backoff, starting at
+    twice refresh_interval and capped at max_backoff seconds, until a refresh succeeds.
+
+    If snapshot_path is set, the graph is saved there after each refresh that changed it, so that
+    a restarted server or other processes can load it without querying the database.  Refreshes
+    that find no changes update the modification time of the snapshot instead.
+    """
+
+    def __init__(
+        self,
+        settings,  # type: Settings
+        plugins,  # type: PluginProxy
+        graph,  # type: GroupGraph
+        refresh_interval,  # type: int
+        min_interval=None,  # type: Optional[int]
+        jitter=0.0,  # type: float
+        serve_stale=False,  # type: bool
+        max_backoff=0,  # type: int
+        snapshot_path=None,  # type: Optional[str]
+        *args,  # type: Any
+        **kwargs,  # type: Any
+    ):
+        # type: (...) -> None
         self.settings = settings
         self.plugins = plugins
         self.graph = graph
+        self.session_factory = SessionFactory(settings)
         self.refresh_interval = refresh_interval
+        if min_interval is None:
+            self.min_interval = refresh_interval
+        else:
+            self.min_interval = max(1, min(min_interval, refresh_interval))
+        self.jitter = jitter
+        self.interval = self.min_interval
+        self.serve_stale = serve_stale
+        self.max_backoff = max(max_backoff, refresh_interval)
+        self.snapshot_path = snapshot_path
+        self.failures = 0
         self.logger = logging.getLogger(__name__)
+        self._initial_url = settings.database
+        self._snapshot_checkpoint = None  # type: Optional[int]
+        self._wake = Event()
         Thread.__init__(self, *args, **kwargs)
 
     def crash(self):
@@ -32,21 +77,95 @@ class DbRefreshThread(Thread):
         os._exit(1)
 
     def run(self):
-        # type () -> None
-        initial_url = self.settings.database
+        # type: () -> None
+        woken = False
         while True:
-            self.logger.debug("Updating Graph from Database.")
-            try:
-                if self.settings.database != initial_url:
-                    self.crash()
-                with closing(Session()) as session:
-                    self.graph.update_from_db(session)
-
-                self.plugins.log_periodic_graph_update(success=True)
-            except Exception:
-                self.plugins.log_periodic_graph_update(success=False)
-                self.plugins.log_exception(None, None, *sys.exc_info())
-                logging.exception("Failed to refresh graph")
+            # Clear the wake-up before refreshing, so that a wake-up for a change committed during
+            # the refresh triggers another one.
+            self._wake.clear()
+            delay = self.refresh(from_primary=woken)
+            woken = self._wake.wait(delay * (1 - random() * self.jitter))
+
+    def wake(self):
+        # type: () -> None
+        """Refresh the graph as soon as possible.  Safe to call from any thread."""
+        self._wake.set()
+
+    def refresh(self, from_primary=False):
+        # type: (bool) -> float
+        """Refresh the graph once and return how long to wait before the next refresh.
+
+        Reads from the database replica, if there is one that is current enough, unless
+        from_primary is set.
+        """
+        self.logger.debug("Updating Graph from Database.")
+        set_query_caller(type(self).__name__)
+        checkpoint = self.graph.checkpoint
+        try:
+            if self.settings.database != self._initial_url:
+                self.crash()
+            if from_primary:
+                session = self.session_factory.create_session()
+            else:
+                session = self.session_factory.create_read_only_session()
+            with closing(session):
+                self.graph.update_from_db(session)
+
+            self.plugins.log_periodic_graph_update(success=True)
+        except Exception:
+            self.plugins.log_periodic_graph_update(success=False)
+            self.plugins.log_exception(None, None, *sys.exc_info())
+            logging.exception("Failed to refresh graph")
+            if not self.serve_stale:
                 self.crash()
+            self.failures += 1
+            backoff = min(self.refresh_interval * 2**self.failures, self.max_backoff)
+            logging.warning(
+                "Serving graph at checkpoint %d after %d failed refreshes, retrying in %ds",
+                self.graph.checkpoint,
+                self.failures,
+                backoff,
+            )
+            return backoff
+
+        self.failures = 0
+        if self.graph.checkpoint != checkpoint:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.refresh_interval)
+        if self.snapshot_path:
+            self._publish_snapshot(self.snapshot_path)
+        return self.interval
 
-            sleep(self.refresh_interval)
+    def _publish_snapshot(self, path):
+        # type: (str) -> None
+        """Save the graph to path if it changed, otherwise touch path to show it is current."""
+        try:
+            if self.graph.checkpoint != self._snapshot_checkpoint:
+                self.graph.save_snapshot(path)
+                self._snapshot_checkpoint = self.graph.checkpoint
+            else:
+                os.utime(path)
+        except Exception:
+            logging.exception("Failed to save graph snapshot to %s", path)
+
+
+class GraphSnapshotThread(Thread):
+    """Background thread for loading the graph from snapshots published by grouper-graphd.
+
+    This replaces DbRefreshThread in servers configured to use a graph builder, so that only the
+    builder queries the database for the graph.
+    """
+
+    def __init__(self, graph, snapshot_path, interval, *args, **kwargs):
+        # type: (GroupGraph, str, float, *Any, **Any) -> None
+        self.graph = graph
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        Thread.__init__(self, *args, **kwargs)
+
+    def run(self):
+        # type: () -> None
+        while True:
+            self.graph.load_snapshot(self.snapshot_path)
+            sleep(self.interval)
@@ -295,7 +295,7 @@ def notify_edge_expiration(settings: Settings, session: Session, edge: GroupEdge
         # Make an audit log entry for both the subgroup and the parent group so that it will show
         # up in the FE view for both groups.
         assert subgroup
-        AuditLog.log(session, on_group_id=edge.group_id, **audit_data)
+        AuditLog.log(session, on_group_id=edge.group_id, commit=False, **audit_data)
         AuditLog.log(session, on_group_id=subgroup.id, **audit_data)
 
     # Send email notification to the affected people.
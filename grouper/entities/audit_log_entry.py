@@ -8,8 +8,21 @@ if TYPE_CHECKING:
     from typing import Optional
 
 
+@dataclass(frozen=True)
+class AuditLogCursor:
+    """Position in the audit log for keyset pagination.
+
+    Audit log entries are sorted newest first by date and then by ID.  Requesting the entries
+    before the cursor of the last entry on one page returns the next page.
+    """
+
+    date: datetime
+    id: int
+
+
 @dataclass(frozen=True)
 class AuditLogEntry:
+    id: int
     date: datetime
     actor: str
     action: str
@@ -17,3 +30,7 @@ class AuditLogEntry:
     on_user: Optional[str]
     on_group: Optional[str]
     on_permission: Optional[str]
+
+    @property
+    def cursor(self) -> AuditLogCursor:
+        return AuditLogCursor(self.date, self.id)
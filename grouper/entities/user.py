@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from datetime import datetime
     from typing import List
 
 
@@ -14,6 +15,21 @@ class PublicKey:
     fingerprint_sha256: str
 
 
+@dataclass(frozen=True)
+class UserPublicKey:
+    """A public key with the full details of the key and its owner."""
+
+    user: str
+    id: int
+    public_key: str
+    fingerprint: str
+    fingerprint_sha256: str
+    key_type: str
+    key_size: int
+    comment: str
+    created_on: datetime
+
+
 @dataclass(frozen=True)
 class UserMetadata:
     key: str
@@ -78,16 +78,16 @@ class AuditsCreate(GrouperHandler):
                         self.session.rollback()
                         raise Exception("Failed to start the audit. Please try again.")
 
+            AuditLog.log(
+                self.session,
+                self.current_user.id,
+                "start_audit",
+                "Started global audit.",
+                category=AuditLogCategory.audit,
+                commit=False,
+            )
             self.session.commit()
 
-        AuditLog.log(
-            self.session,
-            self.current_user.id,
-            "start_audit",
-            "Started global audit.",
-            category=AuditLogCategory.audit,
-        )
-
         # Calculate schedule of emails, basically we send emails at various periods in advance
         # of the end of the audit period.
         schedule_times = []
@@ -98,6 +98,8 @@ class GitHubLinkBeginView(GrouperHandler):
 
 
 class GitHubLinkCompleteView(GrouperHandler):
+    GET_IS_READ_ONLY = False
+
     @gen.coroutine
     def get(self, *args: Any, **kwargs: Any) -> Iterator[Future]:
         user_id = int(self.get_path_argument("user_id"))
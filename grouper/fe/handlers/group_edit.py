@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING
 from grouper.fe.forms import GroupEditForm
 from grouper.fe.util import GrouperHandler
 from grouper.models.audit_log import AuditLog
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.group import Group
 from grouper.role_user import is_role_user
 from grouper.user_group import user_can_manage_group
@@ -67,7 +67,7 @@ class GroupEdit(GrouperHandler):
         group.canjoin = form.data["canjoin"]
         group.auto_expire = form.data["auto_expire"]
         group.require_clickthru_tojoin = form.data["require_clickthru_tojoin"]
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
         self.session.commit()
 
         AuditLog.log(
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from grouper.audit import get_group_audit_members_infos
 from grouper.fe.handlers.template_variables import get_group_view_template_vars
 from grouper.fe.util import GrouperHandler
 from grouper.models.group import Group
@@ -27,6 +26,5 @@ class GroupView(GrouperHandler):
         self.render(
             "group.html",
             group=group,
-            audit_members_infos=get_group_audit_members_infos(self.session, group),
             **get_group_view_template_vars(self.session, self.current_user, group, self.graph),
         )
@@ -3,7 +3,11 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 from grouper.fe.templates import PermissionTemplate
-from grouper.fe.util import GrouperHandler
+from grouper.fe.util import (
+    deserialize_audit_log_cursor,
+    GrouperHandler,
+    serialize_audit_log_cursor,
+)
 from grouper.usecases.view_permission import ViewPermissionUI
 
 if TYPE_CHECKING:
@@ -11,6 +15,9 @@ if TYPE_CHECKING:
     from grouper.entities.permission import Permission, PermissionAccess
     from typing import Any, List
 
+# Number of audit log entries shown per page.
+AUDIT_LOG_LIMIT = 20
+
 
 class PermissionView(GrouperHandler, ViewPermissionUI):
     def view_permission_failed_not_found(self, name: str) -> None:
@@ -22,16 +29,32 @@ class PermissionView(GrouperHandler, ViewPermissionUI):
         access: PermissionAccess,
         audit_log_entries: List[AuditLogEntry],
     ) -> None:
+        audit_log_older = None
+        if len(audit_log_entries) == AUDIT_LOG_LIMIT:
+            cursor = serialize_audit_log_cursor(audit_log_entries[-1].cursor)
+            audit_log_older = self.update_qs(before=cursor)
         template = PermissionTemplate(
-            permission=permission, access=access, audit_log_entries=audit_log_entries
+            permission=permission,
+            access=access,
+            audit_log_entries=audit_log_entries,
+            audit_log_older=audit_log_older,
         )
         self.render_template_class(template)
 
     def get(self, *args: Any, **kwargs: Any) -> None:
         name = self.get_path_argument("name")
         argument = self.get_argument("argument", None)
+        before = self.get_argument("before", None)
+        try:
+            audit_log_before = deserialize_audit_log_cursor(before) if before else None
+        except ValueError:
+            return self.badrequest()
 
         usecase = self.usecase_factory.create_view_permission_usecase(self)
         usecase.view_permission(
-            name, self.current_user.username, audit_log_limit=20, argument=argument
+            name,
+            self.current_user.username,
+            audit_log_limit=AUDIT_LOG_LIMIT,
+            argument=argument,
+            audit_log_before=audit_log_before,
         )
@@ -60,20 +60,15 @@ class PermissionsRequestUpdate(GrouperHandler):
             return self.notfound()
 
         # check that this user should be actioning this request
-        user_requests, total = permissions.get_requests(
-            self.session, status="pending", limit=None, offset=0, owner=self.current_user
-        )
-        user_request_ids = [ur.id for ur in user_requests.requests]
-        if request.id not in user_request_ids:
+        if request.status != "pending" or not permissions.can_approve_request(
+            self.session, request, self.current_user
+        ):
             return self.forbidden()
 
         form = PermissionRequestUpdateForm(self.request.arguments)
         form.status.choices = self._get_choices(request.status)
         if not form.validate():
-            change_comment_list = [
-                (sc, user_requests.comment_by_status_change_id[sc.id])
-                for sc in user_requests.status_change_by_request_id[request.id]
-            ]
+            change_comment_list = permissions.get_changes_by_request_id(self.session, request_id)
 
             return self.render(
                 "permission-request-update.html",
@@ -91,10 +86,7 @@ class PermissionsRequestUpdate(GrouperHandler):
         except UserNotAuditor as e:
             alerts = [Alert("danger", str(e))]
 
-            change_comment_list = [
-                (sc, user_requests.comment_by_status_change_id[sc.id])
-                for sc in user_requests.status_change_by_request_id[request.id]
-            ]
+            change_comment_list = permissions.get_changes_by_request_id(self.session, request_id)
 
             return self.render(
                 "permission-request-update.html",
@@ -4,7 +4,7 @@ from typing import TYPE_CHECKING
 
 from grouper.fe.util import GrouperHandler
 from grouper.models.audit_log import AuditLog
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.permission_map import PermissionMap
 from grouper.user_group import user_is_owner_of_group
 from grouper.user_permissions import user_grantable_permissions
@@ -59,7 +59,7 @@ class PermissionsRevoke(GrouperHandler):
         group = mapping.group
 
         mapping.delete(self.session)
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
         self.session.commit()
 
         AuditLog.log(
@@ -2,7 +2,6 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from grouper.audit import get_group_audit_members_infos
 from grouper.fe.handlers.template_variables import get_role_user_view_template_vars
 from grouper.fe.util import GrouperHandler
 from grouper.models.group import Group
@@ -32,6 +31,5 @@ class RoleUserView(GrouperHandler):
             "role-user.html",
             user=user,
             group=group,
-            audit_members_infos=get_group_audit_members_infos(self.session, group),
             **get_role_user_view_template_vars(session, actor, user, group, graph),
         )
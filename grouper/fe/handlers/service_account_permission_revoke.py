@@ -5,7 +5,7 @@ from typing import TYPE_CHECKING
 from grouper.constants import USER_ADMIN
 from grouper.fe.util import GrouperHandler
 from grouper.models.audit_log import AuditLog
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.group import Group
 from grouper.models.service_account import ServiceAccount
 from grouper.models.service_account_permission_map import ServiceAccountPermissionMap
@@ -48,7 +48,7 @@ class ServiceAccountPermissionRevoke(GrouperHandler):
         argument = mapping.argument
 
         mapping.delete(self.session)
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
         self.session.commit()
 
         AuditLog.log(
@@ -1,27 +1,33 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from grouper.audit import get_group_audit_members_infos
 from grouper.constants import USER_METADATA_GITHUB_USERNAME_KEY, USER_METADATA_SHELL_KEY
 from grouper.entities.group_edge import APPROVER_ROLE_INDICES, OWNER_ROLE_INDICES
 from grouper.fe.alerts import Alert
 from grouper.fe.settings import settings
 from grouper.graph import NoSuchGroup, NoSuchUser
-from grouper.group_requests import count_requests_by_group
+from grouper.group_requests import count_pending_requests_by_group
 from grouper.group_service_account import get_service_accounts
 from grouper.models.audit_member import AUDIT_STATUS_CHOICES
-from grouper.permissions import get_owner_arg_list, get_pending_request_by_group, get_requests
+from grouper.permissions import (
+    get_owner_arg_list,
+    get_owners_by_grantable_permission,
+    get_pending_request_by_group,
+    get_requests,
+)
 from grouper.public_key import get_public_keys_of_user
 from grouper.role_user import can_manage_role_user
 from grouper.service_account import can_manage_service_account, service_account_permissions
 from grouper.user import (
     get_log_entries_by_user,
+    pending_requests_for_approver,
     user_open_audits,
-    user_requests_aggregate,
     user_role,
     user_role_index,
 )
 from grouper.user_group import get_groups_by_user
-from grouper.user_metadata import get_user_metadata, get_user_metadata_by_key
+from grouper.user_metadata import get_user_metadata
 from grouper.user_password import user_passwords
 from grouper.user_permissions import user_grantable_permissions, user_is_user_admin
 
@@ -46,28 +52,40 @@ def get_group_view_template_vars(session, actor, group, graph):
         group_md = {}
 
     ret["members"] = group.my_members()
+    ret["audit_members_infos"] = get_group_audit_members_infos(session, group, ret["members"])
     ret["groups"] = group.my_groups()
     ret["service_accounts"] = get_service_accounts(session, group)
-    ret["permissions"] = group_md.get("permissions", [])
-    for permission in ret["permissions"]:
-        permission["granted_on"] = datetime.fromtimestamp(permission["granted_on"])
+    ret["permissions"] = [
+        {**permission, "granted_on": datetime.fromtimestamp(permission["granted_on"])}
+        for permission in group_md.get("permissions", [])
+    ]
 
+    # Load the owners of every grantable permission once rather than once per pending request.
     ret["permission_requests_pending"] = []
+    owners_by_arg_by_perm = None
     for req in get_pending_request_by_group(session, group):
+        if owners_by_arg_by_perm is None:
+            owners_by_arg_by_perm = get_owners_by_grantable_permission(session)
         granters = []
-        for owner, argument in get_owner_arg_list(session, req.permission, req.argument):
+        for owner, argument in get_owner_arg_list(
+            session, req.permission, req.argument, owners_by_arg_by_perm
+        ):
             granters.append(owner.name)
         ret["permission_requests_pending"].append((req, granters))
 
     ret["audited"] = group_md.get("audited", False)
     ret["log_entries"] = group.my_log_entries()
-    ret["num_pending"] = count_requests_by_group(session, group, status="pending")
+    ret["num_pending"], ret["self_pending"] = count_pending_requests_by_group(
+        session, group, actor
+    )
+    role = user_role(actor, ret["members"])
+    role_index = user_role_index(actor, ret["members"])
     ret["current_user_role"] = {
-        "is_owner": user_role_index(actor, ret["members"]) in OWNER_ROLE_INDICES,
-        "is_approver": user_role_index(actor, ret["members"]) in APPROVER_ROLE_INDICES,
-        "is_manager": user_role(actor, ret["members"]) == "manager",
-        "is_member": user_role(actor, ret["members"]) is not None,
-        "role": user_role(actor, ret["members"]),
+        "is_owner": role_index in OWNER_ROLE_INDICES,
+        "is_approver": role_index in APPROVER_ROLE_INDICES,
+        "is_manager": role == "manager",
+        "is_member": role is not None,
+        "role": role,
     }
     ret["statuses"] = AUDIT_STATUS_CHOICES
 
@@ -91,7 +109,6 @@ def get_group_view_template_vars(session, actor, group, graph):
                 break
 
     ret["alerts"] = []
-    ret["self_pending"] = count_requests_by_group(session, group, status="pending", user=actor)
     if ret["self_pending"]:
         ret["alerts"].append(Alert("info", "You have a pending request to join this group.", None))
 
@@ -105,24 +122,25 @@ def get_user_view_template_vars(session, actor, user, graph):
     from grouper.fe.handlers.user_enable import UserEnable
 
     ret = {}  # type: Dict[str, Any]
+    is_user_admin = user_is_user_admin(session, actor)
     if user.is_service_account:
-        ret["can_control"] = can_manage_service_account(
-            session, user.service_account, actor
-        ) or user_is_user_admin(session, actor)
+        ret["can_control"] = (
+            can_manage_service_account(session, user.service_account, actor) or is_user_admin
+        )
         ret["can_disable"] = ret["can_control"]
-        ret["can_enable"] = user_is_user_admin(session, actor)
-        ret["can_enable_preserving_membership"] = user_is_user_admin(session, actor)
+        ret["can_enable"] = is_user_admin
+        ret["can_enable_preserving_membership"] = is_user_admin
         ret["account"] = user.service_account
     else:
-        ret["can_control"] = user.name == actor.name or user_is_user_admin(session, actor)
+        ret["can_control"] = user.name == actor.name or is_user_admin
         ret["can_disable"] = UserDisable.check_access(session, actor, user)
         ret["can_enable_preserving_membership"] = UserEnable.check_access(session, actor, user)
         ret["can_enable"] = UserEnable.check_access_without_membership(session, actor, user)
 
     if user.id == actor.id:
-        ret["num_pending_group_requests"] = user_requests_aggregate(session, actor).count()
+        ret["num_pending_group_requests"] = len(pending_requests_for_approver(session, actor))
         _, ret["num_pending_perm_requests"] = get_requests(
-            session, status="pending", limit=1, offset=0, owner=actor
+            session, status="pending", limit=0, offset=0, owner=actor
         )
     else:
         ret["num_pending_group_requests"] = None
@@ -135,15 +153,15 @@ def get_user_view_template_vars(session, actor, user, graph):
         # they're disabled, so we've excluded them from the in-memory graph.
         user_md = {}
 
-    shell_metadata = get_user_metadata_by_key(session, user.id, USER_METADATA_SHELL_KEY)
+    # Load all of the user's metadata at once and pick out the keys shown separately.
+    metadata = {md.data_key: md for md in get_user_metadata(session, user.id)}
+    shell_metadata = metadata.pop(USER_METADATA_SHELL_KEY, None)
     ret["shell"] = shell_metadata.data_value if shell_metadata else "No shell configured"
-    github_username = get_user_metadata_by_key(session, user.id, USER_METADATA_GITHUB_USERNAME_KEY)
+    github_username = metadata.pop(USER_METADATA_GITHUB_USERNAME_KEY, None)
     ret["github_username"] = github_username.data_value if github_username else "(Unset)"
-    addl_metadata = get_user_metadata(
-        session, user.id, exclude=[USER_METADATA_SHELL_KEY, USER_METADATA_GITHUB_USERNAME_KEY]
-    )
+    addl_metadata = list(metadata.values())
 
-    ret["addl_metadata"] = addl_metadata if addl_metadata else []
+    ret["addl_metadata"] = addl_metadata
 
     known_metadata_fields = set(settings().metadata_options.keys())
     set_metadata_fields = {md.data_key for md in addl_metadata}
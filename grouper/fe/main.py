@@ -7,6 +7,7 @@ import sys
 from contextlib import closing
 from typing import TYPE_CHECKING
 
+from sqlalchemy import event
 from tornado.curl_httpclient import CurlAsyncHTTPClient
 from tornado.httpclient import AsyncHTTPClient
 from tornado.httpserver import HTTPServer
@@ -14,21 +15,24 @@ from tornado.ioloop import IOLoop
 
 import grouper.fe
 from grouper.app import GrouperApplication
-from grouper.database import DbRefreshThread
+from grouper.database import DbRefreshThread, GraphSnapshotThread
 from grouper.error_reporting import setup_signal_handlers
 from grouper.fe.routes import HANDLERS
 from grouper.fe.settings import FrontendSettings
 from grouper.fe.templating import FrontendTemplateEngine
 from grouper.graph import Graph
-from grouper.models.base.session import get_db_engine, Session
+from grouper.models.base.session import DbEngineManager, Session
+from grouper.models.checkpoint_update import checkpoint_advanced
 from grouper.plugin import set_global_plugin_proxy
 from grouper.plugin.exceptions import PluginsDirectoryDoesNotExist
 from grouper.plugin.proxy import PluginProxy
+from grouper.query_stats import configure_query_stats
+from grouper.repositories.factory import SessionFactory
 from grouper.setup import build_arg_parser, setup_logging
 
 if TYPE_CHECKING:
     from argparse import Namespace
-    from typing import Callable, List
+    from typing import Callable, List, Optional
 
 
 def create_fe_application(
@@ -36,12 +40,14 @@ def create_fe_application(
     deployment_name,  # type: str
     xsrf_cookies=True,  # type: bool
     session=None,  # type: Callable[[], Session]
+    read_only_session=None,  # type: Optional[Callable[[], Session]]
 ):
     # type: (...) -> GrouperApplication
     static_path = os.path.join(os.path.dirname(grouper.fe.__file__), "static")
     tornado_settings = {
         "debug": settings.debug,
         "session": session if session else Session,
+        "read_only_session": read_only_session,
         "static_path": static_path,
         "template_engine": FrontendTemplateEngine(settings, deployment_name, static_path),
         "xsrf_cookies": xsrf_cookies,
@@ -62,10 +68,19 @@ def start_server(args, settings, plugins):
     logging.info("configure database session")
     if args.database_url:
         settings.database = args.database_url
-    Session.configure(bind=get_db_engine(settings.database))
+    configure_query_stats(settings.slow_query_threshold, plugins.log_slow_query)
+    Session.configure(bind=DbEngineManager().get_db_engine(settings.database))
     logging.info("database session is configured")
 
-    application = create_fe_application(settings, args.deployment_name)
+    session_factory = SessionFactory(settings)
+    if settings.database_replica:
+        logging.info("read-only requests will use the database replica")
+        read_only_session = session_factory.create_read_only_session  # type: Optional[Callable]
+    else:
+        read_only_session = None
+    application = create_fe_application(
+        settings, args.deployment_name, read_only_session=read_only_session
+    )
     ssl_context = plugins.get_ssl_context()
 
     if args.listen_stdin:
@@ -96,15 +111,42 @@ def start_server(args, settings, plugins):
 
     # Create the Graph and start the graph update thread post fork to ensure each process gets
     # updated.
-    logging.info("Initializing DB Graph")
-    with closing(Session()) as session:
-        graph = Graph()
-        graph.update_from_db(session)
-    logging.info("DB Graph successfully initialized")
-
-    refresher = DbRefreshThread(settings, plugins, graph, settings.refresh_interval)
-    refresher.daemon = True
-    refresher.start()
+    graph = Graph()
+    if settings.graph_builder_path and graph.load_snapshot(settings.graph_builder_path):
+        logging.info("Loaded graph from %s", settings.graph_builder_path)
+    else:
+        logging.info("Initializing DB Graph")
+        with closing(session_factory.create_read_only_session()) as session:
+            graph.update_from_db(session)
+        logging.info("DB Graph successfully initialized")
+
+    if settings.graph_builder_path:
+        snapshot_loader = GraphSnapshotThread(
+            graph, settings.graph_builder_path, settings.min_refresh_interval
+        )
+        snapshot_loader.daemon = True
+        snapshot_loader.start()
+    else:
+        refresher = DbRefreshThread(
+            settings,
+            plugins,
+            graph,
+            settings.refresh_interval,
+            min_interval=settings.min_refresh_interval,
+            jitter=settings.refresh_jitter,
+        )
+        refresher.daemon = True
+        refresher.start()
+
+        # Refresh the graph as soon as this process commits a change, so that users see the result
+        # of their changes immediately rather than after the next scheduled refresh.  Commits that
+        # don't advance the checkpoint can't change the graph, so they don't wake the refresher.
+        def wake_refresher(session):
+            # type: (Session) -> None
+            if checkpoint_advanced(session):
+                refresher.wake()
+
+        event.listen(Session, "after_commit", wake_refresher)
 
     try:
         IOLoop.current().start()
@@ -76,6 +76,7 @@ from grouper.fe.handlers.users_public_key import UsersPublicKey
 from grouper.fe.handlers.users_user_tokens import UsersUserTokens
 from grouper.fe.handlers.users_view import UsersView
 from grouper.handlers.health_check import HealthCheck
+from grouper.handlers.stats import Stats
 
 if TYPE_CHECKING:
     from tornado.web import RequestHandler
@@ -112,6 +113,7 @@ HANDLERS: List[Tuple[str, Type[RequestHandler]]] = [
     ("/audits/create", AuditsCreate),
     ("/debug/health", HealthCheck),
     (f"/debug/profile/{_TRACE_UUID}", PerfProfile),
+    ("/debug/stats", Stats),
     (f"/github/link_begin/{_USER_ID}", GitHubLinkBeginView),
     (f"/github/link_complete/{_USER_ID}", GitHubLinkCompleteView),
     ("/groups", GroupsView),
@@ -32,6 +32,9 @@ class FrontendSettings(Settings):
         self.permission_request_dropdown_help = ""
         self.permission_request_text_help = ""
         self.refresh_interval = 60
+        self.min_refresh_interval = 5
+        self.refresh_jitter = 0.2
+        self.graph_builder_path = None  # type: Optional[str]
         self.shell = (
             [["/bin/false", "Shell support in Grouper has not been setup by the administrator"]],
         )
@@ -89,6 +89,7 @@ class PermissionTemplate(BaseTemplate):
     permission: Permission
     access: PermissionAccess
     audit_log_entries: List[AuditLogEntry]
+    audit_log_older: Optional[str]
 
     template: InitVar[str] = "permission.html"
 
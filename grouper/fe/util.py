@@ -15,6 +15,7 @@ from tornado.concurrent import Future
 from tornado.web import HTTPError, RequestHandler
 
 from grouper.constants import AUDIT_SECURITY, RESERVED_NAMES, USERNAME_VALIDATION
+from grouper.entities.audit_log_entry import AuditLogCursor
 from grouper.fe.alerts import Alert
 from grouper.fe.settings import settings
 from grouper.graph import Graph
@@ -22,6 +23,7 @@ from grouper.initialization import create_graph_usecase_factory
 from grouper.models.user import User
 from grouper.perf_profile import record_trace
 from grouper.plugin import get_plugin_proxy
+from grouper.query_stats import set_query_caller
 from grouper.repositories.factory import SingletonSessionFactory
 from grouper.user_permissions import user_permissions
 
@@ -32,21 +34,30 @@ if TYPE_CHECKING:
     from types import TracebackType
     from typing import Any, Callable, Dict, List, Optional, Sequence, Type
 
+# Format of the date in an audit log cursor query argument, chosen to need no URL escaping.
+_AUDIT_LOG_CURSOR_DATE_FORMAT = "%Y%m%d%H%M%S%f"
+
 
 class InvalidUser(Exception):
     pass
 
 
 class GrouperHandler(RequestHandler):
+    # Whether GET requests only read, and therefore may use the database replica.  Handlers whose
+    # GET method writes must set this to False.
+    GET_IS_READ_ONLY = True
+
     def initialize(self, *args: Any, **kwargs: Any) -> None:
+        set_query_caller(type(self).__name__)
         self.graph = Graph()
-        self.session = self.settings["session"]()  # type: Session
         self.template_engine = self.settings["template_engine"]  # type: FrontendTemplateEngine
         self.plugins = get_plugin_proxy()
-        session_factory = SingletonSessionFactory(self.session)
-        self.usecase_factory = create_graph_usecase_factory(
-            settings(), self.plugins, session_factory
-        )
+        if self._can_use_replica():
+            self._set_session(self.settings["read_only_session"]())
+            self.read_only = True
+        else:
+            self._set_session(self.settings["session"]())
+            self.read_only = False
 
         if self.get_argument("_profile", False):
             self.perf_collector = Collector()
@@ -58,6 +69,28 @@ class GrouperHandler(RequestHandler):
 
         self._request_start_time = datetime.utcnow()
 
+    def _can_use_replica(self) -> bool:
+        """Whether this request may read from the database replica, if there is one.
+
+        Only requests that don't write can use the replica.  Requests with refresh=yes follow a
+        change, so they read from the primary to be sure to see it.  Profiled requests save their
+        trace at the end of the request, so they also use the primary.
+        """
+        return (
+            self.settings.get("read_only_session") is not None
+            and self.request.method in ("GET", "HEAD")
+            and self.GET_IS_READ_ONLY
+            and not self.is_refresh()
+            and not self.get_argument("_profile", False)
+        )
+
+    def _set_session(self, session: Session) -> None:
+        self.session = session
+        session_factory = SingletonSessionFactory(session)
+        self.usecase_factory = create_graph_usecase_factory(
+            settings(), self.plugins, session_factory
+        )
+
     def set_default_headers(self) -> None:
         self.set_header("Content-Security-Policy", self.settings["template_engine"].csp_header())
         self.set_header("Referrer-Policy", "same-origin")
@@ -138,6 +171,12 @@ class GrouperHandler(RequestHandler):
         if not re.match("^{}$".format(USERNAME_VALIDATION), username):
             raise InvalidUser("{} does not match {}".format(username, USERNAME_VALIDATION))
 
+        # Creating the user is a write, so switch to the primary for the rest of the request.
+        if self.read_only and not User.get(self.session, name=username):
+            self.session.close()
+            self._set_session(self.settings["session"]())
+            self.read_only = False
+
         # User must exist in the database and be active
         user, created = User.get_or_create(self.session, username=username)
         if created:
@@ -339,6 +378,21 @@ def ensure_audit_security(perm_arg: str) -> Callable[[Callable[..., None]], Call
     return _wrapper
 
 
+def serialize_audit_log_cursor(cursor: AuditLogCursor) -> str:
+    """Encode an audit log cursor for use as a query argument."""
+    return "{}-{}".format(cursor.date.strftime(_AUDIT_LOG_CURSOR_DATE_FORMAT), cursor.id)
+
+
+def deserialize_audit_log_cursor(value: str) -> AuditLogCursor:
+    """Decode a query argument encoded with serialize_audit_log_cursor.
+
+    Raises:
+        ValueError: if the value is not a valid audit log cursor
+    """
+    date, entry_id = value.split("-", 1)
+    return AuditLogCursor(datetime.strptime(date, _AUDIT_LOG_CURSOR_DATE_FORMAT), int(entry_id))
+
+
 def _serialize_alert(alert: Alert) -> Dict[str, str]:
     return {"severity": alert.severity, "message": alert.message, "heading": alert.heading}
 
@@ -1,7 +1,12 @@
 import logging
+import os
+import pickle
 from collections import defaultdict
+from copy import copy
 from datetime import datetime
+from tempfile import NamedTemporaryFile
 from threading import RLock
+from time import time
 from typing import TYPE_CHECKING
 
 from networkx import DiGraph, single_source_shortest_path
@@ -13,8 +18,8 @@ from grouper.entities.group import Group, GroupJoinPolicy
 from grouper.entities.group_edge import GROUP_EDGE_ROLES
 from grouper.entities.permission import Permission
 from grouper.entities.permission_grant import GroupPermissionGrant, UniqueGrantsOfPermission
-from grouper.entities.user import PublicKey, User, UserMetadata
-from grouper.models.counter import Counter
+from grouper.entities.user import PublicKey, User, UserMetadata, UserPublicKey
+from grouper.models.checkpoint_update import get_checkpoint
 from grouper.models.group import Group as SQLGroup
 from grouper.models.group_edge import GroupEdge
 from grouper.models.group_service_accounts import GroupServiceAccount
@@ -27,19 +32,73 @@ from grouper.models.user_metadata import UserMetadata as SQLUserMetadata
 from grouper.models.user_password import UserPassword
 from grouper.plugin import get_plugin_proxy
 from grouper.service_account import all_service_account_permissions
-from grouper.util import singleton
+from grouper.stats import InstrumentedRLock
+from grouper.util import matches_glob, SingleFlight, singleton
 
 if TYPE_CHECKING:
     from grouper.entities.permission_grant import ServiceAccountPermissionGrant
     from grouper.models.base.session import Session
-    from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+    from typing import (
+        AbstractSet,
+        Any,
+        Callable,
+        Dict,
+        Hashable,
+        Iterable,
+        List,
+        Optional,
+        Set,
+        Tuple,
+        TypeVar,
+        Union,
+    )
+
+    T = TypeVar("T")
 
     Node = Tuple[str, str]
     Edge = Tuple[Node, Node, Dict[str, int]]
 
 MEMBER_TYPE_MAP = {"User": "users", "Group": "subgroups"}
+
+# Sections of the graph details that can be requested individually.  "paths" is not a section but
+# controls whether the path to each group, member, or grant is computed.
+USER_DETAIL_FIELDS = frozenset(["groups", "permissions", "paths"])
+GROUP_DETAIL_FIELDS = frozenset(
+    ["users", "groups", "subgroups", "permissions", "service_accounts", "audited", "paths"]
+)
+PERMISSION_DETAIL_FIELDS = frozenset(["groups", "service_accounts", "audited", "paths"])
+
+# Names of the sorted listings maintained by the graph.  users excludes service accounts and role
+# users, service_accounts includes both, and all_users is every user.  grants is the names of all
+# permissions with at least one grant.
+LISTINGS = ("users", "service_accounts", "all_users", "groups", "permissions", "grants")
 EPOCH = datetime(1970, 1, 1)
 
+# Attributes of GroupGraph that are replaced on each update from the database, and which are saved
+# in and restored from graph snapshots.  Bump GRAPH_SNAPSHOT_VERSION whenever the set of attributes
+# or the structure of their data changes, so that servers ignore snapshots written by other
+# versions.
+GRAPH_SNAPSHOT_ATTRIBUTES = (
+    "_graph",
+    "_rgraph",
+    "checkpoint",
+    "checkpoint_time",
+    "refresh_time",
+    "user_metadata",
+    "_public_keys",
+    "_authorized_keys",
+    "_keys_by_fingerprint",
+    "_groups",
+    "_disabled_groups",
+    "_permissions",
+    "_group_grants",
+    "_group_service_accounts",
+    "_service_account_grants",
+    "_grants_by_permission",
+    "_listings",
+)
+GRAPH_SNAPSHOT_VERSION = 2
+
 
 @singleton
 def Graph():
@@ -56,6 +115,10 @@ class NoSuchGroup(Exception):
     pass
 
 
+class NoSuchPermission(Exception):
+    pass
+
+
 class GroupGraph:
     """The cached permission graph.
 
@@ -81,6 +144,8 @@ class GroupGraph:
         lock: Read lock on the data
         checkpoint: Revision of Grouper data
         checkpoint_time: Last update time of Grouper data
+        refresh_time: When the graph was last successfully checked against the database
+        update_duration: How long in seconds the last rebuild of the graph took
         users: Names of all enabled users
         groups: Names of all enabled groups
         permissions: Names of all enabled permissions
@@ -94,17 +159,22 @@ class GroupGraph:
         # lock is a read lock to ensure consistency while iterating through data.  update_lock is
         # the write lock, held to prevent two updates from the database from running at the same
         # time.  lock has to be public for now because some API code takes the lock and looks at
-        # data elements directly.  :(
-        self.lock = RLock()
+        # data elements directly.  :(  lock records time spent waiting for it, for /debug/stats.
+        self.lock = InstrumentedRLock()
         self._update_lock = RLock()
 
         # Initialized by update_from_db.
         self._graph = DiGraph()
         self._rgraph = DiGraph()
 
-        # The last update sequence number and timestamp of the database underlying the graph.
+        # The last update sequence number and timestamp of the database underlying the graph.  They
+        # are also kept together in one tuple so that current_checkpoint can read both consistently
+        # without the lock.
         self.checkpoint = 0
         self.checkpoint_time = 0
+        self._current_checkpoint = (0, 0)
+        self.refresh_time = 0.0
+        self.update_duration = 0.0
 
         # Collection of all groups and permissions.
         self._groups = {}  # type: Dict[str, Group]
@@ -116,6 +186,17 @@ class GroupGraph:
         # complicated object, which hasn't been written yet.
         self.user_metadata = {}  # type: Dict[str, Dict[str, Any]]
 
+        # Map of usernames to full details of their public keys, sorted by key ID, for bulk key
+        # exports.  Includes keys of disabled users, like user_metadata.
+        self._public_keys = {}  # type: Dict[str, List[UserPublicKey]]
+
+        # Map of MD5 and SHA256 fingerprints, without the hash name prefix, to public keys.
+        self._keys_by_fingerprint = {}  # type: Dict[str, UserPublicKey]
+
+        # Map of enabled usernames to their public keys in authorized_keys format, one key per
+        # line, for SSH key lookups.
+        self._authorized_keys = {}  # type: Dict[str, str]
+
         # Map of groups to their permission grants.
         self._group_grants = {}  # type: Dict[str, List[GroupPermissionGrant]]
 
@@ -127,6 +208,14 @@ class GroupGraph:
         self._group_service_accounts = {}  # type: Dict[str, List[str]]
         self._service_account_grants = {}  # type: Dict[str, List[ServiceAccountPermissionGrant]]
 
+        # Sorted lists of names for each listing in LISTINGS, built once per checkpoint so that
+        # the API server can list and page through them without sorting on each request.
+        self._listings = {name: [] for name in LISTINGS}  # type: Dict[str, List[str]]
+
+        # Group and permission details being computed, so that concurrent requests for the same
+        # details at the same checkpoint share one computation.
+        self._in_flight = SingleFlight()
+
     @classmethod
     def from_db(cls, session):
         # type: (Session) -> GroupGraph
@@ -134,6 +223,100 @@ class GroupGraph:
         inst.update_from_db(session)
         return inst
 
+    def save_snapshot(self, path):
+        # type: (str) -> None
+        """Save the current graph to path, so that a server can start from it with load_snapshot.
+
+        The snapshot is written to a temporary file and then renamed, so readers never see a
+        partially written snapshot.  It starts with a small header holding the snapshot version and
+        the checkpoint, so that readers can tell whether the graph changed without loading it.
+        """
+        with self.lock:
+            state = {name: getattr(self, name) for name in GRAPH_SNAPSHOT_ATTRIBUTES}
+
+        # The data is replaced rather than modified by updates, so it can be pickled without
+        # holding the lock.
+        # Each writer gets its own temporary file, so that processes saving snapshots to the same
+        # path at the same time can't clobber each other's partially written file.
+        directory, name = os.path.split(path)
+        snapshot = NamedTemporaryFile(dir=directory or ".", prefix=f"{name}.", delete=False)
+        try:
+            with snapshot:
+                # NamedTemporaryFile is only readable by its owner, unlike a file created by open.
+                os.fchmod(snapshot.fileno(), 0o644)
+                header = (GRAPH_SNAPSHOT_VERSION, state["checkpoint"])
+                pickle.dump(header, snapshot, pickle.HIGHEST_PROTOCOL)
+                pickle.dump(state, snapshot, pickle.HIGHEST_PROTOCOL)
+            os.replace(snapshot.name, path)
+        except BaseException:
+            os.unlink(snapshot.name)
+            raise
+
+    def load_snapshot(self, path):
+        # type: (str) -> bool
+        """Replace the graph with a snapshot saved by save_snapshot, if its checkpoint differs.
+
+        The snapshot must only be written by Grouper itself, since loading it unpickles its
+        contents.  refresh_time is set to the later of the refresh time saved in the snapshot and
+        the modification time of the snapshot file, since whoever writes the snapshot may touch
+        it to record that the graph is still current.  A graph loaded from an old snapshot is
+        therefore reported as stale until it is next updated.
+
+        Returns:
+            True if the graph now matches the snapshot, False if the snapshot is missing,
+            unreadable, or was saved by a different version of the graph
+        """
+        try:
+            with open(path, "rb") as snapshot:
+                modified = os.fstat(snapshot.fileno()).st_mtime
+                version, checkpoint = pickle.load(snapshot)
+                if version != GRAPH_SNAPSHOT_VERSION:
+                    self._logger.warning(
+                        "Ignoring graph snapshot %s with version %s", path, version
+                    )
+                    return False
+                state = None
+                if checkpoint != self.checkpoint:
+                    state = pickle.load(snapshot)
+        except FileNotFoundError:
+            return False
+        except Exception:
+            self._logger.exception("Unable to read graph snapshot %s", path)
+            return False
+
+        with self._update_lock:
+            with self.lock:
+                if state is not None:
+                    for name in GRAPH_SNAPSHOT_ATTRIBUTES:
+                        setattr(self, name, state[name])
+                    self._current_checkpoint = (self.checkpoint, self.checkpoint_time)
+                self.refresh_time = max(self.refresh_time, modified)
+        return True
+
+    def snapshot(self):
+        # type: () -> GroupGraph
+        """Return a graph sharing the current data, which later updates will not change.
+
+        Updates replace the data rather than modifying it, so the snapshot is taken by copying the
+        references under the lock.  The snapshot has its own lock, so long walks of it don't block
+        threads waiting for the lock of this graph.
+        """
+        with self.lock:
+            snapshot = copy(self)
+        snapshot.lock = InstrumentedRLock()
+        snapshot._update_lock = RLock()
+        return snapshot
+
+    def current_checkpoint(self):
+        # type: () -> Tuple[int, int]
+        """Return the checkpoint and checkpoint time without taking the lock."""
+        return self._current_checkpoint
+
+    def is_stale(self, max_age):
+        # type: (float) -> bool
+        """Whether the graph was last checked against the database over max_age seconds ago."""
+        return time() - self.refresh_time > max_age
+
     @property
     def groups(self):
         # type: () -> List[str]
@@ -156,15 +339,28 @@ class GroupGraph:
         # type: (Session) -> None
         # Only allow one thread at a time to construct a fresh graph.
         with self._update_lock:
+            refresh_time = time()
             checkpoint, checkpoint_time = self._get_checkpoint(session)
             if checkpoint == self.checkpoint:
                 self._logger.debug("Checkpoint hasn't changed. Not Updating.")
+                with self.lock:
+                    self.refresh_time = refresh_time
+                return
+
+            # A replica that lags further behind than the database last read from, or a switch
+            # from the primary back to a replica, shows an older checkpoint.  Keep the newer graph
+            # rather than serving older data than clients have already seen.  A different
+            # checkpoint_time means a different database, whose checkpoint is not comparable.
+            if checkpoint < self.checkpoint and checkpoint_time == self.checkpoint_time:
+                self._logger.debug("Checkpoint %d is older than the graph's, ignoring", checkpoint)
                 return
             self._logger.debug("Checkpoint changed; updating!")
 
             start_time = datetime.utcnow()
 
-            user_metadata = self._get_user_metadata(session)
+            key_rows = self._get_public_key_rows(session)
+            user_metadata = self._get_user_metadata(session, key_rows)
+            public_keys = self._get_public_keys(key_rows)
             groups, disabled_groups = self._get_groups(session, user_metadata)
             permissions = self._get_permissions(session)
             group_grants = self._get_group_grants(session)
@@ -190,13 +386,21 @@ class GroupGraph:
             grants_by_permission = self._get_grants_by_permission(
                 permission_graph, group_grants, service_account_grants, user_metadata
             )
+            listings = self._get_listings(user_metadata, groups, permissions, grants_by_permission)
+            authorized_keys = self._get_authorized_keys(user_metadata, public_keys)
+            keys_by_fingerprint = self._get_keys_by_fingerprint(public_keys)
 
             with self.lock:
                 self._graph = graph
                 self._rgraph = rgraph
                 self.checkpoint = checkpoint
                 self.checkpoint_time = checkpoint_time
+                self._current_checkpoint = (checkpoint, checkpoint_time)
+                self.refresh_time = refresh_time
                 self.user_metadata = user_metadata
+                self._public_keys = public_keys
+                self._authorized_keys = authorized_keys
+                self._keys_by_fingerprint = keys_by_fingerprint
                 self._groups = groups
                 self._disabled_groups = disabled_groups
                 self._permissions = permissions
@@ -204,21 +408,20 @@ class GroupGraph:
                 self._group_service_accounts = group_service_accounts
                 self._service_account_grants = service_account_grants
                 self._grants_by_permission = grants_by_permission
+                self._listings = listings
 
             duration = datetime.utcnow() - start_time
+            self.update_duration = duration.total_seconds()
             get_plugin_proxy().log_graph_update_duration(int(duration.total_seconds() * 1000))
 
     @staticmethod
     def _get_checkpoint(session):
         # type: (Session) -> Tuple[int, int]
-        counter = session.query(Counter).filter_by(name="updates").scalar()
-        if counter is None:
-            return 0, 0
-        return counter.count, int(counter.last_modified.strftime("%s"))
+        return get_checkpoint(session)
 
     @staticmethod
-    def _get_user_metadata(session):
-        # type: (Session) -> Dict[str, Any]
+    def _get_user_metadata(session, key_rows):
+        # type: (Session, List[Tuple[SQLPublicKey, str]]) -> Dict[str, Any]
         """Returns a dict of username: { dict of metadata }."""
 
         def user_indexify(data):
@@ -229,7 +432,7 @@ class GroupGraph:
             return ret
 
         passwords = user_indexify(session.query(UserPassword).all())
-        public_keys = user_indexify(session.query(SQLPublicKey).all())
+        public_keys = user_indexify(key for key, _ in key_rows)
         user_metadata = user_indexify(session.query(SQLUserMetadata).all())
 
         service_account_data = (
@@ -297,6 +500,62 @@ class GroupGraph:
                     )
         return out
 
+    @staticmethod
+    def _get_public_key_rows(session):
+        # type: (Session) -> List[Tuple[SQLPublicKey, str]]
+        """Returns all public keys with the names of their users, sorted by key ID.
+
+        Loaded once per update and shared by the user metadata and the public key indices.
+        """
+        return (
+            session.query(SQLPublicKey, SQLUser.username)
+            .filter(SQLUser.id == SQLPublicKey.user_id)
+            .order_by(SQLPublicKey.id)
+            .all()
+        )
+
+    @staticmethod
+    def _get_public_keys(key_rows):
+        # type: (List[Tuple[SQLPublicKey, str]]) -> Dict[str, List[UserPublicKey]]
+        """Returns a dict of username: [ list of public keys sorted by ID ]."""
+        out = defaultdict(list)  # type: Dict[str, List[UserPublicKey]]
+        for key, username in key_rows:
+            out[username].append(
+                UserPublicKey(
+                    user=username,
+                    id=key.id,
+                    public_key=key.public_key,
+                    fingerprint=key.fingerprint,
+                    fingerprint_sha256=key.fingerprint_sha256,
+                    key_type=key.key_type,
+                    key_size=key.key_size,
+                    comment=key.comment,
+                    created_on=key.created_on,
+                )
+            )
+        return dict(out)
+
+    @staticmethod
+    def _get_authorized_keys(user_metadata, public_keys):
+        # type: (Dict[str, Any], Dict[str, List[UserPublicKey]]) -> Dict[str, str]
+        """Returns a dict of enabled usernames to their keys in authorized_keys format."""
+        return {
+            name: "".join(f"{key.public_key}\n" for key in public_keys.get(name, []))
+            for name, data in user_metadata.items()
+            if data["enabled"]
+        }
+
+    @staticmethod
+    def _get_keys_by_fingerprint(public_keys):
+        # type: (Dict[str, List[UserPublicKey]]) -> Dict[str, UserPublicKey]
+        """Returns a dict of MD5 and SHA256 fingerprints to public keys."""
+        out = {}  # type: Dict[str, UserPublicKey]
+        for keys in public_keys.values():
+            for key in keys:
+                out[key.fingerprint] = key
+                out[key.fingerprint_sha256] = key
+        return out
+
     @staticmethod
     def _get_group_grants(session):
         # type: (Session) -> Dict[str, List[GroupPermissionGrant]]
@@ -520,6 +779,41 @@ class GroupGraph:
 
         return all_grants
 
+    @staticmethod
+    def _get_listings(
+        user_metadata,  # type: Dict[str, Dict[str, Any]]
+        groups,  # type: Dict[str, Group]
+        permissions,  # type: Dict[str, Permission]
+        grants_by_permission,  # type: Dict[str, UniqueGrantsOfPermission]
+    ):
+        # type: (...) -> Dict[str, List[str]]
+        """Build the sorted name lists for each listing in LISTINGS."""
+        users = []  # type: List[str]
+        service_accounts = []  # type: List[str]
+        for name, data in user_metadata.items():
+            if "service_account" in data or data["role_user"]:
+                service_accounts.append(name)
+            else:
+                users.append(name)
+        return {
+            "users": sorted(users),
+            "service_accounts": sorted(service_accounts),
+            "all_users": sorted(user_metadata.keys()),
+            "groups": sorted(groups.keys()),
+            "permissions": sorted(permissions.keys()),
+            "grants": sorted(grants_by_permission.keys()),
+        }
+
+    def get_listing(self, name):
+        # type: (str) -> Tuple[int, List[str]]
+        """Return the checkpoint and the sorted list of names for one of LISTINGS.
+
+        The returned list is shared and replaced rather than modified when the graph is updated,
+        so it can be used without holding the lock but must not be modified by the caller.
+        """
+        with self.lock:
+            return self.checkpoint, self._listings[name]
+
     def all_grants(self):
         # type: () -> Dict[str, UniqueGrantsOfPermission]
         return self._grants_by_permission
@@ -552,6 +846,54 @@ class GroupGraph:
                 )
         return users
 
+    def get_public_keys(self, username=None):
+        # type: (Optional[str]) -> Tuple[int, List[UserPublicKey]]
+        """Return the checkpoint and the public keys of one user or, by default, of all users.
+
+        All keys are returned sorted by username and then by key ID.
+        """
+        with self.lock:
+            if username is not None:
+                return self.checkpoint, self._public_keys.get(username, [])
+            keys = []  # type: List[UserPublicKey]
+            for name in self._listings["all_users"]:
+                keys.extend(self._public_keys.get(name, []))
+            return self.checkpoint, keys
+
+    def get_authorized_keys(self, username, permission=None, argument=None):
+        # type: (str, Optional[str], Optional[str]) -> Optional[str]
+        """Return the public keys of a user in authorized_keys format.
+
+        If permission is given, only return keys if the user has been granted that permission,
+        with an argument matching argument if that is also given.  Returns None if the user does
+        not exist or is disabled, and an empty string if the user has no authorized keys.
+        """
+        with self.lock:
+            keys = self._authorized_keys.get(username)
+            if keys is None or permission is None:
+                return keys
+            grants = self._grants_by_permission.get(permission)
+            if grants is None:
+                return ""
+            arguments = (
+                grants.users.get(username)
+                or grants.role_users.get(username)
+                or grants.service_accounts.get(username)
+                or []
+            )
+            if argument is None:
+                return keys if arguments else ""
+            return keys if any(matches_glob(a, argument) for a in arguments) else ""
+
+    def get_public_key_by_fingerprint(self, fingerprint):
+        # type: (str) -> Optional[UserPublicKey]
+        """Find a public key by its MD5 or SHA256 fingerprint, with or without the hash prefix."""
+        hash_name, _, value = fingerprint.partition(":")
+        if hash_name in ("MD5", "SHA256"):
+            fingerprint = value
+        with self.lock:
+            return self._keys_by_fingerprint.get(fingerprint)
+
     def get_permissions(self, audited=False):
         # type: (bool) -> List[Permission]
         """Get the list of permissions as Permission instances."""
@@ -562,19 +904,54 @@ class GroupGraph:
                 permissions = list(self._permissions.values())
         return sorted(permissions, key=lambda p: p.name)
 
-    def get_permission_details(self, name, expose_aliases=True):
-        # type: (str, bool) -> Dict[str, Union[bool, Dict[str, Any]]]
-        """Get a permission and what groups and service accounts it's assigned to."""
+    def get_permission_details(self, name, expose_aliases=True, fields=None):
+        # type: (str, bool, Optional[AbstractSet[str]]) -> Dict[str, Union[bool, Dict[str, Any]]]
+        """Get a permission and what groups and service accounts it's assigned to.  Raise
+        NoSuchPermission for missing permissions.
+
+        If fields is given, only the sections of PERMISSION_DETAIL_FIELDS it names are computed
+        and returned.  Paths in the details of each group are only built if it contains "paths".
+
+        The details are computed from a snapshot of the graph, so the lock is not held while
+        walking it.  Concurrent identical calls share one computation, so the result must not be
+        modified.
+        """
+        graph = self.snapshot()
+        key = ("permission", name, expose_aliases, frozenset(fields) if fields else fields)
+        return graph._coalesce(
+            key, lambda: graph._get_permission_details(name, expose_aliases, fields)
+        )
+
+    def _get_permission_details(self, name, expose_aliases, fields):
+        # type: (str, bool, Optional[AbstractSet[str]]) -> Dict[str, Union[bool, Dict[str, Any]]]
+        include_groups = fields is None or "groups" in fields
+        include_service_accounts = fields is None or "service_accounts" in fields
+        if fields is None or "paths" in fields:
+            group_fields = None  # type: Optional[AbstractSet[str]]
+        else:
+            group_fields = GROUP_DETAIL_FIELDS - {"paths"}
+
         with self.lock:
-            data = {"groups": {}, "service_accounts": {}}  # type: Dict[str, Dict[str, Any]]
+            if name not in self._permissions:
+                raise NoSuchPermission(name)
+
+            data = {}  # type: Dict[str, Any]
+            if include_groups:
+                data["groups"] = {}
+            if include_service_accounts:
+                data["service_accounts"] = {}
 
             # Get all mapped versions of the permission. This is only direct relationships.
             direct_groups = set()
-            for groupname, grants in self._group_grants.items():
+            group_grants = self._group_grants if include_groups else {}
+            for groupname, grants in group_grants.items():
                 for grant in grants:
                     if grant.permission == name:
-                        data["groups"][groupname] = self.get_group_details(
-                            groupname, show_permission=name, expose_aliases=expose_aliases
+                        data["groups"][groupname] = self._get_group_details(
+                            groupname,
+                            show_permission=name,
+                            expose_aliases=expose_aliases,
+                            fields=group_fields,
                         )
                         direct_groups.add(groupname)
                         break
@@ -593,12 +970,19 @@ class GroupGraph:
                     if member_name in checked_groups:
                         continue
                     checked_groups.add(member_name)
-                    data["groups"][member_name] = self.get_group_details(
-                        member_name, show_permission=name, expose_aliases=expose_aliases
+                    data["groups"][member_name] = self._get_group_details(
+                        member_name,
+                        show_permission=name,
+                        expose_aliases=expose_aliases,
+                        fields=group_fields,
                     )
 
             # Finally, add all service accounts.
-            for account, service_grants in self._service_account_grants.items():
+            if include_service_accounts:
+                service_account_grants = self._service_account_grants
+            else:
+                service_account_grants = {}
+            for account, service_grants in service_account_grants.items():
                 for service_grant in service_grants:
                     if service_grant.permission == name:
                         details = {
@@ -612,6 +996,8 @@ class GroupGraph:
                             data["service_accounts"][account] = {"permissions": [details]}
 
             # Add permission audit value
+            if fields is not None and "audited" not in fields:
+                return data
             permission_audited = {"audited": self._permissions[name].audited}
             return {**data, **permission_audited}
 
@@ -660,10 +1046,38 @@ class GroupGraph:
                 )
         return groups
 
-    def get_group_details(self, groupname, show_permission=None, expose_aliases=True):
-        # type: (str, Optional[str], bool) -> Dict[str, Any]
+    def get_group_details(self, groupname, show_permission=None, expose_aliases=True, fields=None):
+        # type: (str, Optional[str], bool, Optional[AbstractSet[str]]) -> Dict[str, Any]
         """Get users and permissions that belong to a group. Raise NoSuchGroup
-        for missing groups."""
+        for missing groups.
+
+        If fields is given, only the sections of GROUP_DETAIL_FIELDS it names are computed and
+        returned.  The downward graph walk is skipped unless members are requested, the upward
+        walk is skipped unless parent groups, permissions, or the audit status are requested, and
+        paths are only built if fields contains "paths".
+
+        The details are computed from a snapshot of the graph, so the lock is not held while
+        walking it.  Concurrent identical calls share one computation, so the result must not be
+        modified.
+        """
+        graph = self.snapshot()
+        key = (
+            "group",
+            groupname,
+            show_permission,
+            expose_aliases,
+            frozenset(fields) if fields else fields,
+        )
+        return graph._coalesce(
+            key,
+            lambda: graph._get_group_details(groupname, show_permission, expose_aliases, fields),
+        )
+
+    def _get_group_details(self, groupname, show_permission, expose_aliases, fields):
+        # type: (str, Optional[str], bool, Optional[AbstractSet[str]]) -> Dict[str, Any]
+        include_members = fields is None or bool({"users", "subgroups"} & fields)
+        include_parents = fields is None or bool({"groups", "permissions", "audited"} & fields)
+        include_paths = fields is None or "paths" in fields
 
         with self.lock:
             data = {
@@ -685,36 +1099,45 @@ class GroupGraph:
             group = ("Group", groupname)
             if not self._graph.has_node(group):
                 raise NoSuchGroup("Group %s is either missing or disabled." % groupname)
-            paths = single_source_shortest_path(self._graph, group)
-            rpaths = single_source_shortest_path(self._rgraph, group)
 
-            for member, path in paths.items():
-                if member == group:
-                    continue
-                member_type, member_name = member
-                role = self._graph[group][path[1]]["role"]
-                expiration = self._graph[group][path[1]]["expiration"]
-                data[MEMBER_TYPE_MAP[member_type]][member_name] = {
-                    "name": member_name,
-                    "path": [elem[1] for elem in path],
-                    "distance": len(path) - 1,
-                    "role": role,
-                    "rolename": GROUP_EDGE_ROLES[role],
-                    "expiration": str(expiration),
-                }
+            if include_members:
+                paths = single_source_shortest_path(self._graph, group)
+                for member, path in paths.items():
+                    if member == group:
+                        continue
+                    member_type, member_name = member
+                    role = self._graph[group][path[1]]["role"]
+                    expiration = self._graph[group][path[1]]["expiration"]
+                    data[MEMBER_TYPE_MAP[member_type]][member_name] = {
+                        "name": member_name,
+                        "distance": len(path) - 1,
+                        "role": role,
+                        "rolename": GROUP_EDGE_ROLES[role],
+                        "expiration": str(expiration),
+                    }
+                    if include_paths:
+                        data[MEMBER_TYPE_MAP[member_type]][member_name]["path"] = [
+                            elem[1] for elem in path
+                        ]
 
+            if include_parents:
+                rpaths = single_source_shortest_path(self._rgraph, group)
+            else:
+                rpaths = {}
             for parent, path in rpaths.items():
                 if parent == group:
                     continue
                 _, parent_name = parent
+                path_names = [elem[1] for elem in path] if include_paths else None
                 role = self._rgraph[path[-2]][parent]["role"]
                 data["groups"][parent_name] = {
                     "name": parent_name,
-                    "path": [elem[1] for elem in path],
                     "distance": len(path) - 1,
                     "role": role,
                     "rolename": GROUP_EDGE_ROLES[role],
                 }
+                if include_paths:
+                    data["groups"][parent_name]["path"] = path_names
                 for grant in self._group_grants.get(parent_name, []):
                     if show_permission is not None and grant.permission != show_permission:
                         continue
@@ -729,16 +1152,18 @@ class GroupGraph:
                         "argument": grant.argument,
                         "granted_on": (grant.granted_on - EPOCH).total_seconds(),
                         "distance": len(path) - 1,
-                        "path": [elem[1] for elem in path],
                         "audited": perm_audited,
                     }
 
+                    if include_paths:
+                        perm_data["path"] = path_names
                     if expose_aliases:
                         perm_data["alias"] = grant.is_alias
 
                     data["permissions"].append(perm_data)
 
-            for grant in self._group_grants.get(groupname, []):
+            direct_grants = self._group_grants.get(groupname, []) if include_parents else []
+            for grant in direct_grants:
                 if show_permission is not None and grant.permission != show_permission:
                     continue
                 if self._permissions[grant.permission].audited:
@@ -752,24 +1177,49 @@ class GroupGraph:
                     "argument": grant.argument,
                     "granted_on": (grant.granted_on - EPOCH).total_seconds(),
                     "distance": 0,
-                    "path": [groupname],
                     "audited": perm_audited,
                 }
 
+                if include_paths:
+                    perm_data["path"] = [groupname]
                 if expose_aliases:
                     perm_data["alias"] = grant.is_alias
 
                 data["permissions"].append(perm_data)
 
             data["audited"] = group_audited
+            if fields is not None:
+                data = {k: v for k, v in data.items() if k == "group" or k in fields}
             return data
 
-    def get_user_details(self, username, expose_aliases=True):
-        # type: (str, bool) -> Dict[str, Any]
-        """Get a user's groups and permissions.  Raise NoSuchUser for missing users."""
+    def _coalesce(self, key, compute):
+        # type: (Hashable, Callable[[], T]) -> T
+        """Share compute() among concurrent callers with the same key at the same checkpoint.
+
+        This is called on snapshots, which share _in_flight with the graph they were taken from.
+        compute() only needs the lock of its own snapshot, so callers holding the lock of the
+        graph can safely wait for a computation started by another thread.
+        """
+        return self._in_flight.do((self.checkpoint, key), compute)
+
+    def get_user_details(self, username, expose_aliases=True, fields=None):
+        # type: (str, bool, Optional[AbstractSet[str]]) -> Dict[str, Any]
+        """Get a user's groups and permissions.  Raise NoSuchUser for missing users.
+
+        If fields is given, only the sections of USER_DETAIL_FIELDS it names are computed and
+        returned, and the path of each group and permission is only built if it contains "paths".
+        """
+        include_groups = fields is None or "groups" in fields
+        include_permissions = fields is None or "permissions" in fields
+        include_paths = fields is None or "paths" in fields
+
         groups = {}  # type: Dict[str, Dict[str, Any]]
         permissions = []  # type: List[Dict[str, Any]]
-        user_details = {"groups": groups, "permissions": permissions}
+        user_details = {}  # type: Dict[str, Any]
+        if include_groups:
+            user_details["groups"] = groups
+        if include_permissions:
+            user_details["permissions"] = permissions
 
         with self.lock:
             if username not in self.user_metadata:
@@ -785,7 +1235,7 @@ class GroupGraph:
             # If the user is a service account, its permissions are only those of the service
             # account and we don't do any graph walking.
             if "service_account" in self.user_metadata[username]:
-                if username in self._service_account_grants:
+                if include_permissions and username in self._service_account_grants:
                     for service_grant in self._service_account_grants[username]:
                         permissions.append(
                             {
@@ -796,6 +1246,9 @@ class GroupGraph:
                         )
                 return user_details
 
+            if not (include_groups or include_permissions):
+                return user_details
+
             # User permissions are inherited from all groups for which their
             # role is not "np-owner".  User groups are all groups in which a
             # user is a member by inheritance, except for ancestors of groups
@@ -805,14 +1258,16 @@ class GroupGraph:
             for group in self._rgraph.neighbors(user):
                 role = self._rgraph[user][group]["role"]
                 if GROUP_EDGE_ROLES[role] == "np-owner":
-                    group_name = group[1]
-                    groups[group_name] = {
-                        "name": group_name,
-                        "path": [username, group_name],
-                        "distance": 1,
-                        "role": role,
-                        "rolename": GROUP_EDGE_ROLES[role],
-                    }
+                    if include_groups:
+                        group_name = group[1]
+                        groups[group_name] = {
+                            "name": group_name,
+                            "distance": 1,
+                            "role": role,
+                            "rolename": GROUP_EDGE_ROLES[role],
+                        }
+                        if include_paths:
+                            groups[group_name]["path"] = [username, group_name]
                     continue
                 new_rpaths = single_source_shortest_path(self._rgraph, group)
                 for parent, path in new_rpaths.items():
@@ -823,24 +1278,32 @@ class GroupGraph:
                 if parent == user:
                     continue
                 _, parent_name = parent
-                role = self._rgraph[path[-2]][parent]["role"]
-                groups[parent_name] = {
-                    "name": parent_name,
-                    "path": [elem[1] for elem in path],
-                    "distance": len(path) - 1,
-                    "role": role,
-                    "rolename": GROUP_EDGE_ROLES[role],
-                }
+                path_names = [elem[1] for elem in path] if include_paths else None
+
+                if include_groups:
+                    role = self._rgraph[path[-2]][parent]["role"]
+                    groups[parent_name] = {
+                        "name": parent_name,
+                        "distance": len(path) - 1,
+                        "role": role,
+                        "rolename": GROUP_EDGE_ROLES[role],
+                    }
+                    if include_paths:
+                        groups[parent_name]["path"] = path_names
+
+                if not include_permissions:
+                    continue
 
                 for grant in self._group_grants[parent_name]:
                     perm_data = {
                         "permission": grant.permission,
                         "argument": grant.argument,
                         "granted_on": (grant.granted_on - EPOCH).total_seconds(),
-                        "path": [elem[1] for elem in path],
                         "distance": len(path) - 1,
                     }
 
+                    if include_paths:
+                        perm_data["path"] = path_names
                     if expose_aliases:
                         perm_data["alias"] = grant.is_alias
 
@@ -0,0 +1,123 @@
+"""Host-level graph builder.
+
+grouper-graphd refreshes the graph from the database and publishes each new generation as a
+snapshot file.  API and frontend servers on the same host that set graph_builder_path load the
+graph from that file instead of each querying the database, so database load grows with the number
+of hosts rather than the number of server processes.
+"""
+
+import argparse
+import logging
+import sys
+from contextlib import closing
+from typing import TYPE_CHECKING
+
+from grouper import __version__
+from grouper.database import DbRefreshThread
+from grouper.error_reporting import setup_signal_handlers
+from grouper.graph import Graph
+from grouper.graphd.settings import GraphdSettings
+from grouper.models.base.session import DbEngineManager, Session
+from grouper.plugin import set_global_plugin_proxy
+from grouper.plugin.exceptions import PluginsDirectoryDoesNotExist
+from grouper.plugin.proxy import PluginProxy
+from grouper.query_stats import configure_query_stats
+from grouper.repositories.factory import SessionFactory
+from grouper.settings import default_settings_path
+from grouper.setup import setup_logging
+
+if TYPE_CHECKING:
+    from argparse import Namespace
+    from typing import List
+
+
+def build_arg_parser():
+    # type: () -> argparse.ArgumentParser
+    parser = argparse.ArgumentParser(description="Grouper Graph Builder")
+
+    parser.add_argument(
+        "-c", "--config", default=default_settings_path(), help="Path to config file."
+    )
+    parser.add_argument(
+        "-d", "--database-url", type=str, default=None, help="Override database URL in config."
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="count", default=0, help="Increase logging verbosity."
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="count", default=0, help="Decrease logging verbosity."
+    )
+    parser.add_argument(
+        "-V",
+        "--version",
+        action="version",
+        version="%(prog)s {}".format(__version__),
+        help="Display version information.",
+    )
+    return parser
+
+
+def start_builder(args, settings, plugins):
+    # type: (Namespace, GraphdSettings, PluginProxy) -> None
+    log_level = logging.getLevelName(logging.getLogger().level)
+    logging.info("begin. log_level=%s", log_level)
+
+    if not settings.graph_path:
+        logging.fatal("graph_path must be set in the graphd settings")
+        sys.exit(1)
+
+    logging.info("configure database session")
+    if args.database_url:
+        settings.database = args.database_url
+    configure_query_stats(settings.slow_query_threshold, plugins.log_slow_query)
+    Session.configure(bind=DbEngineManager().get_db_engine(settings.database))
+
+    logging.info("Initializing DB Graph")
+    with closing(SessionFactory(settings).create_read_only_session()) as session:
+        graph = Graph()
+        graph.update_from_db(session)
+    logging.info("DB Graph successfully initialized")
+
+    # Consumers keep serving the last published graph if the database is unavailable, so keep
+    # retrying rather than exiting.
+    builder = DbRefreshThread(
+        settings,
+        plugins,
+        graph,
+        settings.refresh_interval,
+        min_interval=settings.min_refresh_interval,
+        jitter=settings.refresh_jitter,
+        serve_stale=True,
+        max_backoff=settings.max_refresh_backoff,
+        snapshot_path=settings.graph_path,
+    )
+    logging.info("Publishing graph to %s", settings.graph_path)
+    builder.run()
+
+
+def main(sys_argv=sys.argv):
+    # type: (List[str]) -> None
+    setup_signal_handlers()
+
+    parser = build_arg_parser()
+    args = parser.parse_args(sys_argv[1:])
+
+    try:
+        settings = GraphdSettings.global_settings_from_config(args.config)
+        setup_logging(args, settings.log_format)
+        plugins = PluginProxy.load_plugins(settings, "grouper-graphd")
+        set_global_plugin_proxy(plugins)
+    except PluginsDirectoryDoesNotExist as e:
+        logging.fatal("Plugin directory does not exist: %s", e)
+        sys.exit(1)
+    except Exception:
+        logging.exception("Uncaught exception in startup")
+        sys.exit(1)
+
+    try:
+        start_builder(args, settings, plugins)
+    except Exception:
+        plugins.log_exception(None, None, *sys.exc_info())
+        logging.exception("Uncaught exception")
+    finally:
+        logging.info("end")
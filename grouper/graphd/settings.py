@@ -0,0 +1,34 @@
+from typing import TYPE_CHECKING
+
+from grouper.settings import set_global_settings, Settings
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+
+class GraphdSettings(Settings):
+    """Grouper graph builder settings."""
+
+    @staticmethod
+    def global_settings_from_config(filename=None, section="graphd"):
+        # type: (Optional[str], Optional[str]) -> GraphdSettings
+        """Create and return a new global Settings singleton."""
+        settings = GraphdSettings()
+        settings.update_from_config(filename, section)
+        set_global_settings(settings)
+        return settings
+
+    def __init__(self):
+        # type: () -> None
+        super().__init__()
+
+        # Keep attributes here in the same order as in config/dev.yaml.
+        self.graph_path = None  # type: Optional[str]
+        self.refresh_interval = 5
+        self.min_refresh_interval = 1
+        self.refresh_jitter = 0.2
+        self.max_refresh_backoff = 600
+
+    def update_from_config(self, filename=None, section="graphd"):
+        # type: (Optional[str], Optional[str]) -> None
+        super().update_from_config(filename, section)
@@ -3,8 +3,8 @@ from typing import TYPE_CHECKING
 
 from grouper.entities.group_edge import GROUP_EDGE_ROLES
 from grouper.models.base.constants import OBJ_TYPES
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.comment import Comment
-from grouper.models.counter import Counter
 from grouper.models.group_edge import GroupEdge
 from grouper.models.request import Request
 from grouper.models.request_status_change import RequestStatusChange
@@ -132,6 +132,6 @@ def persist_group_member_changes(
         edge.apply_changes(request.changes)
         session.flush()
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     return request
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import literal
+from sqlalchemy import and_, case, func, literal
 from sqlalchemy.sql import label
 
 from grouper.models.comment import Comment
@@ -11,7 +11,7 @@ from grouper.models.request_status_change import RequestStatusChange
 from grouper.models.user import User
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Optional, Tuple
     from sqlalchemy.orm import Query, Session
 
 
@@ -75,3 +75,17 @@ def count_requests_by_group(session, group, status=None, user=None):
         )
 
     return requests.count()
+
+
+def count_pending_requests_by_group(session, group, user):
+    # type: (Session, Group, User) -> Tuple[int, int]
+    """Return the number of pending requests to join group and how many of them are for user."""
+    for_user = case(
+        [(and_(Request.on_behalf_obj_pk == user.id, Request.on_behalf_obj_type == 0), 1)], else_=0
+    )
+    total, by_user = (
+        session.query(func.count(Request.id), func.sum(for_user))
+        .filter(Request.requesting_id == group.id, Request.status == "pending")
+        .one()
+    )
+    return total, by_user or 0
@@ -1,7 +1,9 @@
 import logging
 from typing import TYPE_CHECKING
 
-from grouper.models.counter import Counter
+from sqlalchemy.orm import contains_eager
+
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.group_service_accounts import GroupServiceAccount
 from grouper.models.service_account import ServiceAccount
 from grouper.models.user import User
@@ -19,7 +21,7 @@ def add_service_account(session, group, service_account):
         "Adding service account %s to %s", service_account.user.username, group.groupname
     )
     GroupServiceAccount(group_id=group.id, service_account=service_account).add(session)
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
 
@@ -30,6 +32,8 @@ def get_service_accounts(session, group):
     service_accounts = (
         session.query(ServiceAccount)
         .join(ServiceAccount.owner)
+        .join(ServiceAccount.user)
+        .options(contains_eager(ServiceAccount.user))
         .filter(
             GroupServiceAccount.group_id == group.id,
             GroupServiceAccount.service_account_id == ServiceAccount.id,
@@ -1,4 +1,5 @@
 from contextlib import closing
+from time import time
 from typing import TYPE_CHECKING
 
 from tornado.web import RequestHandler
@@ -6,16 +7,45 @@ from tornado.web import RequestHandler
 from grouper.models.base.session import Session
 
 if TYPE_CHECKING:
-    from typing import Any
+    from grouper.graph import GroupGraph
+    from typing import Any, Optional
 
 
 class HealthCheck(RequestHandler):
+    """Health check for the API and frontend servers.
+
+    The API server passes in its graph, in which case the health check reports how fresh the graph
+    is from memory rather than querying the database on every probe.  The graph refresh thread
+    either exits the process if the database cannot be reached or, if the server is configured to
+    serve a stale graph, keeps retrying, in which case the health check reports the graph as stale
+    once it is older than stale_graph_age.  Otherwise, the health check verifies that the database
+    is reachable.
+    """
+
     def initialize(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
-        pass
+        self.graph = kwargs.get("graph")  # type: Optional[GroupGraph]
+        self.stale_graph_age = kwargs.get("stale_graph_age", 0)  # type: int
 
     def get(self, *args, **kwargs):
         # type: (*Any, **Any) -> None
-        with closing(Session()) as session:
-            session.execute("SELECT 1")
-        self.write("")
+        if self.graph is None:
+            with closing(Session()) as session:
+                session.execute("SELECT 1")
+            self.write("")
+            return
+
+        with self.graph.lock:
+            checkpoint = self.graph.checkpoint
+            checkpoint_time = self.graph.checkpoint_time
+            refresh_time = self.graph.refresh_time
+            stale = self.graph.is_stale(self.stale_graph_age)
+        now = time()
+        self.write(
+            {
+                "checkpoint": checkpoint,
+                "checkpoint_time": checkpoint_time,
+                "refresh_age": int(now - refresh_time),
+                "stale": stale,
+            }
+        )
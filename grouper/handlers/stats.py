@@ -0,0 +1,268 @@
+from time import time
+from typing import TYPE_CHECKING
+
+from tornado.web import RequestHandler
+
+from grouper.graph import Graph
+from grouper.query_stats import fingerprint_id, query_stats
+from grouper.stats import LATENCY_BUCKETS
+
+if TYPE_CHECKING:
+    from grouper.api.admission import AdmissionController
+    from grouper.app import GrouperApplication
+    from grouper.graph import GroupGraph
+    from grouper.stats import LatencyHistogram
+    from typing import Any, Dict, List, Optional, Union
+
+
+class Stats(RequestHandler):
+    """Report request, graph, and cache statistics for the API and frontend servers.
+
+    Returns JSON by default, or the Prometheus text exposition format if the format argument is
+    "prometheus".  Latencies are in milliseconds in JSON and in seconds for Prometheus, following
+    the conventions of each.
+
+    The API server passes in its graph, caches, and admission controller.  The frontend uses the
+    global graph and has no caches or admission control to report.  Both report the statistics for
+    database statements and connection pools kept by grouper.query_stats.
+    """
+
+    def initialize(self, *args, **kwargs):
+        # type: (*Any, **Any) -> None
+        self.graph = kwargs.get("graph") or Graph()  # type: GroupGraph
+        self.caches = {}  # type: Dict[str, Any]
+        for name in ("response_cache", "token_cache"):
+            if name in kwargs:
+                self.caches[name] = kwargs[name]
+        self.admission = kwargs.get("admission")  # type: Optional[AdmissionController]
+
+    def get(self, *args, **kwargs):
+        # type: (*Any, **Any) -> None
+        if self.get_argument("format", "json") == "prometheus":
+            self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.write("".join(line + "\n" for line in self._to_prometheus()))
+        else:
+            self.write(self._to_json())
+
+    def _to_json(self):
+        # type: () -> Dict[str, Any]
+        application = self.application  # type: GrouperApplication
+        handlers = {}
+        for name, stats in sorted(application.stats.handlers.items()):
+            handlers[name] = {
+                "count": stats.latency.count,
+                "statuses": {str(s): c for s, c in sorted(stats.statuses.items())},
+                "latency_ms": _latency_ms(stats.latency),
+            }
+
+        caches = {}
+        for name, cache in self.caches.items():
+            lookups = cache.hits + cache.misses
+            caches[name] = {
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_rate": round(cache.hits / lookups, 4) if lookups else 0,
+            }
+
+        return {
+            "handlers": handlers,
+            "graph": self._graph_stats(),
+            "caches": caches,
+            "admission": self._admission_stats(),
+            "database": self._database_json(),
+        }
+
+    def _database_json(self):
+        # type: () -> Dict[str, Any]
+        stats = query_stats()
+        with stats.lock:
+            statements = {
+                fingerprint_id(statement): {
+                    "statement": statement,
+                    "count": statement_stats.latency.count,
+                    "latency_ms": _latency_ms(statement_stats.latency),
+                }
+                for statement, statement_stats in stats.statements.items()
+            }
+            pools = {
+                name: {
+                    "capacity": pool.capacity,
+                    "checked_out": pool.checked_out,
+                    "checkouts": pool.checkout_wait.count,
+                    "saturated": pool.saturated,
+                    "checkout_wait_ms": _latency_ms(pool.checkout_wait),
+                }
+                for name, pool in stats.pools.items()
+            }
+            slow_queries = [
+                {
+                    "time": q.time.isoformat(),
+                    "statement": q.statement,
+                    "duration_ms": round(q.duration * 1000, 3),
+                    "handler": q.handler,
+                    "usecase": q.usecase,
+                }
+                for q in reversed(stats.slow_queries)
+            ]
+            slow_query_count = stats.slow_query_count
+        return {
+            "statements": statements,
+            "pools": pools,
+            "slow_query_count": slow_query_count,
+            "slow_queries": slow_queries,
+        }
+
+    def _to_prometheus(self):
+        # type: () -> List[str]
+        application = self.application  # type: GrouperApplication
+        handlers = sorted(application.stats.handlers.items())
+        lines = [
+            "# HELP grouper_requests_total Requests handled, by handler and status code.",
+            "# TYPE grouper_requests_total counter",
+        ]
+        for name, stats in handlers:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f'grouper_requests_total{{handler="{name}",status="{status}"}} {count}'
+                )
+
+        lines.extend(
+            [
+                "# HELP grouper_request_duration_seconds Request latency, by handler.",
+                "# TYPE grouper_request_duration_seconds histogram",
+            ]
+        )
+        for name, stats in handlers:
+            lines.extend(
+                _histogram_lines(
+                    "grouper_request_duration_seconds", f'handler="{name}"', stats.latency
+                )
+            )
+
+        for metric, value in sorted(self._graph_stats().items()):
+            kind = "counter" if metric.endswith("_total") else "gauge"
+            lines.append(f"# TYPE grouper_graph_{metric} {kind}")
+            lines.append(f"grouper_graph_{metric} {value}")
+
+        if self.caches:
+            for metric in ("hits", "misses"):
+                lines.append(f"# TYPE grouper_cache_{metric}_total counter")
+                for name, cache in sorted(self.caches.items()):
+                    value = getattr(cache, metric)
+                    lines.append(f'grouper_cache_{metric}_total{{cache="{name}"}} {value}')
+
+        admission = self._admission_stats()
+        if admission:
+            for metric in (
+                "running",
+                "queued",
+                "admitted_total",
+                "rejected_total",
+                "abandoned_total",
+            ):
+                kind = "counter" if metric.endswith("_total") else "gauge"
+                lines.append(f"# TYPE grouper_admission_{metric} {kind}")
+                for lane, lane_stats in sorted(admission.items()):
+                    value = lane_stats[metric]
+                    lines.append(f'grouper_admission_{metric}{{lane="{lane}"}} {value}')
+
+        lines.extend(self._database_prometheus())
+        return lines
+
+    def _database_prometheus(self):
+        # type: () -> List[str]
+        stats = query_stats()
+        lines = [
+            "# HELP grouper_db_query_duration_seconds Database statement latency, by statement.",
+            "# TYPE grouper_db_query_duration_seconds histogram",
+        ]
+        with stats.lock:
+            for statement, statement_stats in sorted(stats.statements.items()):
+                labels = f'statement="{fingerprint_id(statement)}"'
+                lines.extend(
+                    _histogram_lines(
+                        "grouper_db_query_duration_seconds", labels, statement_stats.latency
+                    )
+                )
+            lines.append("# TYPE grouper_db_slow_queries_total counter")
+            lines.append(f"grouper_db_slow_queries_total {stats.slow_query_count}")
+
+            pools = sorted(stats.pools.items())
+            pool_metrics = (
+                ("capacity", "gauge", "capacity"),
+                ("checked_out", "gauge", "checked_out"),
+                ("saturated_total", "counter", "saturated"),
+            )
+            for metric, kind, attribute in pool_metrics:
+                lines.append(f"# TYPE grouper_db_pool_{metric} {kind}")
+                for name, pool in pools:
+                    value = getattr(pool, attribute)
+                    lines.append(f'grouper_db_pool_{metric}{{pool="{name}"}} {value}')
+            lines.extend(
+                [
+                    "# HELP grouper_db_pool_checkout_wait_seconds Time to check out a connection.",
+                    "# TYPE grouper_db_pool_checkout_wait_seconds histogram",
+                ]
+            )
+            for name, pool in pools:
+                lines.extend(
+                    _histogram_lines(
+                        "grouper_db_pool_checkout_wait_seconds",
+                        f'pool="{name}"',
+                        pool.checkout_wait,
+                    )
+                )
+        return lines
+
+    def _admission_stats(self):
+        # type: () -> Dict[str, Dict[str, int]]
+        if not self.admission:
+            return {}
+        return {
+            name: {
+                "running": lane.running,
+                "queued": lane.queued,
+                "admitted_total": lane.admitted,
+                "rejected_total": lane.rejected,
+                "abandoned_total": lane.abandoned,
+            }
+            for name, lane in self.admission.lanes.items()
+        }
+
+    def _graph_stats(self):
+        # type: () -> Dict[str, Union[int, float]]
+        with self.graph.lock:
+            checkpoint = self.graph.checkpoint
+            refresh_time = self.graph.refresh_time
+            update_duration = self.graph.update_duration
+        now = time()
+        return {
+            "checkpoint": checkpoint,
+            "refresh_age_seconds": round(now - refresh_time, 3),
+            "update_duration_seconds": update_duration,
+            "lock_contentions_total": self.graph.lock.contentions,
+            "lock_wait_seconds_total": round(self.graph.lock.wait_time, 6),
+        }
+
+
+def _latency_ms(latency):
+    # type: (LatencyHistogram) -> Dict[str, float]
+    return {
+        "p50": round(latency.percentile(0.5) * 1000, 3),
+        "p90": round(latency.percentile(0.9) * 1000, 3),
+        "p99": round(latency.percentile(0.99) * 1000, 3),
+        "max": round(latency.max * 1000, 3),
+        "mean": round(latency.sum * 1000 / latency.count, 3) if latency.count else 0,
+    }
+
+
+def _histogram_lines(metric, labels, latency):
+    # type: (str, str, LatencyHistogram) -> List[str]
+    """Return the Prometheus bucket, sum, and count samples of a latency histogram."""
+    lines = []
+    bounds = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+    for bound, count in zip(bounds, latency.cumulative_counts()):
+        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f"{metric}_sum{{{labels}}} {latency.sum}")
+    lines.append(f"{metric}_count{{{labels}}} {latency.count}")
+    return lines
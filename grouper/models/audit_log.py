@@ -1,10 +1,26 @@
 from datetime import datetime
 from enum import IntEnum
 
-from sqlalchemy import Column, DateTime, desc, ForeignKey, Integer, or_, String, Text
+from sqlalchemy import (
+    and_,
+    Column,
+    DateTime,
+    desc,
+    ForeignKey,
+    func,
+    Index,
+    Integer,
+    or_,
+    select,
+    String,
+    Text,
+    union,
+)
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import relationship
+from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import joinedload, relationship
 
+from grouper.audit_log_writer import queue_audit_log_entry, write_pending_entries
 from grouper.models.base.model_base import Model
 from grouper.plugin import get_plugin_proxy
 
@@ -23,32 +39,62 @@ class AuditLogFailure(Exception):
     pass
 
 
-class AuditLog(Model):
-    # TODO: Extract business logic from this class
-    # PLEASE DON'T ADD NEW BUSINESS LOGIC HERE IF YOU CAN AVOID IT!
+class AuditLogColumns:
+    """Columns shared by the audit_log table and its archive.
 
-    """
-    Logs actions taken in the system. This is a pretty simple logging framework to just
-    let us track everything that happened. The main use case is to show users what has
-    happened recently, to help them understand.
+    Entries are always returned newest first, so every filter column is indexed together with
+    (log_time, id).  This lets the database walk the index in order and stop at the limit rather
+    than sorting every matching entry, and supports keyset pagination with get_entries(before=).
     """
 
-    __tablename__ = "audit_log"
+    @declared_attr
+    def __table_args__(cls):
+        name = cls.__tablename__
+        return (
+            Index(f"{name}_time_id", "log_time", "id"),
+            Index(f"{name}_actor_time", "actor_id", "log_time", "id"),
+            Index(f"{name}_on_user_time", "on_user_id", "log_time", "id"),
+            Index(f"{name}_on_group_time", "on_group_id", "log_time", "id"),
+            Index(f"{name}_on_permission_time", "on_permission_id", "log_time", "id"),
+            Index(f"{name}_category_time", "category", "log_time", "id"),
+            Index(f"{name}_action_time", "action", "log_time", "id"),
+        )
 
-    id = Column(Integer, primary_key=True)
     log_time = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # The actor is the person who took an action.
-    actor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    actor = relationship("User", foreign_keys=[actor_id])
+    @declared_attr
+    def actor_id(cls):
+        return Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    @declared_attr
+    def actor(cls):
+        return relationship("User", foreign_keys=f"{cls.__name__}.actor_id")
 
     # The 'on_*' columns are what was acted on.
-    on_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    on_user = relationship("User", foreign_keys=[on_user_id])
-    on_group_id = Column(Integer, ForeignKey("groups.id"), nullable=True)
-    on_group = relationship("Group", foreign_keys=[on_group_id])
-    on_permission_id = Column(Integer, ForeignKey("permissions.id"), nullable=True)
-    on_permission = relationship("Permission", foreign_keys=[on_permission_id])
+    @declared_attr
+    def on_user_id(cls):
+        return Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    @declared_attr
+    def on_user(cls):
+        return relationship("User", foreign_keys=f"{cls.__name__}.on_user_id")
+
+    @declared_attr
+    def on_group_id(cls):
+        return Column(Integer, ForeignKey("groups.id"), nullable=True)
+
+    @declared_attr
+    def on_group(cls):
+        return relationship("Group", foreign_keys=f"{cls.__name__}.on_group_id")
+
+    @declared_attr
+    def on_permission_id(cls):
+        return Column(Integer, ForeignKey("permissions.id"), nullable=True)
+
+    @declared_attr
+    def on_permission(cls):
+        return relationship("Permission", foreign_keys=f"{cls.__name__}.on_permission_id")
 
     # The action and description columns are text. These are mostly displayed
     # to the user as-is, but we might provide filtering or something.
@@ -56,6 +102,26 @@ class AuditLog(Model):
     description = Column(Text, nullable=False)
     category = Column(Integer, nullable=False, default=AuditLogCategory.general)
 
+
+class AuditLog(AuditLogColumns, Model):
+    # TODO: Extract business logic from this class
+    # PLEASE DON'T ADD NEW BUSINESS LOGIC HERE IF YOU CAN AVOID IT!
+
+    """
+    Logs actions taken in the system. This is a pretty simple logging framework to just
+    let us track everything that happened. The main use case is to show users what has
+    happened recently, to help them understand.
+
+    Entries older than the background processor's audit_log_archive_days are moved to
+    AuditLogArchive, so every entry in the archive is older than every entry here.
+    get_entries relies on this to read the archive only once this table runs out of
+    matching entries.
+    """
+
+    __tablename__ = "audit_log"
+
+    id = Column(Integer, primary_key=True)
+
     @staticmethod
     def log(
         session,
@@ -66,10 +132,15 @@ class AuditLog(Model):
         on_group_id=None,
         on_permission_id=None,
         category=AuditLogCategory.general,
+        commit=True,
     ):
         """
         Log an event in the database.
 
+        The entry is inserted, along with any others logged in the same transaction, when the
+        transaction commits.  By default this method commits the session to do that; callers that
+        log several entries should pass commit=False and commit once.
+
         Args:
             session(Session): database session
             actor_id(int): actor
@@ -79,6 +150,7 @@ class AuditLog(Model):
             on_group_id(int): group affected, if any
             on_permission_id(int): permission affected, if any
             category(AuditLogCategory): category of log entry
+            commit(bool): whether to commit the session, rather than leaving that to the caller
         """
         entry = AuditLog(
             actor_id=actor_id,
@@ -90,15 +162,13 @@ class AuditLog(Model):
             on_permission_id=on_permission_id if on_permission_id else None,
             category=int(category),
         )
-        try:
-            entry.add(session)
-            session.flush()
-        except IntegrityError:
-            session.rollback()
-            raise AuditLogFailure()
-        session.commit()
-
-        get_plugin_proxy().log_auditlog_entry(entry)
+        queue_audit_log_entry(session, entry, get_plugin_proxy())
+        if commit:
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                raise AuditLogFailure()
 
     @staticmethod
     def get_entries(
@@ -112,38 +182,104 @@ class AuditLog(Model):
         involve_user_id=None,
         category=None,
         action=None,
+        before=None,
     ):
         """
         Flexible method for getting log entries. By default it returns all entries
         starting at the newest. Most recent first.
 
         involve_user_id, if set, is (actor_id OR on_user_id).
+
+        before, if set, is the (log_time, id) of an entry, and only entries older than it are
+        returned.  Passing the last entry of one page as before returns the next page without
+        the database having to skip over the earlier pages as it would with offset.
+
+        Entries that have been archived are returned as AuditLogArchive objects.  The archive is
+        only queried if this table doesn't have enough matching entries to fill the page.
         """
+        filters = {
+            "actor_id": actor_id,
+            "on_user_id": on_user_id,
+            "on_group_id": on_group_id,
+            "on_permission_id": on_permission_id,
+            "involve_user_id": involve_user_id,
+            "category": category,
+            "action": action,
+            "before": before,
+        }
+        write_pending_entries(session)
+        results = _get_entries(session, AuditLog, filters, limit, offset)
+        if limit and len(results) >= limit:
+            return results
+
+        # The page runs past the end of this table.  If it starts there too, skip the rest of the
+        # offset in the archive.
+        archive_offset = None
+        if offset and not results:
+            archive_offset = offset - _get_entries(session, AuditLog, filters, count=True)
+        archive_limit = limit - len(results) if limit else None
+        return results + _get_entries(
+            session, AuditLogArchive, filters, archive_limit, archive_offset
+        )
+
+
+class AuditLogArchive(AuditLogColumns, Model):
+    """Audit log entries moved out of audit_log by archive_audit_log, keeping their IDs."""
+
+    __tablename__ = "audit_log_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+
+
+def _get_entries(session, model, filters, limit=None, offset=None, count=False):
+    """Query either AuditLog or AuditLogArchive for AuditLog.get_entries.
+
+    If count is true, return the number of matching entries instead of the entries.
+    """
+    conditions = []
+    for column in ("actor_id", "on_user_id", "on_group_id", "on_permission_id", "action"):
+        if filters[column]:
+            conditions.append(getattr(model, column) == filters[column])
+    if filters["category"]:
+        conditions.append(model.category == int(filters["category"]))
+    if filters["before"]:
+        log_time, entry_id = filters["before"]
+        conditions.append(
+            or_(model.log_time < log_time, and_(model.log_time == log_time, model.id < entry_id))
+        )
+
+    order = (desc(model.log_time), desc(model.id))
+    results = session.query(model).filter(*conditions)
+
+    # An OR across two columns can't use either index, so find the matching IDs through each
+    # index separately and combine them.  When a limit is given, each half only needs to
+    # return enough entries to fill the requested page.
+    involve_user_id = filters["involve_user_id"]
+    if involve_user_id:
+        halves = []
+        for column in (model.actor_id, model.on_user_id):
+            half = select([model.id]).where(and_(column == involve_user_id, *conditions))
+            if limit:
+                half = half.order_by(*order).limit(limit + (offset or 0))
+            halves.append(select([half.alias().c.id]))
+        results = results.filter(model.id.in_(union(*halves)))
+
+    if count:
+        return results.with_entities(func.count(model.id)).scalar()
+
+    # Pages show the actor and target of each entry, so load them in the same query rather than
+    # lazily one entry at a time.
+    results = results.options(
+        joinedload(model.actor),
+        joinedload(model.on_user),
+        joinedload(model.on_group),
+        joinedload(model.on_permission),
+    )
+    results = results.order_by(*order)
+
+    if offset:
+        results = results.offset(offset)
+    if limit:
+        results = results.limit(limit)
 
-        results = session.query(AuditLog)
-
-        if actor_id:
-            results = results.filter(AuditLog.actor_id == actor_id)
-        if on_user_id:
-            results = results.filter(AuditLog.on_user_id == on_user_id)
-        if on_group_id:
-            results = results.filter(AuditLog.on_group_id == on_group_id)
-        if on_permission_id:
-            results = results.filter(AuditLog.on_permission_id == on_permission_id)
-        if involve_user_id:
-            results = results.filter(
-                or_(AuditLog.on_user_id == involve_user_id, AuditLog.actor_id == involve_user_id)
-            )
-        if category:
-            results = results.filter(AuditLog.category == int(category))
-        if action:
-            results = results.filter(AuditLog.action == action)
-
-        results = results.order_by(desc(AuditLog.log_time))
-
-        if offset:
-            results = results.offset(offset)
-        if limit:
-            results = results.limit(limit)
-
-        return results.all()
+    return results.all()
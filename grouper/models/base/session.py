@@ -5,15 +5,17 @@ from threading import Lock
 from typing import TYPE_CHECKING
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import ArgumentError, OperationalError
 from sqlalchemy.orm import Session as _Session, sessionmaker
 
+from grouper.query_stats import instrument_engine, pool_name, timed_pool_class
 from grouper.settings import InvalidSettingsError
 from grouper.util import singleton
 
 if TYPE_CHECKING:
     from sqlalchemy.engine import Engine
-    from typing import Dict
+    from typing import Any, Dict
 
 
 def flush_transaction(method):
@@ -36,16 +38,24 @@ def flush_transaction(method):
     return wrapper
 
 
-def get_db_engine(url):
-    # type: (str) -> Engine
+def get_db_engine(url, instrument=False):
+    # type: (str, bool) -> Engine
+    """Create an engine for url, optionally recording its statistics in grouper.query_stats."""
+    kwargs = {"pool_recycle": 300}  # type: Dict[str, Any]
     try:
+        if instrument:
+            sa_url = make_url(url)
+            pool_class = sa_url.get_dialect().get_pool_class(sa_url)
+            kwargs["poolclass"] = timed_pool_class(pool_class, pool_name(sa_url))
         if "sqlite:" in url.lower():
-            engine = create_engine(url, pool_recycle=300)
+            engine = create_engine(url, **kwargs)
         else:
-            engine = create_engine(url, max_overflow=25, pool_recycle=300)
+            engine = create_engine(url, max_overflow=25, **kwargs)
     except (ArgumentError, OperationalError):
         logging.exception("Can't create database engine.")
         raise InvalidSettingsError("Invalid arguments. Can't create database engine")
+    if instrument:
+        instrument_engine(engine)
     return engine
 
 
@@ -84,8 +94,9 @@ class _DbEngineManager:
     connection string. This manager provides a single database engine object per connection
     that can be accessed and re-used anywhere in the application throughout application lifecycle.
 
-    Currently it is only used in `SessionFactory` but eventually all usages of `get_db_engine` will
-    migrate to this manager.
+    Engines created by the manager are instrumented to record query and connection pool
+    statistics; see grouper.query_stats.  The servers and `SessionFactory` get their engines here,
+    but eventually all usages of `get_db_engine` will migrate to this manager.
 
      Attributes:
         None
@@ -101,7 +112,7 @@ class _DbEngineManager:
         if url not in self._engine_holder:
             with self._lock:
                 if url not in self._engine_holder:
-                    self._engine_holder[url] = get_db_engine(url)
+                    self._engine_holder[url] = get_db_engine(url, instrument=True)
                     assert self._engine_holder[url] is not None
 
                     logging.info(
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Column, DateTime, event, func, Integer
+
+from grouper.models.base.model_base import Model
+from grouper.models.base.session import SessionWithoutAdd
+from grouper.models.counter import Counter
+
+if TYPE_CHECKING:
+    from grouper.models.base.session import Session
+    from typing import Any, Tuple
+
+# Name of the counter holding the updates that have been compacted out of checkpoint_updates.
+UPDATES_COUNTER = "updates"
+
+# Key in Session.info set when the session's transaction advances the checkpoint.
+_CHECKPOINT_ADVANCED = "grouper.checkpoint_update.advanced"
+
+
+class CheckpointUpdate(Model):
+    """A change to Grouper data, which advances the checkpoint.
+
+    The checkpoint is the number of changes ever made.  Rather than incrementing a single counter
+    row, which would serialize every transaction that changes anything on that row's lock, each
+    change inserts a row here.  The checkpoint is the number of rows plus the count of the updates
+    counter, into which compact_checkpoint_updates periodically folds old rows to keep this table
+    small.
+
+    The number of rows is used rather than the largest ID because IDs are allocated when a row is
+    inserted but become visible when its transaction commits, which may not happen in the same
+    order.  Every commit adds rows, so the count seen by readers increases with each commit.
+    """
+
+    __tablename__ = "checkpoint_updates"
+
+    id = Column(Integer, primary_key=True)
+    time = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def record(cls, session):
+        # type: (Session) -> None
+        """Advance the checkpoint when the session's transaction commits."""
+        cls().add(session)
+        session.flush()
+        session.info[_CHECKPOINT_ADVANCED] = True
+
+
+def checkpoint_advanced(session):
+    # type: (Session) -> bool
+    """Return whether the transaction that session just committed advanced the checkpoint.
+
+    Meant to be called from an after_commit listener.  Each commit is only reported once.
+    """
+    return session.info.pop(_CHECKPOINT_ADVANCED, False)
+
+
+def _discard_checkpoint_advanced(session, transaction):
+    # type: (Session, Any) -> None
+    if transaction.parent is None:
+        session.info.pop(_CHECKPOINT_ADVANCED, None)
+
+
+event.listen(SessionWithoutAdd, "after_transaction_end", _discard_checkpoint_advanced)
+
+
+def get_checkpoint(session):
+    # type: (Session) -> Tuple[int, int]
+    """Return the checkpoint and the time it started counting, as seconds since the epoch.
+
+    Both tables are read in one statement so that a concurrent compaction cannot be seen half done.
+    The time is that of the first update and intentionally does not change as the checkpoint
+    advances (see CheckpointRepository.update_checkpoint).
+    """
+    counter = session.query(Counter).filter(Counter.name == UPDATES_COUNTER)
+    compacted = counter.with_entities(Counter.count).as_scalar()
+    started = counter.with_entities(Counter.last_modified).as_scalar()
+    count, compacted_count, started_at, first_update = session.query(
+        func.count(CheckpointUpdate.id), compacted, started, func.min(CheckpointUpdate.time)
+    ).one()
+    started_at = started_at or first_update
+    if started_at is None:
+        return 0, 0
+    return count + (compacted_count or 0), int(started_at.strftime("%s"))
+
+
+def compact_checkpoint_updates(session):
+    # type: (Session) -> int
+    """Fold the rows of checkpoint_updates into the updates counter without changing the checkpoint.
+
+    The caller must commit the session, which releases the lock taken on the counter row.
+
+    Returns:
+        The number of rows removed.
+    """
+    counter = (
+        session.query(Counter).filter(Counter.name == UPDATES_COUNTER).with_for_update().scalar()
+    )
+    if not counter:
+        first_update = session.query(func.min(CheckpointUpdate.time)).scalar()
+        if first_update is None:
+            return 0
+        counter = Counter(name=UPDATES_COUNTER, count=0, last_modified=first_update)
+        counter.add(session)
+        session.flush()
+
+    last_id = session.query(func.max(CheckpointUpdate.id)).scalar()
+    if last_id is None:
+        return 0
+    removed = (
+        session.query(CheckpointUpdate)
+        .filter(CheckpointUpdate.id <= last_id)
+        .delete(synchronize_session=False)
+    )
+    counter.count = Counter.count + removed
+    return removed
@@ -20,8 +20,8 @@ from grouper.models.audit_log import AuditLog
 from grouper.models.base.constants import OBJ_TYPES_IDX
 from grouper.models.base.model_base import Model
 from grouper.models.base.session import flush_transaction
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.comment import CommentObjectMixin
-from grouper.models.counter import Counter
 from grouper.models.group_edge import GroupEdge
 from grouper.models.permission import Permission
 from grouper.models.permission_map import PermissionMap
@@ -335,11 +335,11 @@ class Group(Model, CommentObjectMixin):
 
     def enable(self) -> None:
         self.enabled = True
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
 
     def disable(self) -> None:
         self.enabled = False
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
 
     @staticmethod
     def get(
@@ -353,7 +353,7 @@ class Group(Model, CommentObjectMixin):
 
     def add(self, session: Session) -> Group:
         super().add(session)
-        Counter.incr(session, "updates")
+        CheckpointUpdate.record(session)
         return self
 
     def __repr__(self) -> str:
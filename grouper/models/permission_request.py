@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from grouper.constants import MAX_ARGUMENT_LENGTH
@@ -14,6 +14,10 @@ class PermissionRequest(Model):
     """Represent request for a permission/argument to be granted to a particular group."""
 
     __tablename__ = "permission_requests"
+    __table_args__ = (
+        Index("permission_requests_status_requested_at", "status", "requested_at"),
+        Index("permission_requests_requester_requested_at", "requester_id", "requested_at"),
+    )
 
     id = Column(Integer, primary_key=True)
 
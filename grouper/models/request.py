@@ -7,8 +7,8 @@ from sqlalchemy.sql import label
 from grouper.models.base.constants import OBJ_TYPES_IDX, REQUEST_STATUS_CHOICES
 from grouper.models.base.model_base import Model
 from grouper.models.base.session import flush_transaction
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.comment import Comment, CommentObjectMixin
-from grouper.models.counter import Counter
 from grouper.models.group_edge import GroupEdge
 from grouper.models.json_encoded_type import JsonEncodedType
 from grouper.models.request_status_change import RequestStatusChange
@@ -97,4 +97,4 @@ class Request(Model, CommentObjectMixin):
             edge = self.session.query(GroupEdge).filter_by(id=self.edge_id).one()
             edge.apply_changes(self.changes)
 
-        Counter.incr(self.session, "updates")
+        CheckpointUpdate.record(self.session)
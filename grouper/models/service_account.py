@@ -4,7 +4,7 @@ from sqlalchemy import Column, ForeignKey, Integer, Text
 from sqlalchemy.orm import backref, relationship
 
 from grouper.models.base.model_base import Model
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.user import User
 
 if TYPE_CHECKING:
@@ -60,5 +60,5 @@ class ServiceAccount(Model):
     def add(self, session):
         # type: (Session) -> ServiceAccount
         super().add(session)
-        Counter.incr(session, "updates")
+        CheckpointUpdate.record(session)
         return self
@@ -5,8 +5,8 @@ from sqlalchemy.ext.hybrid import hybrid_property
 
 from grouper.constants import MAX_NAME_LENGTH
 from grouper.models.base.model_base import Model
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.comment import CommentObjectMixin
-from grouper.models.counter import Counter
 from grouper.plugin import get_plugin_proxy
 
 if TYPE_CHECKING:
@@ -58,7 +58,7 @@ class User(Model, CommentObjectMixin):
     def add(self, session):
         # type: (Session) -> User
         super().add(session)
-        Counter.incr(session, "updates")
+        CheckpointUpdate.record(session)
         return self
 
     def is_member(self, members):
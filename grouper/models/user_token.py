@@ -15,6 +15,13 @@ def _make_secret():
     return os.urandom(20).hex()
 
 
+def secret_matches(hashed_secret, secret):
+    # type: (str, str) -> bool
+    """Check a token secret against the stored hash of the secret in constant time."""
+    hashed = hashlib.sha256(secret.encode()).hexdigest().encode()
+    return hmac.compare_digest(hashed_secret.encode(), hashed)
+
+
 class UserToken(Model):
     """Simple bearer tokens used by third parties to verify user identity"""
 
@@ -73,9 +80,7 @@ class UserToken(Model):
         # type: (str) -> bool
         if not self.enabled:
             return False
-        stored_secret = self.hashed_secret.encode()
-        hashed_secret = hashlib.sha256(secret.encode()).hexdigest().encode()
-        return hmac.compare_digest(stored_secret, hashed_secret)
+        return secret_matches(self.hashed_secret, secret)
 
     @property
     def enabled(self):
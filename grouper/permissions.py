@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import cast, TYPE_CHECKING
 
-from sqlalchemy import asc
+from sqlalchemy import and_, asc, false, or_
 from sqlalchemy.exc import IntegrityError
 
 from grouper.audit import assert_controllers_are_auditors
@@ -14,8 +14,8 @@ from grouper.constants import ARGUMENT_VALIDATION, PERMISSION_ADMIN, PERMISSION_
 from grouper.email_util import EmailTemplateEngine, send_email
 from grouper.models.audit_log import AuditLog
 from grouper.models.base.constants import OBJ_TYPES_IDX
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.comment import Comment
-from grouper.models.counter import Counter
 from grouper.models.group import Group
 from grouper.models.permission import Permission
 from grouper.models.permission_map import PermissionMap
@@ -31,6 +31,7 @@ if TYPE_CHECKING:
     from grouper.models.base.session import Session
     from grouper.models.service_account import ServiceAccount
     from grouper.models.user import User
+    from sqlalchemy.sql.elements import ColumnElement
     from typing import Any, Dict, List, Optional, Set, Tuple
 
 # Singleton
@@ -118,7 +119,7 @@ def grant_permission(
     mapping = PermissionMap(permission_id=permission_id, group_id=group_id, argument=argument)
     mapping.add(session)
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     session.commit()
 
@@ -146,7 +147,7 @@ def grant_permission_to_service_account(
     )
     mapping.add(session)
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     session.commit()
 
@@ -173,7 +174,7 @@ def enable_permission_auditing(session: Session, permission_name: str, actor_use
         on_permission_id=permission.id,
     )
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     session.commit()
 
@@ -202,7 +203,7 @@ def disable_permission_auditing(
         on_permission_id=permission.id,
     )
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     session.commit()
 
@@ -263,7 +264,7 @@ def filter_grantable_permissions(
 
 
 def get_owners_by_grantable_permission(
-    session: Session, separate_global: bool = False
+    session: Session, separate_global: bool = False, group_ids: Optional[Set[int]] = None
 ) -> Dict[object, Dict[str, List[Group]]]:
     """Returns all known permission arguments with owners.
 
@@ -273,6 +274,8 @@ def get_owners_by_grantable_permission(
     Args:
         session: Database session
         separate_global: Whether to construct a specific entry for GLOBAL_OWNER in the output map
+        group_ids: If given, only include these groups as owners, which avoids loading the grants
+            of every group when only the permissions a user can grant are needed
 
     Returns:
         A map of permission to argument to owners of the form:
@@ -280,18 +283,20 @@ def get_owners_by_grantable_permission(
         where owners are Group objects.  argument can be '*' which means anything.
     """
     all_permissions = {permission.name: permission for permission in get_all_permissions(session)}
-    all_groups = session.query(Group).filter(Group.enabled == True).all()
+    groups_query = session.query(Group).filter(Group.enabled == True)
+    group_permissions_query = session.query(
+        Permission.name, PermissionMap.argument, PermissionMap.granted_on, Group
+    ).filter(PermissionMap.group_id == Group.id, Permission.id == PermissionMap.permission_id)
+    if group_ids is not None:
+        groups_query = groups_query.filter(Group.id.in_(group_ids))
+        group_permissions_query = group_permissions_query.filter(Group.id.in_(group_ids))
+    all_groups = groups_query.all()
+    all_group_permissions = group_permissions_query.all()
 
     owners_by_arg_by_perm: Dict[object, Dict[str, List[Group]]] = defaultdict(
         lambda: defaultdict(list)
     )
 
-    all_group_permissions = (
-        session.query(Permission.name, PermissionMap.argument, PermissionMap.granted_on, Group)
-        .filter(PermissionMap.group_id == Group.id, Permission.id == PermissionMap.permission_id)
-        .all()
-    )
-
     grants_by_group: Dict[str, List[Any]] = defaultdict(list)
 
     for grant in all_group_permissions:
@@ -327,6 +332,8 @@ def get_owners_by_grantable_permission(
     for res in get_plugin_proxy().get_owner_by_arg_by_perm(session):
         for permission_name, owners_by_arg in res.items():
             for arg, owners in owners_by_arg.items():
+                if group_ids is not None:
+                    owners = [o for o in owners if o.id in group_ids]
                 owners_by_arg_by_perm[permission_name][arg] += owners
 
     return owners_by_arg_by_perm
@@ -581,10 +588,73 @@ def can_approve_request(
     return bool(group_ids.intersection([o.id for o, arg in owner_arg_list]))
 
 
+def _glob_to_like(glob: str) -> Optional[str]:
+    """Translate a glob as understood by matches_glob to a LIKE pattern with \\ as escape character.
+
+    Returns None if the glob uses a character class, which LIKE cannot express.
+    """
+    if "*" not in glob:
+        return glob.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    if "[" in glob:
+        return None
+    pattern = []
+    for char in glob:
+        if char == "*":
+            pattern.append("%")
+        elif char == "?":
+            pattern.append("_")
+        elif char in ("\\", "%", "_"):
+            pattern.append("\\" + char)
+        else:
+            pattern.append(char)
+    return "".join(pattern)
+
+
+def _approvable_requests_filter(
+    owners_by_arg_by_perm: Dict[object, Dict[str, List[Group]]], group_ids: Set[int]
+) -> Optional[ColumnElement]:
+    """Build a SQL condition matching requests that members of the given groups can approve.
+
+    The condition must be applied to a query joining PermissionRequest to Permission.  It follows
+    get_owner_arg_list, matching the request argument against the globs owned by those groups,
+    but the comparison follows the collation of the database and may be case-insensitive, so it
+    can match more requests than can_approve_request accepts.
+
+    Returns:
+        The condition, or None if some owned argument is a glob that cannot be matched in SQL
+    """
+    whole_permissions = []
+    conditions = []
+    for permission_name, owners_by_arg in owners_by_arg_by_perm.items():
+        if permission_name is GLOBAL_OWNERS:
+            continue
+        args = [
+            arg
+            for arg, owners in owners_by_arg.items()
+            if any(owner.id in group_ids for owner in owners)
+        ]
+        if not args:
+            continue
+        if "*" in args:
+            whole_permissions.append(permission_name)
+            continue
+        arg_conditions = []
+        for arg in args:
+            pattern = _glob_to_like(arg)
+            if pattern is None:
+                return None
+            arg_conditions.append(PermissionRequest.argument.like(pattern, escape="\\"))
+        conditions.append(and_(Permission.name == permission_name, or_(*arg_conditions)))
+
+    if whole_permissions:
+        conditions.append(Permission.name.in_(whole_permissions))
+    return or_(*conditions) if conditions else false()
+
+
 def get_requests(
     session: Session,
     status: str,
-    limit: int,
+    limit: Optional[int],
     offset: int,
     owner: Optional[User] = None,
     requester: Optional[User] = None,
@@ -592,10 +662,16 @@ def get_requests(
 ) -> Tuple[Requests, int]:
     """Load requests using the given filters.
 
+    The status and requester filters are applied in the database along with the limit and offset.
+    When filtering by owner, the database narrows the requests down to those whose argument may
+    match a glob owned by the owner's groups, and each candidate is then checked with
+    can_approve_request, so the cost depends on the number of candidate requests rather than on
+    every request ever made.
+
     Args:
         session: Database session
         status: If not None, filter by particular status
-        limit: how many results to return
+        limit: how many results to return, or None for all of them
         offset: the offset into the result set that should be applied
         owner: If not None, filter by requests that the owner can action
         requester: If not None, filter by requests that the requester made
@@ -608,23 +684,30 @@ def get_requests(
         2-tuple of (Requests, total) where total is total result size and Requests is the
         data transfer object with requests and associated comments/changes.
     """
-    # get all requests
-    all_requests = session.query(PermissionRequest)
+    query = session.query(PermissionRequest)
     if status:
-        all_requests = all_requests.filter(PermissionRequest.status == status)
+        query = query.filter(PermissionRequest.status == status)
     if requester:
-        all_requests = all_requests.filter(PermissionRequest.requester_id == requester.id)
-
-    all_requests = all_requests.order_by(PermissionRequest.requested_at.desc()).all()
-
-    if owners_by_arg_by_perm is None:
-        owners_by_arg_by_perm = get_owners_by_grantable_permission(session)
+        query = query.filter(PermissionRequest.requester_id == requester.id)
+    query = query.order_by(PermissionRequest.requested_at.desc(), PermissionRequest.id.desc())
 
     if owner:
+        # Only the grants of the owner's groups matter, so don't load those of every group.
         group_ids = {g.id for g, _ in get_groups_by_user(session, owner)}
+        if owners_by_arg_by_perm is None:
+            owners_by_arg_by_perm = get_owners_by_grantable_permission(
+                session, group_ids=group_ids
+            )
+        # LIKE follows the collation of the database and is usually case-insensitive, whereas
+        # can_approve_request is not, so the SQL condition only narrows down the candidates and
+        # each of them is then checked in Python.
+        approvable = _approvable_requests_filter(owners_by_arg_by_perm, group_ids)
+        if approvable is not None:
+            query = query.join(Permission, Permission.id == PermissionRequest.permission_id)
+            query = query.filter(approvable)
         requests = [
             request
-            for request in all_requests
+            for request in query.all()
             if can_approve_request(
                 session,
                 request,
@@ -633,12 +716,20 @@ def get_requests(
                 owners_by_arg_by_perm=owners_by_arg_by_perm,
             )
         ]
-    else:
-        requests = all_requests
+        end = None if limit is None else offset + limit
+        return (_get_request_changes(session, requests[offset:end]), len(requests))
+
+    total = query.count()
+    if limit == 0:
+        return (_get_request_changes(session, []), total)
+    query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+    return (_get_request_changes(session, query.all()), total)
 
-    total = len(requests)
-    requests = requests[offset:limit]
 
+def _get_request_changes(session: Session, requests: List[PermissionRequest]) -> Requests:
+    """Load the status changes and comments for a list of permission requests."""
     status_change_by_request_id: Dict[int, List[PermissionRequestStatusChange]] = defaultdict(list)
     if not requests:
         comment_by_status_change_id: Dict[int, Comment] = {}
@@ -661,7 +752,7 @@ def get_requests(
         )
         comment_by_status_change_id = {c.obj_pk: c for c in comments}
 
-    return (Requests(requests, status_change_by_request_id, comment_by_status_change_id), total)
+    return Requests(requests, status_change_by_request_id, comment_by_status_change_id)
 
 
 def get_request_by_id(session: Session, request_id: int) -> Optional[PermissionRequest]:
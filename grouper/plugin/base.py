@@ -18,7 +18,7 @@ class BasePlugin:
         """Configure the plugin.
 
         Called once the plugin is instantiated to identify the executable (grouper-api, grouper-fe,
-        or grouper-background).
+        grouper-graphd, or grouper-background).
         """
         pass
 
@@ -104,11 +104,34 @@ class BasePlugin:
         # type: (AuditLog) -> None
         """Called when an audit log entry is saved to the database.
 
+        By default, log_auditlog_entries calls this for each entry from a background thread, so
+        the conditions documented there apply.
+
         Args:
             entry: just-saved log object
         """
         pass
 
+    def log_auditlog_entries(self, entries):
+        # type: (List[AuditLog]) -> None
+        """Called with a batch of entries saved to the database.
+
+        Entries are passed after the transaction that logged them commits.  They have their IDs
+        and their actor, on_user, on_group, and on_permission relationships loaded, but are not
+        attached to a session, so relationships of those related objects cannot be loaded.  The
+        default implementation calls log_auditlog_entry for each entry.
+
+        This is called from a background thread rather than the thread that logged the entries,
+        so implementations must be thread-safe and must not use the database session or request
+        of the code that logged them.  Calls are made one at a time, in the order the entries were
+        committed.
+
+        Args:
+            entries: just-saved log objects
+        """
+        for entry in entries:
+            self.log_auditlog_entry(entry)
+
     def log_background_run(self, success):
         # type: (bool) -> None
         """Log a background processor run
@@ -168,6 +191,20 @@ class BasePlugin:
         """
         pass
 
+    def log_slow_query(self, statement, duration_ms, handler, usecase):
+        # type: (str, int, Optional[str], Optional[str]) -> None
+        """Log a database statement that took longer than the slow query threshold
+
+        Called from the thread that ran the statement, so this should return quickly.
+
+        Arg(s):
+            statement: the statement, with lists of bind parameters collapsed
+            duration_ms: how long the statement took to run
+            handler: name of the handler or thread that ran the statement, if known
+            usecase: name of the use case that ran the statement, if any
+        """
+        pass
+
     def user_created(self, user, is_service_account=False):
         # type: (User, bool) -> None
         """Called when a new user is created
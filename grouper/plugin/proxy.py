@@ -91,6 +91,11 @@ class PluginProxy:
         for plugin in self._plugins:
             plugin.log_auditlog_entry(entry)
 
+    def log_auditlog_entries(self, entries):
+        # type: (List[AuditLog]) -> None
+        for plugin in self._plugins:
+            plugin.log_auditlog_entries(entries)
+
     def log_background_run(self, success):
         # type: (bool) -> None
         for plugin in self._plugins:
@@ -123,6 +128,11 @@ class PluginProxy:
         for plugin in self._plugins:
             plugin.log_request(handler, status, duration_ms, request)
 
+    def log_slow_query(self, statement, duration_ms, handler, usecase):
+        # type: (str, int, Optional[str], Optional[str]) -> None
+        for plugin in self._plugins:
+            plugin.log_slow_query(statement, duration_ms, handler, usecase)
+
     def user_created(self, user, is_service_account=False):
         # type: (User, bool) -> None
         for plugin in self._plugins:
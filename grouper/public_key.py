@@ -4,7 +4,7 @@ import binascii
 import sshpubkeys
 from sqlalchemy.exc import IntegrityError
 
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.public_key import PublicKey
 from grouper.plugin import get_plugin_proxy
 from grouper.plugin.exceptions import PluginRejectedPublicKey
@@ -106,13 +106,13 @@ def add_public_key(session, user, public_key_str):
         fingerprint=pubkey.hash_md5().replace("MD5:", ""),
         fingerprint_sha256=pubkey.hash_sha256().replace("SHA256:", ""),
         key_size=pubkey.bits,
-        key_type=pubkey.key_type,
+        key_type=pubkey.key_type.decode(),
         comment=pubkey.comment,
     )
 
     try:
         db_pubkey.add(session)
-        Counter.incr(session, "updates")
+        CheckpointUpdate.record(session)
     except IntegrityError:
         session.rollback()
         raise DuplicateKey()
@@ -135,7 +135,7 @@ def delete_public_key(session, user_id, key_id):
     """
     pkey = get_public_key(session, user_id, key_id)
     pkey.delete(session)
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
 
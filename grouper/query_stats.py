@@ -0,0 +1,303 @@
+"""Database query and connection pool statistics for the /debug/stats endpoint.
+
+Engines created by DbEngineManager are instrumented with SQLAlchemy events.  Every statement is
+counted, and its latency recorded, under a fingerprint that collapses whitespace and lists of bind
+parameters so that statements differing only in the number of values in an IN clause are counted
+together.  Each connection pool records how long callers waited to check out a connection and how
+often it was already at capacity.
+
+Statements that take longer than the slow query threshold are logged, together with the handler
+and use case that ran them, kept for the stats endpoint, and passed to the callback set with
+configure_query_stats, which the servers use to pass them to plugins.  Handlers name
+themselves as the caller with set_query_caller, and code running queries on behalf of a handler in
+another thread uses query_caller.  The use case is found by walking the stack of the slow query.
+"""
+
+import logging
+import re
+import sys
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from hashlib import sha1
+from threading import local, Lock
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+
+from grouper.stats import LatencyHistogram
+from grouper.util import singleton
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+    from sqlalchemy.engine.url import URL
+    from sqlalchemy.engine.interfaces import ExceptionContext
+    from sqlalchemy.pool import Pool
+    from typing import Any, Callable, Deque, Dict, Iterator, Optional, Type
+
+    SlowQueryCallback = Callable[[str, int, Optional[str], Optional[str]], None]
+
+# Maximum number of distinct fingerprints tracked.  Further statements are counted together under
+# OTHER_STATEMENTS so that unexpected dynamic SQL cannot grow memory without bound.
+MAX_FINGERPRINTS = 500
+OTHER_STATEMENTS = "(other)"
+
+# Number of recent slow queries kept for the stats endpoint.
+MAX_SLOW_QUERIES = 50
+
+# Matches a parenthesized list of two or more bind parameters in any DB-API paramstyle.
+_PARAM = r"\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*"
+_PARAM_LIST_RE = re.compile(r"\((?:{p},)+{p}\)".format(p=_PARAM))
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_caller = local()
+
+
+def set_query_caller(name):
+    # type: (Optional[str]) -> None
+    """Attribute queries made by the current thread from now on to name."""
+    _caller.name = name
+
+
+@contextmanager
+def query_caller(name):
+    # type: (str) -> Iterator[None]
+    """Attribute queries made by the current thread to name within the context."""
+    previous = getattr(_caller, "name", None)
+    _caller.name = name
+    try:
+        yield
+    finally:
+        _caller.name = previous
+
+
+def fingerprint(statement):
+    # type: (str) -> str
+    """Normalize a statement so that executions differing only in bind parameters match."""
+    statement = _WHITESPACE_RE.sub(" ", statement).strip()
+    return _PARAM_LIST_RE.sub("(?)", statement)
+
+
+def fingerprint_id(fingerprint):
+    # type: (str) -> str
+    """Short, stable identifier for a fingerprint, usable as a metric label."""
+    return sha1(fingerprint.encode()).hexdigest()[:12]
+
+
+def _current_usecase():
+    # type: () -> Optional[str]
+    """Return the name of the outermost use case on the stack, if any."""
+    usecase = None
+    frame = sys._getframe(1)
+    while frame:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("grouper.usecases.") and not module.endswith(".factory"):
+            if "self" in frame.f_locals:
+                usecase = type(frame.f_locals["self"]).__name__
+        frame = frame.f_back
+    return usecase
+
+
+class StatementStats:
+    """Execution count and latency histogram for one statement fingerprint."""
+
+    def __init__(self):
+        # type: () -> None
+        self.latency = LatencyHistogram()
+
+
+class PoolStats:
+    """Checkout statistics for one connection pool.
+
+    capacity is the most connections the pool will open, or 0 if it is unbounded.
+    """
+
+    def __init__(self, capacity):
+        # type: (int) -> None
+        self.capacity = capacity
+        self.checked_out = 0
+        self.saturated = 0
+        self.checkout_wait = LatencyHistogram()
+
+
+class SlowQuery:
+    """A statement that took longer than the slow query threshold."""
+
+    def __init__(self, statement, duration, handler, usecase):
+        # type: (str, float, Optional[str], Optional[str]) -> None
+        self.time = datetime.utcnow()
+        self.statement = statement
+        self.duration = duration
+        self.handler = handler
+        self.usecase = usecase
+
+
+class QueryStats:
+    """Statistics for all instrumented engines in this process.
+
+    Queries run in many threads, so all updates are made while holding lock, which readers should
+    also hold while copying out the statistics.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.slow_query_threshold = 1.0
+        self.log_slow_query = None  # type: Optional[SlowQueryCallback]
+        self.statements = defaultdict(StatementStats)  # type: Dict[str, StatementStats]
+        self.pools = {}  # type: Dict[str, PoolStats]
+        self.slow_queries = deque(maxlen=MAX_SLOW_QUERIES)  # type: Deque[SlowQuery]
+        self.slow_query_count = 0
+        self._fingerprints = {}  # type: Dict[str, str]
+        self.lock = Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def record_statement(self, statement, duration):
+        # type: (str, float) -> None
+        key = self._fingerprints.get(statement)
+        if key is None:
+            key = fingerprint(statement)
+            with self.lock:
+                if key not in self.statements and len(self.statements) >= MAX_FINGERPRINTS:
+                    key = OTHER_STATEMENTS
+                if len(self._fingerprints) < MAX_FINGERPRINTS * 4:
+                    self._fingerprints[statement] = key
+        with self.lock:
+            self.statements[key].latency.observe(duration)
+        if self.slow_query_threshold and duration >= self.slow_query_threshold:
+            if key == OTHER_STATEMENTS:
+                key = fingerprint(statement)
+            self._record_slow_query(key, duration)
+
+    def record_checkout(self, pool, change):
+        # type: (str, int) -> None
+        with self.lock:
+            self.pools[pool].checked_out += change
+
+    def record_checkout_wait(self, pool, wait, saturated):
+        # type: (str, float, bool) -> None
+        with self.lock:
+            stats = self.pools[pool]
+            stats.checkout_wait.observe(wait)
+            if saturated:
+                stats.saturated += 1
+
+    def _record_slow_query(self, statement, duration):
+        # type: (str, float) -> None
+        slow_query = SlowQuery(
+            statement, duration, getattr(_caller, "name", None), _current_usecase()
+        )
+        with self.lock:
+            self.slow_queries.append(slow_query)
+            self.slow_query_count += 1
+        duration_ms = int(duration * 1000)
+        self.logger.warning(
+            "Slow query (%dms) from %s in %s: %s",
+            duration_ms,
+            slow_query.handler or "-",
+            slow_query.usecase or "-",
+            statement,
+        )
+        if self.log_slow_query:
+            try:
+                self.log_slow_query(statement, duration_ms, slow_query.handler, slow_query.usecase)
+            except Exception:
+                self.logger.exception("Failed to pass slow query to plugins")
+
+
+@singleton
+def query_stats():
+    # type: () -> QueryStats
+    return QueryStats()
+
+
+def configure_query_stats(slow_query_threshold, log_slow_query):
+    # type: (float, Optional[SlowQueryCallback]) -> None
+    """Set the slow query threshold in seconds and the callback for slow queries."""
+    stats = query_stats()
+    stats.slow_query_threshold = slow_query_threshold
+    stats.log_slow_query = log_slow_query
+
+
+def pool_name(url):
+    # type: (URL) -> str
+    """Name of the pool for url in the statistics, which leaves out any credentials."""
+    return "{}://{}/{}".format(url.drivername, url.host or "", url.database or "")
+
+
+def timed_pool_class(pool_class, name):
+    # type: (Type[Pool], str) -> Type[Pool]
+    """Return a subclass of pool_class that times connection checkouts for the pool named name.
+
+    Engines check out connections with both connect and unique_connection, so both are timed.
+    Checkouts are only recorded once instrument_engine has been called for the engine.
+    """
+
+    def timed(checkout):
+        # type: (Callable[[Pool], Any]) -> Callable[[Pool], Any]
+        def timed_checkout(self):
+            # type: (Pool) -> Any
+            pool_stats = query_stats().pools.get(name)
+            if not pool_stats:
+                return checkout(self)
+            checked_out = getattr(self, "checkedout", None)
+            saturated = bool(pool_stats.capacity and checked_out() >= pool_stats.capacity)
+            start = monotonic()
+            connection = checkout(self)
+            query_stats().record_checkout_wait(name, monotonic() - start, saturated)
+            return connection
+
+        return timed_checkout
+
+    methods = {
+        "connect": timed(pool_class.connect),
+        "unique_connection": timed(pool_class.unique_connection),
+    }
+    return type("Timed" + pool_class.__name__, (pool_class,), methods)
+
+
+def _pool_capacity(pool):
+    # type: (Pool) -> int
+    size = getattr(pool, "size", None)
+    max_overflow = getattr(pool, "_max_overflow", -1)
+    if not size or max_overflow < 0:
+        return 0
+    return size() + max_overflow
+
+
+def instrument_engine(engine):
+    # type: (Engine) -> None
+    """Record statement and connection pool statistics for engine in query_stats()."""
+    stats = query_stats()
+    name = pool_name(engine.url)
+    with stats.lock:
+        stats.pools[name] = PoolStats(_pool_capacity(engine.pool))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # type: (Connection, Any, str, Any, Any, bool) -> None
+        conn.info.setdefault("grouper_query_start", []).append(monotonic())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # type: (Connection, Any, str, Any, Any, bool) -> None
+        start = conn.info["grouper_query_start"].pop()
+        stats.record_statement(statement, monotonic() - start)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # type: (ExceptionContext) -> None
+        if context.connection is not None and context.cursor is not None:
+            starts = context.connection.info.get("grouper_query_start")
+            if starts:
+                starts.pop()
+
+    @event.listens_for(engine.pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        # type: (Any, Any, Any) -> None
+        stats.record_checkout(name, 1)
+
+    @event.listens_for(engine.pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        # type: (Any, Any) -> None
+        stats.record_checkout(name, -1)
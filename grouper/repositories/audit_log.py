@@ -1,8 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import desc
-
+from grouper.audit_log_writer import queue_audit_log_entry
 from grouper.entities.audit_log_entry import AuditLogEntry
 from grouper.entities.group import GroupNotFoundException
 from grouper.entities.permission import PermissionNotFoundException
@@ -13,10 +12,12 @@ from grouper.models.permission import Permission
 from grouper.models.user import User
 
 if TYPE_CHECKING:
+    from grouper.entities.audit_log_entry import AuditLogCursor
+    from grouper.models.audit_log import AuditLogArchive
     from grouper.models.base.session import Session
     from grouper.plugin.proxy import PluginProxy
     from grouper.usecases.authorization import Authorization
-    from typing import List, Optional
+    from typing import List, Optional, Union
 
 
 class AuditLogRepository:
@@ -27,44 +28,26 @@ class AuditLogRepository:
         self.session = session
         self.plugins = plugins
 
-    def entries_affecting_group(self, group, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_group(self, group, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         group_obj = Group.get(self.session, name=group)
         if not group_obj:
             return []
-        results = (
-            self.session.query(AuditLog)
-            .filter(AuditLog.on_group_id == group_obj.id)
-            .order_by(desc(AuditLog.log_time))
-            .limit(limit)
-        )
-        return [self._to_audit_log_entry(e) for e in results]
+        return self._entries(limit, before, on_group_id=group_obj.id)
 
-    def entries_affecting_permission(self, permission, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_permission(self, permission, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         permission_obj = Permission.get(self.session, name=permission)
         if not permission_obj:
             return []
-        results = (
-            self.session.query(AuditLog)
-            .filter(AuditLog.on_permission_id == permission_obj.id)
-            .order_by(desc(AuditLog.log_time))
-            .limit(limit)
-        )
-        return [self._to_audit_log_entry(e) for e in results]
+        return self._entries(limit, before, on_permission_id=permission_obj.id)
 
-    def entries_affecting_user(self, user, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_user(self, user, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         user_obj = User.get(self.session, name=user)
         if not user_obj:
             return []
-        results = (
-            self.session.query(AuditLog)
-            .filter(AuditLog.on_user_id == user_obj.id)
-            .order_by(desc(AuditLog.log_time))
-            .limit(limit)
-        )
-        return [self._to_audit_log_entry(e) for e in results]
+        return self._entries(limit, before, on_user_id=user_obj.id)
 
     def log(
         self,
@@ -104,12 +87,19 @@ class AuditLogRepository:
             on_permission_id=permission,
             category=int(category),
         )
-        entry.add(self.session)
+        queue_audit_log_entry(self.session, entry, self.plugins)
+
+    def _entries(self, limit, before, **filters):
+        # type: (int, Optional[AuditLogCursor], **int) -> List[AuditLogEntry]
+        """Return up to limit entries matching filters, newest first, older than before if set.
 
-        # This should happen at the service layer, not the repository layer, but the API for the
-        # plugin currently takes a SQL object.  This can move to the service layer once a data
-        # transfer object is defined instead.
-        self.plugins.log_auditlog_entry(entry)
+        Each filter is on a column indexed together with (log_time, id), so the query reads only
+        the entries it returns regardless of how far back the page is.  Archived entries are
+        included once the page runs past the end of the audit_log table.
+        """
+        cursor = (before.date, before.id) if before else None
+        results = AuditLog.get_entries(self.session, limit=limit, before=cursor, **filters)
+        return [self._to_audit_log_entry(e) for e in results]
 
     def _id_for_group(self, group):
         # type: (str) -> int
@@ -133,8 +123,9 @@ class AuditLogRepository:
         return user_obj.id
 
     def _to_audit_log_entry(self, entry):
-        # type: (AuditLog) -> AuditLogEntry
+        # type: (Union[AuditLog, AuditLogArchive]) -> AuditLogEntry
         return AuditLogEntry(
+            id=entry.id,
             date=entry.log_time,
             actor=entry.actor.username,
             action=entry.action,
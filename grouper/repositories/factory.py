@@ -1,3 +1,6 @@
+import logging
+import time
+from contextlib import closing
 from typing import TYPE_CHECKING
 
 from grouper.graph import Graph
@@ -28,7 +31,8 @@ if TYPE_CHECKING:
         UserRepository,
     )
     from grouper.settings import Settings
-    from typing import Optional
+    from sqlalchemy.engine import Engine
+    from typing import Optional, Tuple
 
 
 class SessionFactory:
@@ -44,12 +48,71 @@ class SessionFactory:
         self.settings = settings
         self._db_engine_manager = DbEngineManager()
 
+        # Replica URL and allowed lag, monotonic time, and result of the last replica check.
+        self._replica_check = None  # type: Optional[Tuple[Tuple[str, int], float, bool]]
+
     def create_session(self):
         # type: () -> Session
         db_engine = self._db_engine_manager.get_db_engine(self.settings.database)
         Session.configure(bind=db_engine)
         return Session()
 
+    def create_read_only_session(self):
+        # type: () -> Session
+        """Create a session for queries that can tolerate reading from a replica.
+
+        If database_replica is set, the session is bound to the replica unless its updates counter
+        is more than max_replica_lag behind the primary's or the replica can't be queried, in which
+        case this falls back to create_session.  That check is only repeated every
+        replica_check_interval seconds, so the replica may fall further behind in between.
+        Nothing may be written with this session, and reads that must see a write just made should
+        use create_session instead.
+        """
+        if self.settings.database_replica:
+            replica_engine = self._db_engine_manager.get_db_engine(self.settings.database_replica)
+            if self._replica_is_current(replica_engine):
+                return Session(bind=replica_engine)
+        return self.create_session()
+
+    def _replica_is_current(self, replica_engine):
+        # type: (Engine) -> bool
+        """Whether the replica was within max_replica_lag updates of the primary when last checked.
+
+        The result is reused for replica_check_interval seconds unless the replica settings change.
+        """
+        key = (self.settings.database_replica, self.settings.max_replica_lag)
+        now = time.monotonic()
+        if self._replica_check:
+            checked_key, checked_at, current = self._replica_check
+            if checked_key == key and now - checked_at < self.settings.replica_check_interval:
+                return current
+        current = self._check_replica(replica_engine)
+        self._replica_check = (key, now, current)
+        return current
+
+    def _check_replica(self, replica_engine):
+        # type: (Engine) -> bool
+        """Whether the replica is within max_replica_lag updates of the primary.
+
+        The primary is checked first, so that with no allowed lag the replica is only used once it
+        has every change committed before this call.
+        """
+        primary_engine = self._db_engine_manager.get_db_engine(self.settings.database)
+        with closing(Session(bind=primary_engine)) as session:
+            primary = CheckpointRepository(session).get_checkpoint().checkpoint
+        try:
+            with closing(Session(bind=replica_engine)) as session:
+                replica = CheckpointRepository(session).get_checkpoint().checkpoint
+        except Exception:
+            logging.exception("Cannot query database replica, using the primary")
+            return False
+        if primary - replica > self.settings.max_replica_lag:
+            logging.warning(
+                "Database replica is %d updates behind, using the primary", primary - replica
+            )
+            return False
+        return True
+
 
 class SingletonSessionFactory(SessionFactory):
     """Always returns the database session with which it was initialized.
@@ -67,6 +130,10 @@ class SingletonSessionFactory(SessionFactory):
         # type: () -> Session
         return self.session
 
+    def create_read_only_session(self):
+        # type: () -> Session
+        return self.session
+
 
 class GraphRepositoryFactory(RepositoryFactory):
     """Create repositories, which abstract storage away from the database layer.
@@ -12,14 +12,16 @@ models are added, be sure to also add them to the import list.
 from io import StringIO
 from typing import TYPE_CHECKING
 
+from sqlalchemy import inspect
 from sqlalchemy.schema import CreateIndex, CreateTable
 
 from grouper.models.async_notification import AsyncNotification  # noqa: F401
 from grouper.models.audit import Audit  # noqa: F401
-from grouper.models.audit_log import AuditLog  # noqa: F401
+from grouper.models.audit_log import AuditLog, AuditLogArchive  # noqa: F401
 from grouper.models.audit_member import AuditMember  # noqa: F401
 from grouper.models.base.model_base import Model
 from grouper.models.base.session import get_db_engine
+from grouper.models.checkpoint_update import CheckpointUpdate  # noqa: F401
 from grouper.models.comment import Comment  # noqa: F401
 from grouper.models.counter import Counter  # noqa: F401
 from grouper.models.group import Group  # noqa: F401
@@ -73,3 +75,12 @@ class SchemaRepository:
         # type: () -> None
         db_engine = get_db_engine(self.settings.database)
         Model.metadata.create_all(db_engine)
+
+        # create_all skips tables that already exist, so also create any indexes that were added to
+        # the models after an existing table was created.
+        inspector = inspect(db_engine)
+        for table in Model.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(db_engine)
@@ -16,7 +16,7 @@ from typing import TYPE_CHECKING
 from grouper.entities.permission_grant import ServiceAccountPermissionGrant
 from grouper.group_service_account import add_service_account
 from grouper.models.audit_log import AuditLog
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.permission import Permission
 from grouper.models.service_account import ServiceAccount
 from grouper.models.service_account_permission_map import ServiceAccountPermissionMap
@@ -63,7 +63,7 @@ def edit_service_account(session, actor, service_account, description, machine_s
 
     service_account.description = description
     service_account.machine_set = machine_set
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
     session.commit()
 
@@ -113,7 +113,7 @@ def disable_service_account(session, actor, service_account):
         on_user_id=service_account.user_id,
     )
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
 
@@ -132,7 +132,7 @@ def enable_service_account(session, actor, service_account, owner):
         on_user_id=service_account.user_id,
     )
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
 
@@ -4,7 +4,7 @@ from grouper.usecases.interfaces import AuditLogInterface
 
 if TYPE_CHECKING:
     from datetime import datetime
-    from grouper.entities.audit_log_entry import AuditLogEntry
+    from grouper.entities.audit_log_entry import AuditLogCursor, AuditLogEntry
     from grouper.entities.group_request import GroupRequestStatus, UserGroupRequest
     from grouper.repositories.audit_log import AuditLogRepository
     from grouper.usecases.authorization import Authorization
@@ -23,17 +23,17 @@ class AuditLogService(AuditLogInterface):
         # type: (AuditLogRepository) -> None
         self.audit_log_repository = audit_log_repository
 
-    def entries_affecting_group(self, group, limit):
-        # type: (str, int) -> List[AuditLogEntry]
-        return self.audit_log_repository.entries_affecting_group(group, limit)
+    def entries_affecting_group(self, group, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
+        return self.audit_log_repository.entries_affecting_group(group, limit, before)
 
-    def entries_affecting_permission(self, permission, limit):
-        # type: (str, int) -> List[AuditLogEntry]
-        return self.audit_log_repository.entries_affecting_permission(permission, limit)
+    def entries_affecting_permission(self, permission, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
+        return self.audit_log_repository.entries_affecting_permission(permission, limit, before)
 
-    def entries_affecting_user(self, user, limit):
-        # type: (str, int) -> List[AuditLogEntry]
-        return self.audit_log_repository.entries_affecting_user(user, limit)
+    def entries_affecting_user(self, user, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
+        return self.audit_log_repository.entries_affecting_user(user, limit, before)
 
     def log_create_service_account(self, service, owner, authorization, date=None):
         # type: (str, str, Authorization, Optional[datetime]) -> None
@@ -72,6 +72,7 @@ class Settings:
         # Keep attributes here in the same order as in config/dev.yaml.
         self.auditors_group = ""
         self.database = ""
+        self.database_replica = ""
         self.database_source = ""
         self.date_format = "%Y-%m-%d %I:%M %p"
         self.expiration_notice_days = 7
@@ -79,6 +80,8 @@ class Settings:
         self.http_proxy_host = None  # type: Optional[str]
         self.http_proxy_port = None  # type: Optional[int]
         self.log_format = "%(asctime)-15s\t%(levelname)s\t%(message)s  [%(name)s]"
+        self.max_replica_lag = 0
+        self.replica_check_interval = 5
         self.plugin_dirs = []  # type: List[str]
         self.plugin_module_paths = []  # type: List[str]
         self.restricted_ownership_permissions = []  # type: List[str]
@@ -89,6 +92,7 @@ class Settings:
         self.smtp_password = ""
         self.from_addr = "no-reply@grouper.local"
         self.service_account_email_domain = "svc.localhost"
+        self.slow_query_threshold = 1.0
         self.timezone = "UTC"  # type: ignore[assignment]  # mypy/issues/3004
         self.url = "http://127.0.0.1:8888"
         self.user_auth_header = "X-Grouper-User"
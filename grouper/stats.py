@@ -0,0 +1,154 @@
+"""Request and graph statistics for the /debug/stats endpoint.
+
+GrouperApplication records the status and latency of every request it logs in a RequestStats
+object, which the Stats handler reports alongside the state of the graph and of any response
+caches.  Latencies are kept in fixed-bucket histograms so that recording a request is cheap and
+memory use doesn't grow with traffic.
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+from threading import get_ident, RLock
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional
+
+
+# Upper bounds in seconds of the latency histogram buckets.  Slower requests are counted in a final
+# overflow bucket.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Histogram of request latencies in seconds, using the bounds in LATENCY_BUCKETS."""
+
+    def __init__(self):
+        # type: () -> None
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        # type: (float) -> None
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        # type: (float) -> float
+        """Estimate the q-th quantile, for q between 0 and 1.
+
+        The value is interpolated linearly within the bucket containing the quantile, in the same
+        way as Prometheus's histogram_quantile, except that the overflow bucket reports the
+        largest value seen.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if i == len(LATENCY_BUCKETS):
+                    return self.max
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = min(LATENCY_BUCKETS[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def cumulative_counts(self):
+        # type: () -> List[int]
+        """Return the number of values at most each bucket bound, ending with the total count."""
+        cumulative = []
+        total = 0
+        for bucket_count in self.counts:
+            total += bucket_count
+            cumulative.append(total)
+        return cumulative
+
+
+class HandlerStats:
+    """Request counts by status and latency histogram for one handler."""
+
+    def __init__(self):
+        # type: () -> None
+        self.statuses = defaultdict(int)  # type: Dict[int, int]
+        self.latency = LatencyHistogram()
+
+
+class RequestStats:
+    """Statistics for all requests to an application, by handler class name.
+
+    Requests are recorded by the application when they are logged, which happens on the IOLoop
+    thread, so no locking is needed.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.handlers = defaultdict(HandlerStats)  # type: Dict[str, HandlerStats]
+
+    def record(self, handler, status, duration):
+        # type: (str, int, float) -> None
+        stats = self.handlers[handler]
+        stats.statuses[status] += 1
+        stats.latency.observe(duration)
+
+
+class InstrumentedRLock:
+    """Reentrant lock that records how often and for how long threads wait to acquire it.
+
+    Uncontended acquisitions only pay for one non-blocking attempt.  The counters are updated
+    while holding the lock, so they are consistent, but may be read without it.  The lock also
+    tracks its owner, so that callers can tell whether the current thread holds it.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._lock = RLock()
+        self._owner = None  # type: Optional[int]
+        self._depth = 0
+        self.contentions = 0
+        self.wait_time = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        # type: (bool, float) -> bool
+        if self._lock.acquire(blocking=False):
+            self._acquired()
+            return True
+        if not blocking:
+            return False
+        start = monotonic()
+        acquired = self._lock.acquire(timeout=timeout)
+        if acquired:
+            self._acquired()
+            self.contentions += 1
+            self.wait_time += monotonic() - start
+        return acquired
+
+    def release(self):
+        # type: () -> None
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+        self._lock.release()
+
+    def held_by_current_thread(self):
+        # type: () -> bool
+        return self._owner == get_ident()
+
+    def _acquired(self):
+        # type: () -> None
+        self._owner = get_ident()
+        self._depth += 1
+
+    def __enter__(self):
+        # type: () -> bool
+        return self.acquire()
+
+    def __exit__(self, *args):
+        # type: (*object) -> None
+        self.release()
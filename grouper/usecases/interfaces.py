@@ -16,7 +16,7 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from datetime import datetime
-    from grouper.entities.audit_log_entry import AuditLogEntry
+    from grouper.entities.audit_log_entry import AuditLogCursor, AuditLogEntry
     from grouper.entities.group import GroupJoinPolicy
     from grouper.entities.group_request import GroupRequestStatus, UserGroupRequest
     from grouper.entities.pagination import ListPermissionsSortKey, PaginatedList, Pagination
@@ -40,18 +40,18 @@ class AuditLogInterface(metaclass=ABCMeta):
     """
 
     @abstractmethod
-    def entries_affecting_group(self, group, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_group(self, group, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         pass
 
     @abstractmethod
-    def entries_affecting_permission(self, permission, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_permission(self, permission, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         pass
 
     @abstractmethod
-    def entries_affecting_user(self, user, limit):
-        # type: (str, int) -> List[AuditLogEntry]
+    def entries_affecting_user(self, user, limit, before=None):
+        # type: (str, int, Optional[AuditLogCursor]) -> List[AuditLogEntry]
         pass
 
     @abstractmethod
@@ -2,7 +2,7 @@ from abc import ABCMeta, abstractmethod
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from grouper.entities.audit_log_entry import AuditLogEntry
+    from grouper.entities.audit_log_entry import AuditLogCursor, AuditLogEntry
     from grouper.entities.permission import Permission, PermissionAccess
     from grouper.usecases.interfaces import AuditLogInterface, PermissionInterface, UserInterface
     from typing import List, Optional
@@ -37,14 +37,23 @@ class ViewPermission:
         self.user_service = user_service
         self.audit_log_service = audit_log_service
 
-    def view_permission(self, name, actor, audit_log_limit, argument=None):
-        # type: (str, str, int, Optional[str]) -> None
+    def view_permission(
+        self,
+        name,  # type: str
+        actor,  # type: str
+        audit_log_limit,  # type: int
+        argument=None,  # type: Optional[str]
+        audit_log_before=None,  # type: Optional[AuditLogCursor]
+    ):
+        # type: (...) -> None
 
         permission = self.permission_service.permission(name)
         if not permission:
             self.ui.view_permission_failed_not_found(name)
             return
 
-        audit_log = self.audit_log_service.entries_affecting_permission(name, audit_log_limit)
+        audit_log = self.audit_log_service.entries_affecting_permission(
+            name, audit_log_limit, audit_log_before
+        )
         access = self.user_service.permission_access_for_user(actor, name)
         self.ui.viewed_permission(permission, access, audit_log)
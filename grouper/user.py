@@ -1,14 +1,17 @@
+from collections import defaultdict
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import or_
-from sqlalchemy.sql import label, literal
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import label
 
 from grouper.entities.group_edge import APPROVER_ROLE_INDICES, GROUP_EDGE_ROLES, OWNER_ROLE_INDICES
 from grouper.models.audit import Audit
 from grouper.models.audit_log import AuditLog
+from grouper.models.base.constants import OBJ_TYPES
+from grouper.models.checkpoint_update import CheckpointUpdate, get_checkpoint
 from grouper.models.comment import Comment
-from grouper.models.counter import Counter
 from grouper.models.group import Group
 from grouper.models.group_edge import GroupEdge
 from grouper.models.request import Request
@@ -20,7 +23,7 @@ from grouper.user_permissions import user_is_group_admin
 
 if TYPE_CHECKING:
     from grouper.models.base.session import Session
-    from typing import List
+    from typing import Dict, List, Optional, Tuple
 
 
 def get_user_or_group(session, name, user_or_group=None):
@@ -100,7 +103,7 @@ def enable_user(session, user, requester, preserve_membership):
                 )
 
     user.enabled = True
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
 
 def disable_user(session, user):
@@ -109,7 +112,7 @@ def disable_user(session, user):
     get_plugin_proxy().will_disable_user(session, user)
 
     user.enabled = False
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
 
 
 def user_role_index(user, members):
@@ -129,59 +132,107 @@ def user_role(user, members):
         return GROUP_EDGE_ROLES[role_index]
 
 
-def user_requests_aggregate(session, user):
-    """Returns all pending requests for this user to approve across groups."""
+# Pending group requests by the ID of each user who can approve them, along with the database and
+# the checkpoint for which they were computed.  See
+# _get_pending_requests_by_approver.
+_pending_requests_by_approver = (
+    None,
+    {},
+)  # type: Tuple[Optional[Tuple[str, int, int]], Dict[int, List[int]]]
 
-    members = (
-        session.query(
-            label("type", literal(1)), label("id", Group.id), label("name", Group.groupname)
-        )
-        .union(
-            session.query(
-                label("type", literal(0)), label("id", User.id), label("name", User.username)
-            )
-        )
-        .subquery()
-    )
 
-    now = datetime.utcnow()
-    groups = (
-        session.query(label("id", Group.id), label("name", Group.groupname))
-        .filter(
+def _get_pending_requests_by_approver(session):
+    # type: (Session) -> Dict[int, List[int]]
+    """Return the IDs of pending group requests keyed by the ID of each user who can approve them.
+
+    Creating or updating a request, or changing group membership, advances the checkpoint, so the
+    result is computed once per checkpoint and shared by every page view in this process until the
+    checkpoint changes.
+    """
+    global _pending_requests_by_approver
+
+    checkpoint, checkpoint_time = get_checkpoint(session)
+    key = (str(session.get_bind().url), checkpoint, checkpoint_time)
+    cached_key, by_approver = _pending_requests_by_approver
+    if checkpoint and key == cached_key:
+        return by_approver
+
+    pending = session.query(Request.id, Request.requesting_id).filter(Request.status == "pending")
+    requests_by_group = defaultdict(list)  # type: Dict[int, List[int]]
+    for request_id, group_id in pending.order_by(Request.id):
+        requests_by_group[group_id].append(request_id)
+
+    by_approver = defaultdict(list)
+    if requests_by_group:
+        now = datetime.utcnow()
+        approvers = session.query(GroupEdge.group_id, GroupEdge.member_pk).filter(
+            GroupEdge.group_id.in_(requests_by_group.keys()),
             GroupEdge.group_id == Group.id,
-            GroupEdge.member_pk == user.id,
+            GroupEdge.member_type == OBJ_TYPES["User"],
+            GroupEdge.member_pk == User.id,
             GroupEdge.active == True,
             GroupEdge._role.in_(APPROVER_ROLE_INDICES),
-            user.enabled == True,
+            User.enabled == True,
             Group.enabled == True,
             or_(GroupEdge.expiration > now, GroupEdge.expiration == None),
         )
-        .subquery()
-    )
+        for group_id, user_id in approvers:
+            by_approver[user_id].extend(requests_by_group[group_id])
 
-    requests = session.query(
-        Request.id,
-        Request.requested_at,
-        GroupEdge.expiration,
-        label("role", GroupEdge._role),
-        Request.status,
-        label("requester", User.username),
-        label("type", members.c.type),
-        label("requesting", members.c.name),
-        label("reason", Comment.comment),
-        label("group_id", groups.c.id),
-        label("groupname", groups.c.name),
-    ).filter(
-        Request.on_behalf_obj_pk == members.c.id,
-        Request.on_behalf_obj_type == members.c.type,
-        Request.requesting_id == groups.c.id,
-        Request.requester_id == User.id,
-        Request.status == "pending",
-        Request.id == RequestStatusChange.request_id,
-        RequestStatusChange.from_status == None,
-        GroupEdge.id == Request.edge_id,
-        Comment.obj_type == 3,
-        Comment.obj_pk == RequestStatusChange.id,
+    _pending_requests_by_approver = (key, by_approver)
+    return by_approver
+
+
+def pending_requests_for_approver(session, user):
+    # type: (Session, User) -> List[int]
+    """Returns the IDs of all pending requests for this user to approve across groups."""
+    return _get_pending_requests_by_approver(session).get(user.id, [])
+
+
+def user_requests_aggregate(session, user):
+    """Returns all pending requests for this user to approve across groups."""
+    requester = aliased(User)
+    member_user = aliased(User)
+    member_group = aliased(Group)
+    requests = (
+        session.query(
+            Request.id,
+            Request.requested_at,
+            GroupEdge.expiration,
+            label("role", GroupEdge._role),
+            Request.status,
+            label("requester", requester.username),
+            label("type", Request.on_behalf_obj_type),
+            label("requesting", func.coalesce(member_user.username, member_group.groupname)),
+            label("reason", Comment.comment),
+            label("group_id", Group.id),
+            label("groupname", Group.groupname),
+        )
+        .select_from(Request)
+        .outerjoin(
+            member_user,
+            and_(
+                Request.on_behalf_obj_type == OBJ_TYPES["User"],
+                Request.on_behalf_obj_pk == member_user.id,
+            ),
+        )
+        .outerjoin(
+            member_group,
+            and_(
+                Request.on_behalf_obj_type == OBJ_TYPES["Group"],
+                Request.on_behalf_obj_pk == member_group.id,
+            ),
+        )
+        .filter(
+            Request.id.in_(pending_requests_for_approver(session, user)),
+            Request.requesting_id == Group.id,
+            Request.requester_id == requester.id,
+            Request.id == RequestStatusChange.request_id,
+            RequestStatusChange.from_status == None,
+            GroupEdge.id == Request.edge_id,
+            Comment.obj_type == OBJ_TYPES["RequestStatusChange"],
+            Comment.obj_pk == RequestStatusChange.id,
+        )
     )
     return requests
 
@@ -2,7 +2,7 @@ import re
 from typing import TYPE_CHECKING
 
 from grouper.constants import PERMISSION_VALIDATION
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.user_metadata import UserMetadata
 
 if TYPE_CHECKING:
@@ -89,7 +89,7 @@ def set_user_metadata(session, user_id, data_key, data_value):
             user_md = UserMetadata(user_id=user_id, data_key=data_key, data_value=data_value)
             user_md.add(session)
 
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
     return user_md
@@ -2,7 +2,7 @@ from typing import TYPE_CHECKING
 
 from sqlalchemy.exc import IntegrityError
 
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.models.user_password import UserPassword
 
 if TYPE_CHECKING:
@@ -31,7 +31,7 @@ def add_new_user_password(session, password_name, password, user_id):
     """
     p = UserPassword(name=password_name, user_id=user_id)
     p.set_password(password)
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     p.add(session)
     try:
         session.commit()
@@ -52,7 +52,7 @@ def delete_user_password(session, password_name, user_id):
     if not p:
         raise PasswordDoesNotExist()
     p.delete(session)
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     session.commit()
 
 
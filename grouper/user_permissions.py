@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import asc, or_
+from sqlalchemy import asc, event, or_
 
 from grouper.constants import (
     GROUP_ADMIN,
@@ -10,6 +10,7 @@ from grouper.constants import (
     PERMISSION_GRANT,
     USER_ADMIN,
 )
+from grouper.models.base.session import SessionWithoutAdd
 from grouper.models.group import Group
 from grouper.models.group_edge import GroupEdge
 from grouper.models.permission import Permission
@@ -18,7 +19,10 @@ from grouper.models.permission_map import PermissionMap
 if TYPE_CHECKING:
     from grouper.models.base.session import Session
     from grouper.models.user import User
-    from typing import List, Optional
+    from typing import Any, List, Optional
+
+# Key in Session.info for the permissions already loaded for each user in the transaction.
+_USER_PERMISSIONS = "grouper.user_permissions"
 
 
 def user_has_permission(session, user, permission, argument=None):
@@ -42,8 +46,31 @@ def user_has_permission(session, user, permission, argument=None):
 
 
 def user_permissions(session, user):
-    """Return a user's enabled permissions"""
+    """Return a user's enabled permissions
+
+    A single page may check several permissions of the same user, so the result is remembered on
+    the session until it next flushes or its transaction ends.  It is not used while the session
+    has changes that have not been flushed, since they may affect the user's permissions.
+    """
+    if session.new or session.dirty or session.deleted:
+        return _load_user_permissions(session, user)
+    cache = session.info.setdefault(_USER_PERMISSIONS, {})
+    key = (user.id, user.enabled)
+    if key not in cache:
+        cache[key] = _load_user_permissions(session, user)
+    return cache[key]
+
+
+def _clear_user_permissions(session, *args):
+    # type: (Session, *Any) -> None
+    session.info.pop(_USER_PERMISSIONS, None)
 
+
+event.listen(SessionWithoutAdd, "after_flush", _clear_user_permissions)
+event.listen(SessionWithoutAdd, "after_transaction_end", _clear_user_permissions)
+
+
+def _load_user_permissions(session, user):
     # TODO: Make this walk the tree, so we can get a user's entire set of permissions.
     now = datetime.utcnow()
     permissions = (
@@ -80,15 +107,18 @@ def user_grantable_permissions(session, user):
     # avoid circular dependency
     from grouper.permissions import filter_grantable_permissions, get_all_permissions
 
-    all_permissions = {permission.name: permission for permission in get_all_permissions(session)}
-    if user_is_permission_admin(session, user):
-        result = ((perm, "*") for perm in all_permissions.values())
-        return sorted(result, key=lambda x: x[0].name + x[1])
-
     # Someone can grant a permission if they are a member of a group that has a permission
     # of PERMISSION_GRANT with an argument that matches the name of a permission.
+    is_permission_admin = user_is_permission_admin(session, user)
     grants = [x for x in user_permissions(session, user) if x.name == PERMISSION_GRANT]
-    return filter_grantable_permissions(session, grants)
+    if not is_permission_admin and not grants:
+        return []
+
+    all_permissions = {permission.name: permission for permission in get_all_permissions(session)}
+    if is_permission_admin:
+        result = ((perm, "*") for perm in all_permissions.values())
+        return sorted(result, key=lambda x: x[0].name + x[1])
+    return filter_grantable_permissions(session, grants, all_permissions)
 
 
 def user_creatable_permissions(session, user):
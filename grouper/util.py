@@ -8,7 +8,7 @@ from typing import TYPE_CHECKING, TypeVar
 if TYPE_CHECKING:
     from argparse import Namespace
     from grouper.settings import Settings
-    from typing import Any, Callable, Dict, List, Optional, Pattern
+    from typing import Any, Callable, Dict, Hashable, List, Optional, Pattern
 
 T = TypeVar("T")
 
@@ -78,6 +78,56 @@ def singleton(f):
     return wrapped
 
 
+class _Flight:
+    """A computation in progress in SingleFlight, which other callers can wait for."""
+
+    def __init__(self):
+        # type: () -> None
+        self.done = threading.Event()
+        self.result = None  # type: Any
+        self.error = None  # type: Optional[BaseException]
+
+
+class SingleFlight:
+    """Coalesce concurrent identical computations.
+
+    If a thread calls do with a key while another thread is already computing a value for the same
+    key, it waits for that computation and returns its result (or raises its exception) instead of
+    repeating the work.  Nothing is kept once the computation finishes, so this only deduplicates
+    calls that overlap in time.  Callers share the same result object and must not modify it.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self._lock = threading.Lock()
+        self._flights = {}  # type: Dict[Hashable, _Flight]
+
+    def do(self, key, fn):
+        # type: (Hashable, Callable[[], T]) -> T
+        with self._lock:
+            in_flight = self._flights.get(key)
+            if in_flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if in_flight is not None:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
 def reference_id(settings, request_type, request):
     # type: (Settings, str, Any) -> str
     """Generates the 'References' for a request"""
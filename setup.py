@@ -38,9 +38,9 @@ get_package_data("grouper", "grouper/fe/templates")
 kwargs = {
     "name": "grouper",
     "version": __version__,  # type: ignore[name-defined]  # noqa: F821
-    "packages": ["grouper", "grouper.fe", "grouper.api", "grouper.ctl"],
+    "packages": ["grouper", "grouper.fe", "grouper.api", "grouper.ctl", "grouper.graphd"],
     "package_data": package_data,
-    "scripts": ["bin/grouper-api", "bin/grouper-fe", "bin/grouper-ctl"],
+    "scripts": ["bin/grouper-api", "bin/grouper-fe", "bin/grouper-graphd", "bin/grouper-ctl"],
     "description": "Self-service Nested Group Management Server.",
     "long_description": open("README.rst").read(),
     "author": "Gary M. Josack",
@@ -0,0 +1,56 @@
+import pytest
+
+from grouper.api.admission import Lane, Overloaded
+
+
+@pytest.mark.gen_test
+def test_lane():
+    lane = Lane(max_concurrent=2, max_per_endpoint=1, max_queued=2)
+
+    # One request per endpoint runs immediately.  The second request for an endpoint is queued,
+    # and once the queue is full further requests are rejected.
+    yield lane.admit("MultiUsers")
+    queued = lane.admit("MultiUsers")
+    yield lane.admit("UserMetadata")
+    assert lane.running == 2
+    assert lane.queued == 1
+    queued_other = lane.admit("UserMetadata")
+    assert lane.queued == 2
+    with pytest.raises(Overloaded):
+        lane.admit("Grants")
+    assert lane.rejected == 1
+
+    # Releasing the UserMetadata slot skips the queued MultiUsers request, since that endpoint is
+    # still at its limit, and starts the queued UserMetadata request.
+    lane.release("UserMetadata")
+    yield queued_other
+    assert not queued.done()
+    assert lane.queued == 1
+
+    lane.release("MultiUsers")
+    yield queued
+    assert lane.queued == 0
+    assert lane.running == 2
+    assert lane.admitted == 4
+
+
+@pytest.mark.gen_test
+def test_lane_cancel():
+    lane = Lane(max_concurrent=1, max_per_endpoint=1, max_queued=2)
+
+    # A waiting request that is cancelled leaves the queue and is never started.
+    yield lane.admit("MultiUsers")
+    abandoned = lane.admit("MultiUsers")
+    queued = lane.admit("MultiUsers")
+    assert lane.cancel(abandoned)
+    assert lane.queued == 1
+    assert lane.abandoned == 1
+
+    lane.release("MultiUsers")
+    yield queued
+    assert not abandoned.done()
+    assert lane.running == 1
+
+    # Requests that have already started cannot be cancelled.
+    assert not lane.cancel(queued)
+    assert lane.abandoned == 1
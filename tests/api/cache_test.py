@@ -0,0 +1,40 @@
+from mock import patch
+
+from grouper.api.cache import CachedToken, CheckpointCache, TokenCache
+
+
+def test_checkpoint_cache():
+    # type: () -> None
+    cache = CheckpointCache(max_entries=2)  # type: CheckpointCache[str]
+    cache.set(1, "a", "value-a")
+    cache.set(1, "b", "value-b")
+    assert cache.get(1, "a") == "value-a"
+
+    # The least-recently-used entry is evicted.
+    cache.set(1, "c", "value-c")
+    assert cache.get(1, "b") is None
+    assert cache.get(1, "a") == "value-a"
+
+    # Values for older checkpoints are neither stored nor returned, and a newer checkpoint drops
+    # all existing entries.
+    cache.set(0, "b", "value-b")
+    assert cache.get(0, "a") is None
+    assert cache.get(2, "a") is None
+    assert cache.get(1, "c") is None
+
+
+def test_token_cache_ttl():
+    # type: () -> None
+    token = CachedToken(identity="a@a.co/foo", owner="a@a.co", hashed_secret="x", enabled=True)
+    cache = TokenCache(ttl=30)
+    assert cache.get(1, "a@a.co", "foo") == (False, None)
+
+    with patch("grouper.api.cache.monotonic", return_value=100.0):
+        cache.set(1, "a@a.co", "foo", token)
+        cache.set(1, "a@a.co", "bar", None)
+    with patch("grouper.api.cache.monotonic", return_value=129.0):
+        assert cache.get(1, "a@a.co", "foo") == (True, token)
+        assert cache.get(1, "a@a.co", "bar") == (True, None)
+    with patch("grouper.api.cache.monotonic", return_value=130.0):
+        assert cache.get(1, "a@a.co", "foo") == (False, None)
+        assert cache.get(1, "a@a.co", "bar") == (False, None)
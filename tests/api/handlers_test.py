@@ -3,14 +3,18 @@ import csv
 import json
 import time
 from io import StringIO
+from typing import TYPE_CHECKING
 from urllib.parse import urlencode
 
 import pytest
-from mock import Mock
+from mock import Mock, patch
 from tornado.httpclient import HTTPError
+from tornado.util import TimeoutError
 
+from grouper.api.admission import Lane, Overloaded
+from grouper.api.pagination import encode_cursor
 from grouper.constants import USER_METADATA_GITHUB_USERNAME_KEY, USER_METADATA_SHELL_KEY
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate, get_checkpoint
 from grouper.models.service_account import ServiceAccount
 from grouper.models.user_token import UserToken
 from grouper.permissions import get_permission, grant_permission_to_service_account
@@ -19,7 +23,7 @@ from grouper.public_key import add_public_key
 from grouper.user_metadata import get_user_metadata_by_key, set_user_metadata
 from grouper.user_password import add_new_user_password, delete_user_password, user_passwords
 from grouper.user_token import add_new_user_token, disable_user_token
-from tests.constants import SSH_KEY_1
+from tests.constants import SSH_KEY_1, SSH_KEY_2, SSH_KEY_ED25519
 from tests.fixtures import (  # noqa: F401
     api_app as app,
     graph,
@@ -32,12 +36,103 @@ from tests.fixtures import (  # noqa: F401
 )
 from tests.url_util import url
 
+if TYPE_CHECKING:
+    from typing import List
+
 
 @pytest.mark.gen_test
-def test_health(session, http_client, base_url):  # noqa: F811
+def test_health(session, graph, http_client, base_url):  # noqa: F811
     health_url = url(base_url, "/debug/health")
     resp = yield http_client.fetch(health_url)
     assert resp.code == 200
+    body = json.loads(resp.body)
+    assert body["checkpoint"] == graph.checkpoint
+    assert body["checkpoint_time"] == graph.checkpoint_time
+    assert 0 <= body["refresh_age"] < 60
+    assert not body["stale"]
+
+
+@pytest.mark.gen_test
+def test_stale_graph(users, graph, http_client, base_url):  # noqa: F811
+    resp = yield http_client.fetch(url(base_url, "/users"))
+    assert not json.loads(resp.body)["stale"]
+
+    # If the graph hasn't been refreshed for too long, responses and the health check say so, even
+    # if the response for the current checkpoint was already cached.
+    graph.refresh_time -= 3600
+    resp = yield http_client.fetch(url(base_url, "/users"))
+    body = json.loads(resp.body)
+    assert body["stale"]
+    assert body["checkpoint"] == graph.checkpoint
+    resp = yield http_client.fetch(url(base_url, "/debug/health"))
+    assert json.loads(resp.body)["stale"]
+
+
+@pytest.mark.gen_test
+def test_stats(users, graph, http_client, base_url):  # noqa: F811
+    yield http_client.fetch(url(base_url, "/users"))
+    yield http_client.fetch(url(base_url, "/users"))
+    with pytest.raises(HTTPError):
+        yield http_client.fetch(url(base_url, "/users/nobody@a.co"))
+
+    resp = yield http_client.fetch(url(base_url, "/debug/stats"))
+    body = json.loads(resp.body)
+    assert body["handlers"]["Users"]["count"] == 3
+    assert body["handlers"]["Users"]["statuses"] == {"200": 2, "404": 1}
+    assert body["handlers"]["Users"]["latency_ms"]["p99"] > 0
+    assert body["graph"]["checkpoint"] == graph.checkpoint
+    assert 0 <= body["graph"]["refresh_age_seconds"] < 60
+    assert body["caches"]["response_cache"]["hits"] == 1
+    assert "slow_query_count" in body["database"]
+
+    resp = yield http_client.fetch(url(base_url, "/debug/stats?format=prometheus"))
+    assert resp.headers["Content-Type"].startswith("text/plain")
+    lines = resp.body.decode().splitlines()
+    assert 'grouper_requests_total{handler="Users",status="404"} 1' in lines
+    assert 'grouper_request_duration_seconds_count{handler="Users"} 3' in lines
+    assert f"grouper_graph_checkpoint {graph.checkpoint}" in lines
+    assert "# TYPE grouper_graph_refresh_age_seconds gauge" in lines
+    assert any(line.startswith("grouper_db_slow_queries_total ") for line in lines)
+
+
+@pytest.mark.gen_test
+def test_overloaded(users, http_client, base_url):  # noqa: F811
+    def overloaded(self, endpoint):
+        raise Overloaded()
+
+    with patch.object(Lane, "admit", overloaded):
+        with pytest.raises(HTTPError) as e:
+            yield http_client.fetch(url(base_url, "/multi/users"))
+        assert e.value.code == 503
+        assert e.value.response.headers["Retry-After"] == "5"
+        assert json.loads(e.value.response.body)["errors"][0]["code"] == 503
+
+        # Health checks and stats are not subject to admission control.
+        resp = yield http_client.fetch(url(base_url, "/debug/health"))
+        assert resp.code == 200
+
+    resp = yield http_client.fetch(url(base_url, "/debug/stats"))
+    admission = json.loads(resp.body)["admission"]
+    assert admission["bulk"]["running"] == 0
+    assert admission["point"]["running"] == 0
+
+
+@pytest.mark.gen_test
+def test_admission_timeout(users, http_client, base_url):  # noqa: F811
+    async def timed_out(timeout, future):
+        raise TimeoutError()
+
+    # Requests that time out waiting for a slot are rejected and leave the queue.
+    with patch.object(Lane, "_can_run", return_value=False):
+        with patch("grouper.api.handlers.with_timeout", timed_out):
+            with pytest.raises(HTTPError) as e:
+                yield http_client.fetch(url(base_url, "/multi/users"))
+    assert e.value.code == 503
+
+    resp = yield http_client.fetch(url(base_url, "/debug/stats"))
+    admission = json.loads(resp.body)["admission"]
+    assert admission["bulk"]["queued"] == 0
+    assert admission["bulk"]["abandoned_total"] == 1
 
 
 @pytest.mark.gen_test
@@ -60,6 +155,91 @@ def test_users(users, http_client, base_url):  # noqa: F811
     assert sorted(body["data"]["users"]) == all_users
 
 
+@pytest.mark.gen_test
+def test_users_pagination(users, http_client, base_url):  # noqa: F811
+    users_wo_role = sorted([u for u in users if u != "role@a.co"])
+
+    seen = []  # type: List[str]
+    cursor = ""
+    while True:
+        api_url = url(base_url, "/users?" + urlencode({"limit": 4, "cursor": cursor}))
+        resp = yield http_client.fetch(api_url)
+        body = json.loads(resp.body)
+        assert resp.code == 200
+        assert body["status"] == "ok"
+        assert len(body["data"]["users"]) <= 4
+        seen.extend(body["data"]["users"])
+        cursor = body["data"]["next_cursor"]
+        if not cursor:
+            break
+    assert seen == users_wo_role
+
+    # A cursor from an older checkpoint resumes after the last name returned.
+    api_url = url(base_url, "/service_accounts?limit=1")
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert body["data"]["service_accounts"] == ["role@a.co"]
+    stale_cursor = encode_cursor(body["checkpoint"] - 1, 5, "role@a.co")
+    api_url = url(base_url, "/service_accounts?" + urlencode({"cursor": stale_cursor}))
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert body["data"] == {"service_accounts": ["service@a.co"], "next_cursor": None}
+
+    for query in ("limit=0", "limit=foo", "cursor=garbage"):
+        with pytest.raises(HTTPError) as e:
+            yield http_client.fetch(url(base_url, "/groups?" + query))
+        assert e.value.code == 400
+
+
+@pytest.mark.gen_test
+def test_grants_pagination(standard_graph, http_client, base_url):  # noqa: F811
+    resp = yield http_client.fetch(url(base_url, "/grants"))
+    all_grants = json.loads(resp.body)["data"]["permissions"]
+
+    resp = yield http_client.fetch(url(base_url, "/grants?limit=2"))
+    body = json.loads(resp.body)
+    first_page = body["data"]["permissions"]
+    assert sorted(first_page.keys()) == sorted(all_grants.keys())[:2]
+    for permission, grants in first_page.items():
+        assert grants == all_grants[permission]
+
+    query = urlencode({"limit": 100, "cursor": body["data"]["next_cursor"]})
+    resp = yield http_client.fetch(url(base_url, "/grants?" + query))
+    body = json.loads(resp.body)
+    assert sorted(body["data"]["permissions"].keys()) == sorted(all_grants.keys())[2:]
+    assert body["data"]["next_cursor"] is None
+
+
+@pytest.mark.gen_test
+def test_msgpack(users, http_client, base_url):  # noqa: F811
+    msgpack = pytest.importorskip("msgpack")
+
+    api_url = url(base_url, "/users/gary@a.co")
+    resp = yield http_client.fetch(api_url)
+    assert resp.headers["Content-Type"] == "application/json; charset=UTF-8"
+    json_body = json.loads(resp.body)
+
+    headers = {"Accept": "application/msgpack"}
+    resp = yield http_client.fetch(api_url, headers=headers)
+    assert resp.headers["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(resp.body, raw=False) == json_body
+
+    # The second request is served from the cache and should be identical.
+    cached_resp = yield http_client.fetch(api_url, headers=headers)
+    assert cached_resp.headers["Content-Type"] == "application/msgpack"
+    assert cached_resp.body == resp.body
+
+    # Errors are also encoded with MessagePack.
+    with pytest.raises(HTTPError) as e:
+        yield http_client.fetch(url(base_url, "/users/nobody@a.co"), headers=headers)
+    assert msgpack.unpackb(e.value.response.body, raw=False)["status"] == "error"
+
+    # JSON is used if the client prefers it.
+    headers = {"Accept": "application/json, application/msgpack;q=0.5"}
+    resp = yield http_client.fetch(api_url, headers=headers)
+    assert json.loads(resp.body) == json_body
+
+
 @pytest.mark.gen_test
 def test_multi_users(users, http_client, base_url):  # noqa: F811
     def make_url(*usernames):
@@ -111,6 +291,42 @@ def test_multi_users(users, http_client, base_url):  # noqa: F811
     assert sorted(list(body["data"].keys())) == []
 
 
+@pytest.mark.gen_test
+def test_users_fields(users, http_client, base_url):  # noqa: F811
+    api_url = url(base_url, "/users/gary@a.co?fields=metadata,groups")
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert resp.code == 200
+    assert body["status"] == "ok"
+    assert sorted(body["data"].keys()) == ["groups", "user"]
+    assert sorted(body["data"]["user"].keys()) == ["metadata", "name"]
+    assert "team-sre" in body["data"]["groups"]
+    assert "path" not in body["data"]["groups"]["team-sre"]
+
+    api_url = url(base_url, "/multi/users?username=gary@a.co&fields=public_keys")
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert body["data"] == {"gary@a.co": {"user": {"name": "gary@a.co", "public_keys": []}}}
+
+    api_url = url(base_url, "/groups/team-sre?fields=users&fields=paths")
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert sorted(body["data"].keys()) == ["group", "users"]
+    assert body["data"]["users"]["gary@a.co"]["path"] == ["team-sre", "gary@a.co"]
+
+    api_url = url(base_url, "/permissions/team-sre?fields=service_accounts")
+    resp = yield http_client.fetch(api_url)
+    body = json.loads(resp.body)
+    assert body["data"] == {"permission": {"name": "team-sre"}, "service_accounts": {}}
+
+    with pytest.raises(HTTPError) as e:
+        yield http_client.fetch(url(base_url, "/users/gary@a.co?fields=bogus"))
+    assert e.value.code == 400
+    body = json.loads(e.value.response.body)
+    assert body["status"] == "error"
+    assert body["errors"][0]["message"] == "Unknown fields: bogus"
+
+
 @pytest.mark.gen_test
 def test_service_accounts(session, standard_graph, users, http_client, base_url):  # noqa: F811
     api_url = url(base_url, "/service_accounts")
@@ -150,7 +366,7 @@ def test_service_accounts(session, standard_graph, users, http_client, base_url)
 
 
 @pytest.mark.gen_test
-def test_usertokens(users, session, http_client, base_url):  # noqa: F811
+def test_usertokens(users, session, graph, http_client, base_url):  # noqa: F811
     user = users["zorkian@a.co"]
     tok, secret = add_new_user_token(session, UserToken(user=user, name="Foo"))
     session.commit()
@@ -232,9 +448,11 @@ def test_usertokens(users, session, http_client, base_url):  # noqa: F811
     assert len(body["errors"]) == 1
     assert body["errors"][0]["code"] == 2
 
-    # Disabled, but otherwise valid token
+    # Disabled, but otherwise valid token.  Validation results are cached until the graph sees
+    # the checkpoint change from disabling the token.
     disable_user_token(session, tok)
     session.commit()
+    graph.update_from_db(session)
 
     resp = yield http_client.fetch(api_url, method="POST", body=urlencode({"token": valid_token}))
     body = json.loads(resp.body)
@@ -280,7 +498,7 @@ def test_groups_email(groups, session, graph, http_client, base_url):  # noqa: F
     sad = groups["sad-team"]
     sad.email_address = expected_address
     session.commit()
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     graph.update_from_db(session)
 
     api_url = url(base_url, "/groups/{}".format(sad.name))
@@ -361,11 +579,11 @@ def test_passwords_api(session, users, http_client, base_url, graph):  # noqa: F
     assert len(user_passwords(session, user)) == 1, "The user should only have a single password"
 
     graph.update_from_db(session)
-    c = Counter.get(session, name="updates")
+    checkpoint, _ = get_checkpoint(session)
     api_url = url(base_url, "/users/{}".format(user.username))
     resp = yield http_client.fetch(api_url)
     body = json.loads(resp.body)
-    assert body["checkpoint"] == c.count, "The API response is not up to date"
+    assert body["checkpoint"] == checkpoint, "The API response is not up to date"
     assert (
         body["data"]["user"]["passwords"] != []
     ), "The user should not have an empty passwords field"
@@ -389,20 +607,21 @@ def test_passwords_api(session, users, http_client, base_url, graph):  # noqa: F
     )
 
     delete_user_password(session, "test", user.id)
-    c = Counter.get(session, name="updates")
+    checkpoint, _ = get_checkpoint(session)
     graph.update_from_db(session)
     api_url = url(base_url, "/users/{}".format(user.username))
     resp = yield http_client.fetch(api_url)
     body = json.loads(resp.body)
-    assert body["checkpoint"] == c.count, "The API response is not up to date"
+    assert body["checkpoint"] == checkpoint, "The API response is not up to date"
     assert body["data"]["user"]["passwords"] == [], "The user should not have any passwords"
 
 
 @pytest.mark.gen_test
-def test_public_keys(session, users, http_client, base_url):  # noqa: F811
+def test_public_keys(session, users, graph, http_client, base_url):  # noqa: F811
     user = users["cbguder@a.co"]
 
     add_public_key(session, user, SSH_KEY_1)
+    graph.update_from_db(session)
 
     api_url = url(base_url, "/public-keys")
     resp = yield http_client.fetch(api_url)
@@ -417,6 +636,83 @@ def test_public_keys(session, users, http_client, base_url):  # noqa: F811
     assert rows[0]["fingerprint_sha256"] == "x9HI/CF9Aoi7Mh7bfDMi0FzcqfIU4FEup6dfYh3b1w0"
     assert rows[0]["comment"] == "some-comment"
 
+    # Conditional requests return 304 until the graph changes.
+    etag = resp.headers["Etag"]
+    resp = yield http_client.fetch(api_url, headers={"If-None-Match": etag}, raise_error=False)
+    assert resp.code == 304
+
+    # Filtering by username and either fingerprint.
+    for query in (
+        "username=cbguder@a.co",
+        "fingerprint=6f:c4:6b:f1:d7:29:b0:14:41:52:3c:83:fb:53:a5:85",
+        "fingerprint=x9HI/CF9Aoi7Mh7bfDMi0FzcqfIU4FEup6dfYh3b1w0",
+    ):
+        resp = yield http_client.fetch(url(base_url, "/public-keys?" + query))
+        rows = list(csv.DictReader(StringIO(resp.body.decode())))
+        assert [r["username"] for r in rows] == ["cbguder@a.co"]
+    for query in (
+        "username=gary@a.co",
+        "fingerprint=00:11:22",
+        "username=gary@a.co&fingerprint=x9HI/CF9Aoi7Mh7bfDMi0FzcqfIU4FEup6dfYh3b1w0",
+    ):
+        resp = yield http_client.fetch(url(base_url, "/public-keys?" + query))
+        assert list(csv.DictReader(StringIO(resp.body.decode()))) == []
+
+
+@pytest.mark.gen_test
+def test_public_key_by_fingerprint(session, users, graph, http_client, base_url):  # noqa: F811
+    add_public_key(session, users["cbguder@a.co"], SSH_KEY_1)
+    graph.update_from_db(session)
+
+    for fingerprint in (
+        "6f:c4:6b:f1:d7:29:b0:14:41:52:3c:83:fb:53:a5:85",
+        "MD5:6f:c4:6b:f1:d7:29:b0:14:41:52:3c:83:fb:53:a5:85",
+        "x9HI/CF9Aoi7Mh7bfDMi0FzcqfIU4FEup6dfYh3b1w0",
+        "SHA256:x9HI%2FCF9Aoi7Mh7bfDMi0FzcqfIU4FEup6dfYh3b1w0",
+    ):
+        resp = yield http_client.fetch(url(base_url, f"/public-keys/{fingerprint}"))
+        body = json.loads(resp.body)
+        assert body["data"]["user"] == "cbguder@a.co"
+        assert body["data"]["public_key"]["public_key"] == SSH_KEY_1
+        assert body["data"]["public_key"]["comment"] == "some-comment"
+        assert body["data"]["public_key"]["key_type"] == "ssh-rsa"
+
+    with pytest.raises(HTTPError) as e:
+        yield http_client.fetch(url(base_url, "/public-keys/00:11:22"))
+    assert e.value.code == 404
+
+
+@pytest.mark.gen_test
+def test_authorized_keys(session, users, graph, http_client, base_url):  # noqa: F811
+    add_public_key(session, users["gary@a.co"], SSH_KEY_1)
+    add_public_key(session, users["gary@a.co"], SSH_KEY_2)
+    add_public_key(session, users["oliver@a.co"], SSH_KEY_ED25519)
+    graph.update_from_db(session)
+
+    resp = yield http_client.fetch(url(base_url, "/users/gary@a.co/authorized_keys"))
+    assert resp.headers["Content-Type"].startswith("text/plain")
+    assert resp.body.decode() == f"{SSH_KEY_1}\n{SSH_KEY_2}\n"
+
+    # gary has ssh with argument * through team-sre.  oliver doesn't have ssh at all.
+    query = "permission=ssh&argument=db"
+    resp = yield http_client.fetch(url(base_url, f"/users/gary@a.co/authorized_keys?{query}"))
+    assert resp.body.decode() == f"{SSH_KEY_1}\n{SSH_KEY_2}\n"
+    resp = yield http_client.fetch(url(base_url, "/users/oliver@a.co/authorized_keys"))
+    assert resp.body.decode() == f"{SSH_KEY_ED25519}\n"
+    resp = yield http_client.fetch(url(base_url, f"/users/oliver@a.co/authorized_keys?{query}"))
+    assert resp.body == b""
+
+    # zay has ssh with arguments * and shell, but no keys.
+    resp = yield http_client.fetch(url(base_url, "/users/zay@a.co/authorized_keys?permission=ssh"))
+    assert resp.body == b""
+
+    with pytest.raises(HTTPError) as e:
+        yield http_client.fetch(url(base_url, "/users/nobody@a.co/authorized_keys"))
+    assert e.value.code == 404
+    with pytest.raises(HTTPError) as e:
+        yield http_client.fetch(url(base_url, "/users/gary@a.co/authorized_keys?argument=db"))
+    assert e.value.code == 400
+
 
 @pytest.mark.gen_test
 def test_request_logging(session, users, http_client, base_url):  # noqa: F811
@@ -0,0 +1,50 @@
+from threading import Event, Lock
+
+import pytest
+from tornado.gen import convert_yielded, multi
+from tornado.util import TimeoutError
+
+from grouper.api.workers import DatabasePool, WorkerPool
+
+
+@pytest.mark.gen_test
+def test_worker_pool_limits():
+    pool = WorkerPool(max_workers=4, max_per_endpoint=2)
+    release = Event()
+    lock = Lock()
+    running = {"bulk": 0}
+    max_running = {"bulk": 0}
+
+    def bulk():
+        # type: () -> str
+        with lock:
+            running["bulk"] += 1
+            max_running["bulk"] = max(max_running["bulk"], running["bulk"])
+        release.wait(5)
+        with lock:
+            running["bulk"] -= 1
+        return "bulk"
+
+    # Start more bulk requests than the endpoint limit.  A point lookup on another endpoint still
+    # completes while they are blocked.
+    bulk_requests = [convert_yielded(pool.run("bulk", bulk)) for _ in range(5)]
+    result = yield pool.run("point", lambda: "point")
+    assert result == "point"
+    assert not any(r.done() for r in bulk_requests)
+
+    release.set()
+    results = yield multi(bulk_requests)
+    assert results == ["bulk"] * 5
+    assert max_running["bulk"] == 2
+
+
+@pytest.mark.gen_test
+def test_database_pool_timeout():
+    pool = DatabasePool(max_workers=1, timeout=0.1)
+    result = yield pool.run(lambda: "result")
+    assert result == "result"
+
+    release = Event()
+    with pytest.raises(TimeoutError):
+        yield pool.run(release.wait, 5)
+    release.set()
@@ -0,0 +1,70 @@
+from typing import TYPE_CHECKING
+
+from mock import patch
+from sqlalchemy import event
+
+from grouper.audit_log_writer import flush_plugin_queue
+from grouper.models.audit_log import AuditLog
+from grouper.plugin.base import BasePlugin
+from grouper.plugin.proxy import PluginProxy
+from tests.fixtures import session, users  # noqa: F401
+
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+
+class AuditLogRecorder(BasePlugin):
+    def __init__(self):
+        # type: () -> None
+        self.batches = []  # type: List[List[Tuple[int, str, str]]]
+
+    def log_auditlog_entries(self, entries):
+        # type: (List[AuditLog]) -> None
+        self.batches.append([(e.id, e.action, e.actor.username) for e in entries])
+
+
+def test_batched_writes(session, users):  # noqa: F811
+    actor_id = users["gary@a.co"].id
+    recorder = AuditLogRecorder()
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("INSERT INTO audit_log"):
+            statements.append(statement)
+
+    event.listen(session.get_bind(), "before_cursor_execute", record)
+    try:
+        with patch("grouper.models.audit_log.get_plugin_proxy") as get_plugin_proxy:
+            get_plugin_proxy.return_value = PluginProxy([recorder])
+
+            # Entries logged in a transaction are inserted in one statement, either when it
+            # commits or when the audit log is read within it.
+            for i in range(5):
+                AuditLog.log(session, actor_id, f"action-{i}", "batched", commit=False)
+            entries = AuditLog.get_entries(session, action="action-0")
+            assert len(entries) == 1
+            assert len(statements) == 1
+            session.commit()
+            assert len(statements) == 1
+
+            # Once the transaction commits, the entries are passed to plugins in one batch with
+            # their IDs and relationships loaded.
+            flush_plugin_queue()
+            assert len(recorder.batches) == 1
+            assert [e[1:] for e in recorder.batches[0]] == [
+                (f"action-{i}", "gary@a.co") for i in range(5)
+            ]
+            assert recorder.batches[0][0][0] == entries[0].id
+
+            # Entries logged in a transaction that is rolled back are discarded.
+            AuditLog.log(session, actor_id, "discarded", "rolled back", commit=False)
+            session.rollback()
+            AuditLog.log(session, actor_id, "kept", "committed")
+            flush_plugin_queue()
+    finally:
+        event.remove(session.get_bind(), "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    assert AuditLog.get_entries(session, action="discarded") == []
+    assert len(AuditLog.get_entries(session, action="kept")) == 1
+    assert [e[1] for e in recorder.batches[-1]] == ["kept"]
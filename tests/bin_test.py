@@ -2,8 +2,18 @@
 
 import subprocess
 import sys
+import time
+from typing import TYPE_CHECKING
 
-from tests.path_util import bin_env, src_path
+import yaml
+
+from grouper.graph import GroupGraph
+from tests.fixtures import session  # noqa: F401
+from tests.path_util import bin_env, db_url, src_path
+
+if TYPE_CHECKING:
+    from py._path.local import LocalPath
+    from sqlalchemy.orm import Session
 
 
 def test_api():
@@ -32,3 +42,26 @@ def test_fe():
     bin_path = src_path("bin", "grouper-fe")
     out = subprocess.check_output([sys.executable, bin_path, "--help"], env=bin_env())
     assert out.decode().startswith("usage: grouper-fe")
+
+
+def test_graphd(session, tmpdir):  # noqa: F811
+    # type: (Session, LocalPath) -> None
+    with open(src_path("config", "test.yaml")) as config:
+        settings = yaml.safe_load(config)
+    graph_path = tmpdir.join("graph.snapshot")
+    settings["graphd"] = {"graph_path": str(graph_path)}
+    config_path = tmpdir.join("graphd.yaml")
+    config_path.write(yaml.safe_dump(settings))
+
+    bin_path = src_path("bin", "grouper-graphd")
+    args = [sys.executable, bin_path, "-c", str(config_path), "-d", db_url(tmpdir)]
+    graphd = subprocess.Popen(args, env=bin_env())
+    try:
+        deadline = time.time() + 30
+        while not graph_path.check() and graphd.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        graphd.terminate()
+        graphd.wait()
+
+    assert GroupGraph().load_snapshot(str(graph_path))
@@ -1,8 +1,12 @@
 import csv
-from datetime import date, timedelta
+import json
+from datetime import date, datetime, timedelta
 
 from mock import patch
+from sqlalchemy import event
 
+from grouper.audit_log import archive_audit_log
+from grouper.audit_log_writer import flush_plugin_queue
 from grouper.entities.group_edge import GROUP_EDGE_ROLES
 from grouper.models.audit_log import AuditLog
 from grouper.models.group import Group
@@ -107,3 +111,100 @@ def test_group_logdump(session, tmpdir, users, groups):  # noqa: F811
 
     log_time, actor, description, action, extra = entries[0]
     assert groupname in extra
+
+
+def test_group_logdump_archive(session, tmpdir, users, groups):  # noqa: F811
+    groupname = "team-sre"
+    group_id = groups[groupname].id
+    actor_id = users["zorkian@a.co"].id
+    for action in ("old_noise", "new_noise"):
+        AuditLog.log(session, actor_id, action, "making some noise", on_group_id=group_id)
+    archive_audit_log(session, datetime.utcnow(), 1)
+    AuditLog.log(session, actor_id, "newer_noise", "making some noise", on_group_id=group_id)
+
+    # Entries from the archive and audit_log are dumped together in date order.
+    yesterday = date.today() - timedelta(days=1)
+    fn = tmpdir.join("out.csv").strpath
+    call_main(
+        session, tmpdir, "group", "log_dump", groupname, yesterday.isoformat(), "--outfile", fn
+    )
+    with open(fn, "r") as fh:
+        actions = [entry[3] for entry in csv.reader(fh)]
+    assert actions == ["old_noise", "new_noise", "newer_noise"]
+
+
+def test_group_logdump_groups(session, tmpdir, users, groups):  # noqa: F811
+    actor = users["zorkian@a.co"]
+    for groupname in ("team-sre", "serving-team", "tech-ops"):
+        AuditLog.log(session, actor.id, "noise", groupname, on_group_id=groups[groupname].id)
+        AuditLog.log(
+            session,
+            actor.id,
+            "user_noise",
+            groupname,
+            on_group_id=groups[groupname].id,
+            on_user_id=users["gary@a.co"].id,
+        )
+
+    # The dump takes a fixed number of queries however many entries there are.
+    flush_plugin_queue()
+    statements = []
+    engine = session.get_bind()
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yesterday = date.today() - timedelta(days=1)
+        fn = tmpdir.join("out.csv").strpath
+        call_main(
+            session,
+            tmpdir,
+            "group",
+            "log_dump",
+            "team-sre",
+            "serving-team",
+            yesterday.isoformat(),
+            "--outfile",
+            fn,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 3
+
+    # With more than one group, the group is added as a final column.
+    with open(fn, "r") as fh:
+        entries = list(csv.reader(fh))
+    assert [(e[1], e[3], e[4], e[5]) for e in entries] == [
+        ("zorkian@a.co", "noise", "group: team-sre", "team-sre"),
+        ("zorkian@a.co", "user_noise", "user: gary@a.co", "team-sre"),
+        ("zorkian@a.co", "noise", "group: serving-team", "serving-team"),
+        ("zorkian@a.co", "user_noise", "user: gary@a.co", "serving-team"),
+    ]
+
+    call_main(
+        session,
+        tmpdir,
+        "group",
+        "log_dump",
+        "--all-groups",
+        "--format",
+        "jsonl",
+        yesterday.isoformat(),
+        "--outfile",
+        fn,
+    )
+    with open(fn, "r") as fh:
+        entries = [json.loads(line) for line in fh]
+    assert len(entries) == 6
+    assert entries[-1] == {
+        "action": "user_noise",
+        "actor": "zorkian@a.co",
+        "description": "tech-ops",
+        "log_time": entries[-1]["log_time"],
+        "on_group": "tech-ops",
+        "on_permission": None,
+        "on_user": "gary@a.co",
+    }
+    assert datetime.fromisoformat(entries[-1]["log_time"]).date() >= yesterday
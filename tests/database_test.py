@@ -0,0 +1,175 @@
+import os
+from contextlib import closing
+from threading import Event
+from typing import TYPE_CHECKING
+
+import pytest
+from mock import patch
+
+from grouper.database import DbRefreshThread
+from grouper.graph import GroupGraph
+from grouper.models.base.session import DbEngineManager, Session
+from grouper.models.counter import Counter
+from grouper.repositories.factory import SessionFactory
+from grouper.repositories.schema import SchemaRepository
+from grouper.settings import Settings
+
+if TYPE_CHECKING:
+    from py._path.local import LocalPath
+    from tests.setup import SetupTest
+
+
+def test_refresh_failure_crashes(setup):
+    # type: (SetupTest) -> None
+    refresher = DbRefreshThread(setup.settings, setup.plugins, setup.graph, 10)
+    with patch.object(setup.graph, "update_from_db", side_effect=Exception("database down")):
+        with patch.object(refresher, "crash", side_effect=SystemExit) as crash:
+            with pytest.raises(SystemExit):
+                refresher.refresh()
+    assert crash.called
+
+
+def test_refresh_failure_serves_stale(setup):
+    # type: (SetupTest) -> None
+    refresher = DbRefreshThread(
+        setup.settings, setup.plugins, setup.graph, 10, serve_stale=True, max_backoff=60
+    )
+    with patch.object(setup.graph, "update_from_db", side_effect=Exception("database down")):
+        assert [refresher.refresh() for _ in range(4)] == [20, 40, 60, 60]
+    assert refresher.failures == 4
+
+    # Once a refresh succeeds, the next refresh happens on the normal schedule.
+    with patch.object(setup.graph, "update_from_db"):
+        assert refresher.refresh() == 10
+    assert refresher.failures == 0
+
+
+def test_refresh_saves_snapshot(setup, tmpdir):
+    # type: (SetupTest, LocalPath) -> None
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "some-group")
+    path = str(tmpdir.join("graph.snapshot"))
+    refresher = DbRefreshThread(setup.settings, setup.plugins, setup.graph, 10, snapshot_path=path)
+    with patch.object(setup.graph, "update_from_db"):
+        refresher.refresh()
+
+    graph = GroupGraph()
+    assert graph.load_snapshot(path)
+    assert graph.checkpoint == setup.graph.checkpoint
+    assert graph.get_group_details("some-group") == setup.graph.get_group_details("some-group")
+
+    # The snapshot is only written again when the graph changes.  Otherwise, it is touched to
+    # show that it is still current.
+    os.utime(path, (0, 0))
+    with patch.object(setup.graph, "save_snapshot") as save_snapshot:
+        with patch.object(setup.graph, "update_from_db"):
+            refresher.refresh()
+    assert not save_snapshot.called
+    assert os.stat(path).st_mtime > 0
+
+
+def test_graph_builder_generations(setup, tmpdir):
+    # type: (SetupTest, LocalPath) -> None
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "some-group")
+    path = str(tmpdir.join("graph"))
+    builder = DbRefreshThread(setup.settings, setup.plugins, GroupGraph(), 10, snapshot_path=path)
+    builder.refresh()
+
+    consumer = GroupGraph()
+    assert consumer.load_snapshot(path)
+    assert consumer.checkpoint == setup.graph.checkpoint
+    assert consumer.get_group_details("some-group") == setup.graph.get_group_details("some-group")
+
+    # Each change to the database is published as a new generation, which consumers load.
+    with setup.transaction():
+        setup.add_user_to_group("zorkian@a.co", "some-group")
+    builder.refresh()
+    assert consumer.load_snapshot(path)
+    assert consumer.checkpoint == setup.graph.checkpoint
+    assert "zorkian@a.co" in consumer.get_group_details("some-group")["users"]
+
+
+def test_adaptive_refresh_interval(setup):
+    # type: (SetupTest) -> None
+    graph = GroupGraph()
+    refresher = DbRefreshThread(setup.settings, setup.plugins, graph, 60, min_interval=5)
+
+    # While nothing changes, the interval doubles up to the refresh interval.
+    assert [refresher.refresh() for _ in range(5)] == [10, 20, 40, 60, 60]
+
+    # A change resets it to the minimum.
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "some-group")
+    assert refresher.refresh() == 5
+    assert refresher.refresh() == 10
+
+
+def test_refresh_wake(setup):
+    # type: (SetupTest) -> None
+    refresher = DbRefreshThread(setup.settings, setup.plugins, setup.graph, 3600)
+    refreshed = [Event(), Event()]
+    from_primary = []
+
+    def refresh(**kwargs):
+        # type: (**bool) -> float
+        from_primary.append(kwargs["from_primary"])
+        refreshed[0 if not refreshed[0].is_set() else 1].set()
+        if refreshed[1].is_set():
+            raise SystemExit()
+        return 3600
+
+    with patch.object(refresher, "refresh", side_effect=refresh):
+        refresher.daemon = True
+        refresher.start()
+        assert refreshed[0].wait(5)
+        assert not refreshed[1].is_set()
+        refresher.wake()
+        assert refreshed[1].wait(5)
+        refresher.join(5)
+
+    # Refreshes woken up for a change just committed read the primary database.
+    assert from_primary == [False, True]
+
+
+def test_read_only_session_replica_lag(setup, tmpdir):
+    # type: (SetupTest, LocalPath) -> None
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "some-group")
+    checkpoint = setup.graph.checkpoint
+    primary_engine = setup.session.get_bind()
+
+    # Build a replica that is one update behind the primary.
+    replica_settings = Settings()
+    replica_settings.database = "sqlite:///{}".format(tmpdir.join("replica.sqlite"))
+    SchemaRepository(replica_settings).initialize_schema()
+    replica_engine = DbEngineManager().get_db_engine(replica_settings.database)
+    with closing(Session(bind=replica_engine)) as replica_session:
+        Counter(name="updates", count=checkpoint - 1).add(replica_session)
+        replica_session.commit()
+
+    # Without a replica, or with one that has fallen behind, sessions use the primary.
+    session_factory = SessionFactory(setup.settings)
+    assert session_factory.create_read_only_session().get_bind() == primary_engine
+    setup.settings.database_replica = replica_settings.database
+    assert session_factory.create_read_only_session().get_bind() == primary_engine
+
+    # The replica is used once it is within the allowed lag.
+    setup.settings.max_replica_lag = 1
+    assert session_factory.create_read_only_session().get_bind() == replica_engine
+    setup.settings.max_replica_lag = 0
+    with closing(Session(bind=replica_engine)) as replica_session:
+        replica_session.query(Counter).filter_by(name="updates").update({"count": checkpoint})
+        replica_session.commit()
+    assert session_factory.create_read_only_session().get_bind() == replica_engine
+
+    # The replica's lag is only checked again after replica_check_interval.
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "other-group")
+    assert session_factory.create_read_only_session().get_bind() == replica_engine
+    setup.settings.replica_check_interval = 0
+    assert session_factory.create_read_only_session().get_bind() == primary_engine
+
+    # Sessions fall back to the primary if the replica can't be queried.
+    setup.settings.database_replica = "sqlite:///{}".format(tmpdir.join("missing", "db.sqlite"))
+    assert session_factory.create_read_only_session().get_bind() == primary_engine
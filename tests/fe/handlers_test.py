@@ -1,12 +1,18 @@
+import json
 import time
 from datetime import date, datetime, timedelta
 from urllib.parse import urlencode
 
 import pytest
 from mock import Mock, patch
+from sqlalchemy import event
 from tornado.httpclient import HTTPError
 
+from grouper.audit_log_writer import flush_plugin_queue
+from grouper.entities.audit_log_entry import AuditLogCursor
+from grouper.fe.util import deserialize_audit_log_cursor, serialize_audit_log_cursor
 from grouper.models.async_notification import AsyncNotification
+from grouper.models.audit_log import AuditLog
 from grouper.models.group import Group
 from grouper.models.group_edge import GroupEdge
 from grouper.models.request import Request
@@ -52,6 +58,93 @@ def test_health(session, http_client, base_url):  # noqa: F811
     assert resp.code == 200
 
 
+@pytest.mark.gen_test
+def test_stats(session, http_client, base_url):  # noqa: F811
+    yield http_client.fetch(url(base_url, "/debug/health"))
+    resp = yield http_client.fetch(url(base_url, "/debug/stats"))
+    body = json.loads(resp.body)
+    assert body["handlers"]["HealthCheck"]["statuses"] == {"200": 1}
+    assert body["caches"] == {}
+
+
+@pytest.mark.gen_test
+def test_read_only_session(app, session, users, http_client, base_url):  # noqa: F811
+    replica_sessions = []
+
+    def read_only_session():
+        replica_sessions.append(session)
+        return session
+
+    app.settings["read_only_session"] = read_only_session
+    headers = {"X-Grouper-User": "zorkian@a.co"}
+    resp = yield http_client.fetch(url(base_url, "/groups"), headers=headers)
+    assert resp.code == 200
+    assert len(replica_sessions) == 1
+
+    # Requests following a change read from the primary.
+    resp = yield http_client.fetch(url(base_url, "/groups?refresh=yes"), headers=headers)
+    assert resp.code == 200
+    assert len(replica_sessions) == 1
+
+    # Users are created on first access, so requests from new users switch to the primary.
+    headers = {"X-Grouper-User": "new@a.co"}
+    resp = yield http_client.fetch(url(base_url, "/groups"), headers=headers)
+    assert resp.code == 200
+    assert len(replica_sessions) == 2
+    assert User.get(session, name="new@a.co")
+
+
+@pytest.mark.gen_test
+def test_permission_audit_log_cursor(
+    session, users, permissions, http_client, base_url  # noqa: F811
+):
+    headers = {"X-Grouper-User": "zorkian@a.co"}
+    cursor = serialize_audit_log_cursor(AuditLogCursor(datetime(2020, 1, 2, 3, 4, 5, 678), 9))
+    assert deserialize_audit_log_cursor(cursor) == AuditLogCursor(
+        datetime(2020, 1, 2, 3, 4, 5, 678), 9
+    )
+
+    fe_url = url(base_url, "/permissions/ssh?before={}".format(cursor))
+    resp = yield http_client.fetch(fe_url, headers=headers)
+    assert resp.code == 200
+
+    with pytest.raises(HTTPError) as excinfo:
+        fe_url = url(base_url, "/permissions/ssh?before=garbage")
+        yield http_client.fetch(fe_url, headers=headers)
+    assert excinfo.value.code == 400
+
+
+@pytest.mark.gen_test
+def test_page_query_counts(session, standard_graph, http_client, base_url):  # noqa: F811
+    # Log entries from many actors must not each load their actor separately.
+    group = Group.get(session, name="team-sre")
+    for user in session.query(User).all():
+        AuditLog.log(session, user.id, "test", "test", on_group_id=group.id, on_user_id=user.id)
+    flush_plugin_queue()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    headers = {"X-Grouper-User": "gary@a.co"}
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for path, max_queries in [
+            ("/groups/team-sre", 14),
+            ("/users/gary@a.co", 18),
+            ("/users/zay@a.co", 11),
+        ]:
+            session.expire_all()
+            del statements[:]
+            resp = yield http_client.fetch(url(base_url, path), headers=headers)
+            assert resp.code == 200
+            assert len(statements) <= max_queries, path
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
 @pytest.mark.gen_test
 def test_auth(users, http_client, base_url):  # noqa: F811
     # no 'auth' present
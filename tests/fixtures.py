@@ -201,6 +201,12 @@ def session(request, tmpdir):
 @pytest.fixture
 def graph(session):
     graph = Graph()
+
+    # The global graph outlives the database of the previous test, whose checkpoint may be newer
+    # than this one's.  Forget it so that the graph is always rebuilt from this test's database.
+    with graph.lock:
+        graph.checkpoint = -1
+        graph.checkpoint_time = 0
     graph.update_from_db(session)
     return graph
 
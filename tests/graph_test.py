@@ -1,15 +1,19 @@
 from datetime import datetime
+from threading import Event, Thread
 from time import time
 from typing import TYPE_CHECKING
 
 import pytest
+from mock import patch
 
 from grouper.entities.group import GroupJoinPolicy
-from grouper.graph import NoSuchGroup, NoSuchUser
+from grouper.graph import GroupGraph, NoSuchGroup, NoSuchPermission, NoSuchUser
 from grouper.plugin.base import BasePlugin
 
 if TYPE_CHECKING:
+    from py._path.local import LocalPath
     from tests.setup import SetupTest
+    from typing import Any, Dict, List
 
 
 def build_test_graph(setup):
@@ -289,6 +293,123 @@ def test_get_user_details(setup):
     assert sorted(permissions) == [("team-sre", "*")]
 
 
+def test_get_details_with_fields(setup):
+    # type: (SetupTest) -> None
+    build_test_graph(setup)
+
+    details = setup.graph.get_user_details("figurehead@a.co", fields={"groups"})
+    assert sorted(details.keys()) == ["groups"]
+    assert sorted(details["groups"].keys()) == [
+        "all-teams",
+        "security-team",
+        "team-infra",
+        "tech-ops",
+    ]
+    assert "path" not in details["groups"]["all-teams"]
+    assert details["groups"]["all-teams"]["distance"] == 3
+
+    details = setup.graph.get_user_details("figurehead@a.co", fields={"permissions", "paths"})
+    assert sorted(details.keys()) == ["permissions"]
+    assert [p["path"] for p in details["permissions"]] == [
+        ["figurehead@a.co", "security-team", "team-infra"]
+    ]
+
+    details = setup.graph.get_group_details("serving-team", fields={"users"})
+    assert sorted(details.keys()) == ["group", "users"]
+    assert "path" not in details["users"]["figurehead@a.co"]
+    assert details["users"]["figurehead@a.co"]["distance"] == 2
+
+    details = setup.graph.get_group_details("serving-team", fields={"audited"})
+    assert details == {"group": {"name": "serving-team"}, "audited": True}
+
+    details = setup.graph.get_permission_details("sudo", fields={"groups"})
+    assert sorted(details.keys()) == ["groups"]
+    assert isinstance(details["groups"], dict)
+    assert "path" not in details["groups"]["team-infra"]["permissions"][0]
+    assert setup.graph.get_permission_details("audited", fields={"audited"}) == {"audited": True}
+
+
+def test_coalesced_details(setup):
+    # type: (SetupTest) -> None
+    build_test_graph(setup)
+    graph = setup.graph
+    with pytest.raises(NoSuchPermission):
+        graph.get_permission_details("nonexistent")
+
+    # Block the first computation until other threads have asked for the same details.
+    compute = graph._get_group_details
+    started = Event()
+    release = Event()
+    calls = []
+
+    def slow_compute(*args):
+        # type: (*Any) -> Dict[str, Any]
+        calls.append(args)
+        started.set()
+        release.wait(5)
+        return compute(*args)
+
+    graph._get_group_details = slow_compute  # type: ignore[assignment]
+    results = []  # type: List[Dict[str, Any]]
+    threads = [
+        Thread(target=lambda: results.append(graph.get_group_details("team-sre")))
+        for _ in range(4)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads[1:]:
+        thread.join(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert all(r is results[0] for r in results)
+    assert len(calls) == 1
+
+    # Once the computation is done, it is not shared with later calls.
+    graph.get_group_details("team-sre")
+    assert len(calls) == 2
+
+
+def test_graph_snapshot_without_lock(setup):
+    # type: (SetupTest) -> None
+    build_test_graph(setup)
+    graph = setup.graph
+    snapshot = graph.snapshot()
+    assert snapshot.current_checkpoint() == graph.current_checkpoint()
+    expected = graph.get_user_details("gary@a.co")
+
+    # Snapshots can be walked while another thread holds the graph lock.
+    locked = Event()
+    release = Event()
+
+    def hold_lock():
+        # type: () -> None
+        with graph.lock:
+            locked.set()
+            release.wait(5)
+
+    thread = Thread(target=hold_lock)
+    thread.start()
+    locked.wait(5)
+    try:
+        assert snapshot.get_user_details("gary@a.co") == expected
+        assert graph.current_checkpoint()[0] == graph.checkpoint
+    finally:
+        release.set()
+        thread.join()
+
+    # Later updates don't change the snapshot.
+    with setup.transaction():
+        setup.add_user_to_group("gary@a.co", "new-group")
+    assert graph.checkpoint > snapshot.checkpoint
+    assert "new-group" in graph.get_user_details("gary@a.co")["groups"]
+    assert "new-group" not in snapshot.get_user_details("gary@a.co")["groups"]
+
+
 class MockStats(BasePlugin):
     def __init__(self):
         # type: () -> None
@@ -299,6 +420,27 @@ class MockStats(BasePlugin):
         self.update_ms = duration_ms
 
 
+def test_graph_ignores_older_checkpoint(setup):
+    # type: (SetupTest) -> None
+    build_test_graph(setup)
+    checkpoint = setup.graph.checkpoint
+    checkpoint_time = setup.graph.checkpoint_time
+
+    # An older checkpoint of the same database, as read from a lagging replica, is ignored.
+    with patch.object(
+        GroupGraph, "_get_checkpoint", return_value=(checkpoint - 1, checkpoint_time)
+    ):
+        with setup.transaction():
+            setup.add_user_to_group("newcomer@a.co", "team-sre")
+    assert setup.graph.checkpoint == checkpoint
+    assert "newcomer@a.co" not in setup.graph.get_group_details("team-sre")["users"]
+
+    # Newer checkpoints are loaded as usual.
+    setup.graph.update_from_db(setup.session)
+    assert setup.graph.checkpoint > checkpoint
+    assert "newcomer@a.co" in setup.graph.get_group_details("team-sre")["users"]
+
+
 def test_graph_update_stats(setup):
     # type: (SetupTest) -> None
     """Test that update timings are logged by a graph update."""
@@ -310,3 +452,29 @@ def test_graph_update_stats(setup):
         setup.add_user_to_group("gary@a.co", "some-group")
 
     assert mock_stats.update_ms > 0.0
+
+
+def test_graph_snapshot(setup, tmpdir):
+    # type: (SetupTest, LocalPath) -> None
+    build_test_graph(setup)
+    path = str(tmpdir.join("graph.snapshot"))
+    setup.graph.save_snapshot(path)
+    assert tmpdir.listdir("graph.snapshot*") == [tmpdir.join("graph.snapshot")]
+
+    graph = GroupGraph()
+    assert graph.load_snapshot(path)
+    assert graph.checkpoint == setup.graph.checkpoint
+    assert graph.refresh_time >= setup.graph.refresh_time
+    assert graph.get_group_details("team-sre") == setup.graph.get_group_details("team-sre")
+    assert graph.get_user_details("gary@a.co") == setup.graph.get_user_details("gary@a.co")
+    assert graph.get_listing("users") == setup.graph.get_listing("users")
+
+    # The snapshot is stale once it is older than the allowed age.
+    assert not graph.is_stale(60)
+    graph.refresh_time -= 120
+    assert graph.is_stale(60)
+
+    # Missing or corrupt snapshots are ignored.
+    assert not GroupGraph().load_snapshot(str(tmpdir.join("missing")))
+    tmpdir.join("corrupt").write("not a snapshot")
+    assert not GroupGraph().load_snapshot(str(tmpdir.join("corrupt")))
@@ -2,7 +2,7 @@ import json
 
 import pytest
 
-from grouper.models.counter import Counter
+from grouper.models.checkpoint_update import CheckpointUpdate
 from grouper.plugin import PluginProxy
 from plugins.test_permission_aliases import TestPermissionAliasesPlugin
 from tests.fixtures import (  # noqa: F401
@@ -26,7 +26,7 @@ def test_groups_aliased_permissions(
     mocker.patch("grouper.graph.get_plugin_proxy", return_value=proxy)
 
     # Force graph update
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     standard_graph.update_from_db(session)
 
     api_url = url(base_url, "/groups/sad-team")
@@ -48,7 +48,7 @@ def test_users_aliased_permissions(
     mocker.patch("grouper.graph.get_plugin_proxy", return_value=proxy)
 
     # Force graph update
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     standard_graph.update_from_db(session)
 
     api_url = url(base_url, "/users/zorkian@a.co")
@@ -70,7 +70,7 @@ def test_permissions_aliased_permissions(
     mocker.patch("grouper.graph.get_plugin_proxy", return_value=proxy)
 
     # Force graph update
-    Counter.incr(session, "updates")
+    CheckpointUpdate.record(session)
     standard_graph.update_from_db(session)
 
     api_url = url(base_url, "/permissions/ssh")
@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 from urllib.parse import urlencode
 
@@ -20,6 +21,7 @@ from grouper.fe.forms import PermissionGrantForm, ValidateRegex
 from grouper.models.async_notification import AsyncNotification
 from grouper.models.group import Group
 from grouper.models.permission_map import PermissionMap
+from grouper.models.permission_request import PermissionRequest
 from grouper.models.service_account import ServiceAccount
 from grouper.models.user import User
 from grouper.permissions import (
@@ -511,6 +513,61 @@ class PermissionValidationPlugin(BasePlugin):
             raise PluginRejectedPermissionArgument("Rejecting RFC 3514 request")
 
 
+def test_get_requests_inbox(
+    session, standard_graph, groups, users, grantable_permissions  # noqa: F811
+):
+    perm_grant, _, perm1, perm2 = grantable_permissions
+    grant_permission(groups["security-team"], perm_grant, argument="grantable.one/prefix_*")
+    grant_permission(groups["security-team"], perm_grant, argument="grantable.two/50_off")
+
+    now = datetime.utcnow()
+    requests = []
+    for i, (permission, argument, status) in enumerate(
+        [
+            (perm1, "prefix_a", "pending"),
+            (perm1, "prefix_b", "pending"),
+            (perm1, "other", "pending"),
+            (perm2, "50_off", "pending"),
+            (perm2, "50xoff", "pending"),
+            (perm1, "prefixxc", "pending"),
+            (perm1, "prefix_d", "actioned"),
+            (perm1, "PREFIX_e", "pending"),
+        ]
+    ):
+        request = PermissionRequest(
+            requester_id=users["zorkian@a.co"].id,
+            group_id=groups["sad-team"].id,
+            permission_id=permission.id,
+            argument=argument,
+            status=status,
+            requested_at=now + timedelta(seconds=i),
+        )
+        request.add(session)
+        requests.append(request)
+    session.commit()
+
+    def inbox(user, limit=10, offset=0):
+        # type: (str, int, int) -> Tuple[List[int], int]
+        request_tuple, total = get_requests(session, "pending", limit, offset, owner=users[user])
+        return [requests.index(r) for r in request_tuple.requests], total
+
+    # Wildcards in owned arguments match, but LIKE wildcards in them are literal, and arguments
+    # are matched case-sensitively whatever the collation of the database.
+    assert inbox("oliver@a.co") == ([3, 1, 0], 3)
+    assert inbox("oliver@a.co", limit=2, offset=1) == ([1, 0], 3)
+    assert inbox("oliver@a.co", limit=0) == ([], 3)
+    assert inbox("gary@a.co") == ([7, 5, 4, 3, 2, 1, 0], 7)
+    assert inbox("zay@a.co") == ([], 0)
+
+    request_tuple, total = get_requests(session, None, 10, 0, requester=users["zorkian@a.co"])
+    assert total == 8
+
+    # Character classes can't be matched in SQL, so those requests are filtered in Python.
+    grant_permission(groups["security-team"], perm_grant, argument="grantable.one/[o]ther*")
+    assert inbox("oliver@a.co") == ([3, 2, 1, 0], 4)
+    assert inbox("oliver@a.co", limit=2, offset=1) == ([2, 1], 4)
+
+
 @pytest.mark.gen_test
 def test_permission_plugin(session, grantable_permissions, http_client, base_url):  # noqa: F811
     get_plugin_proxy().add_plugin(PermissionValidationPlugin())
@@ -0,0 +1,95 @@
+from threading import Event, Thread
+from typing import TYPE_CHECKING
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import QueuePool
+
+from grouper.models.base.session import get_db_engine
+from grouper.query_stats import (
+    configure_query_stats,
+    fingerprint,
+    instrument_engine,
+    pool_name,
+    query_caller,
+    query_stats,
+    timed_pool_class,
+)
+
+if TYPE_CHECKING:
+    from py._path.local import LocalPath
+
+
+def test_fingerprint():
+    # type: () -> None
+    assert (
+        fingerprint("SELECT a\n  FROM b WHERE c IN (?, ?, ?)") == "SELECT a FROM b WHERE c IN (?)"
+    )
+    assert fingerprint("SELECT a FROM b WHERE c IN (%(c_1)s, %(c_2)s)") == (
+        "SELECT a FROM b WHERE c IN (?)"
+    )
+    assert fingerprint("SELECT a FROM b WHERE c = ?") == "SELECT a FROM b WHERE c = ?"
+
+
+def test_statement_stats(tmpdir):
+    # type: (LocalPath) -> None
+    engine = get_db_engine("sqlite:///{}".format(tmpdir.join("stats.sqlite")), instrument=True)
+    stats = query_stats()
+    slow_queries = []
+
+    def log_slow_query(statement, duration_ms, handler, usecase):
+        slow_queries.append((statement, handler))
+
+    for values in ([1, 2], [1, 2, 3]):
+        engine.execute("SELECT 1 WHERE 1 IN ({})".format(", ".join("?" * len(values))), *values)
+    assert stats.statements["SELECT 1 WHERE 1 IN (?)"].latency.count == 2
+
+    configure_query_stats(1e-9, log_slow_query)
+    try:
+        with query_caller("SomeHandler"):
+            engine.execute("SELECT 2")
+    finally:
+        configure_query_stats(1.0, None)
+    assert slow_queries == [("SELECT 2", "SomeHandler")]
+    assert stats.slow_queries[-1].statement == "SELECT 2"
+    assert stats.slow_queries[-1].handler == "SomeHandler"
+
+    pool = stats.pools[pool_name(engine.url)]
+    assert pool.checkout_wait.count >= 3
+    assert pool.checked_out == 0
+
+
+def test_pool_stats(tmpdir):
+    # type: (LocalPath) -> None
+    url = make_url("sqlite:///{}".format(tmpdir.join("pool.sqlite")))
+    engine = create_engine(
+        url,
+        poolclass=timed_pool_class(QueuePool, pool_name(url)),
+        pool_size=1,
+        max_overflow=0,
+        connect_args={"check_same_thread": False},
+    )
+    instrument_engine(engine)
+    pool = query_stats().pools[pool_name(url)]
+    assert pool.capacity == 1
+
+    # A second checkout waits until the first connection is returned.
+    started = Event()
+
+    def checkout():
+        started.set()
+        with engine.connect():
+            pass
+
+    with engine.connect():
+        assert pool.checked_out == 1
+        thread = Thread(target=checkout)
+        thread.start()
+        started.wait()
+        thread.join(0.05)
+    thread.join()
+
+    assert pool.checked_out == 0
+    assert pool.checkout_wait.count == 2
+    assert pool.saturated == 1
+    assert pool.checkout_wait.max >= 0.05
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from grouper.audit_log import archive_audit_log
+from grouper.models.audit_log import AuditLog, AuditLogArchive
+from grouper.models.permission import Permission
+from grouper.models.user import User
+from grouper.usecases.authorization import Authorization
+
+if TYPE_CHECKING:
+    from tests.setup import SetupTest
+
+
+def test_entries_affecting_permission_pages(setup):
+    # type: (SetupTest) -> None
+    with setup.transaction():
+        setup.create_user("gary@a.co")
+        setup.create_permission("some-permission")
+        audit_log_service = setup.service_factory.create_audit_log_service()
+        authorization = Authorization("gary@a.co")
+
+        # Several entries share a date, so pages must be split on the ID as well.
+        start = datetime.utcnow() - timedelta(hours=1)
+        for i in range(5):
+            date = start + timedelta(minutes=i // 2)
+            audit_log_service.log_disable_permission("some-permission", authorization, date=date)
+
+    repository = setup.sql_repository_factory.create_audit_log_repository()
+    entries = repository.entries_affecting_permission("some-permission", 10)
+    assert len(entries) == 5
+    assert entries == sorted(entries, key=lambda e: (e.date, e.id), reverse=True)
+
+    pages = []
+    before = None
+    while True:
+        page = repository.entries_affecting_permission("some-permission", 2, before)
+        if not page:
+            break
+        pages.append([e.id for e in page])
+        before = page[-1].cursor
+    assert pages == [[e.id for e in entries[i : i + 2]] for i in range(0, 5, 2)]
+
+
+def test_get_entries_involving_user(setup):
+    # type: (SetupTest) -> None
+    with setup.transaction():
+        setup.create_user("gary@a.co")
+        setup.create_user("zorkian@a.co")
+        setup.create_user("oliver@a.co")
+    gary = User.get(setup.session, name="gary@a.co")
+    zorkian = User.get(setup.session, name="zorkian@a.co")
+    oliver = User.get(setup.session, name="oliver@a.co")
+    assert gary and zorkian and oliver
+
+    # Entries where gary is the actor, the target, both, or neither.
+    start = datetime.utcnow() - timedelta(hours=1)
+    for i, (actor, on_user) in enumerate(
+        [(gary, zorkian), (zorkian, gary), (gary, gary), (zorkian, oliver), (oliver, gary)] * 2
+    ):
+        entry = AuditLog(
+            actor_id=actor.id,
+            on_user_id=on_user.id,
+            log_time=start + timedelta(minutes=i),
+            action="test",
+            description="test",
+        )
+        entry.add(setup.session)
+    setup.session.commit()
+
+    entries = AuditLog.get_entries(setup.session, involve_user_id=gary.id)
+    assert len(entries) == 8
+    assert all(gary.id in (e.actor_id, e.on_user_id) for e in entries)
+    assert [e.log_time for e in entries] == sorted([e.log_time for e in entries], reverse=True)
+
+    # Each page is drawn from both indexes, without duplicating entries involving gary twice.
+    assert AuditLog.get_entries(setup.session, involve_user_id=gary.id, limit=3) == entries[:3]
+    page = AuditLog.get_entries(setup.session, involve_user_id=gary.id, limit=3, offset=3)
+    assert page == entries[3:6]
+    before = (entries[5].log_time, entries[5].id)
+    page = AuditLog.get_entries(setup.session, involve_user_id=gary.id, limit=3, before=before)
+    assert page == entries[6:]
+
+
+def test_archived_entries(setup):
+    # type: (SetupTest) -> None
+    with setup.transaction():
+        setup.create_user("gary@a.co")
+        setup.create_permission("some-permission")
+        audit_log_service = setup.service_factory.create_audit_log_service()
+        authorization = Authorization("gary@a.co")
+        start = datetime.utcnow() - timedelta(days=10)
+        for i in range(5):
+            date = start + timedelta(days=i)
+            audit_log_service.log_disable_permission("some-permission", authorization, date=date)
+
+    repository = setup.sql_repository_factory.create_audit_log_repository()
+    entries = repository.entries_affecting_permission("some-permission", 10)
+    assert len(entries) == 5
+
+    # Move the three oldest entries to the archive, two at a time.
+    cutoff = start + timedelta(days=2, hours=12)
+    assert archive_audit_log(setup.session, cutoff, 2) == 3
+    assert archive_audit_log(setup.session, cutoff, 2) == 0
+    archived = setup.session.query(AuditLogArchive).order_by(AuditLogArchive.id.desc())
+    assert [e.id for e in archived] == [e.id for e in entries[2:]]
+
+    # Queries read the archive once they run past the entries remaining in audit_log.
+    assert repository.entries_affecting_permission("some-permission", 10) == entries
+    assert repository.entries_affecting_permission("some-permission", 2) == entries[:2]
+    page = repository.entries_affecting_permission("some-permission", 2, entries[1].cursor)
+    assert page == entries[2:4]
+
+    permission = Permission.get(setup.session, name="some-permission")
+    assert permission
+    page = AuditLog.get_entries(setup.session, on_permission_id=permission.id, limit=2, offset=3)
+    assert [e.id for e in page] == [e.id for e in entries[3:]]
+    page = AuditLog.get_entries(setup.session, on_permission_id=permission.id, limit=2, offset=1)
+    assert [e.id for e in page] == [e.id for e in entries[1:3]]
@@ -1,7 +1,7 @@
 from grouper.group_requests import get_requests_by_group
 from grouper.models.request import Request
 from grouper.role_user import is_role_user
-from grouper.user import user_requests_aggregate
+from grouper.user import pending_requests_for_approver, user_requests_aggregate
 from tests.fixtures import (  # noqa: F401
     graph,
     groups,
@@ -126,3 +126,26 @@ def test_aggregate_request(
     assert (
         len(user_requests_aggregate(session, figurehead).all()) == 2
     ), "request for np-owner and manager"
+
+
+def test_pending_requests_for_approver(
+    graph, groups, permissions, session, standard_graph, users  # noqa: F811
+):
+    gary = users["gary@a.co"]
+    testuser = users["testuser@a.co"]
+    assert pending_requests_for_approver(session, gary) == []
+
+    groups["team-sre"].add_member(testuser, testuser, reason="for the lulz")
+    session.commit()
+    groups["team-infra"].add_member(testuser, testuser, reason="for the lulz")
+    session.commit()
+
+    requests = session.query(Request).filter_by(status="pending").order_by(Request.id).all()
+    assert pending_requests_for_approver(session, gary) == [r.id for r in requests]
+    assert pending_requests_for_approver(session, testuser) == []
+
+    # Resolving a request updates the checkpoint, so the precomputed inbox is rebuilt.
+    requests[0].update_status(gary, "actioned", "for being a good person")
+    session.commit()
+    assert pending_requests_for_approver(session, gary) == [requests[1].id]
+    assert [r.id for r in user_requests_aggregate(session, gary)] == [requests[1].id]
@@ -1,5 +1,13 @@
 from typing import TYPE_CHECKING
 
+from sqlalchemy import event
+
+from grouper.models.checkpoint_update import (
+    checkpoint_advanced,
+    CheckpointUpdate,
+    compact_checkpoint_updates,
+)
+
 if TYPE_CHECKING:
     from tests.setup import SetupTest
 
@@ -18,3 +26,44 @@ def test_checkpoint_update(setup):
 
     checkpoint = checkpoint_repository.get_checkpoint()
     assert checkpoint.checkpoint == 1
+
+
+def test_checkpoint_advanced(setup):
+    # type: (SetupTest) -> None
+    """Test that only commits that advance the checkpoint are reported as doing so."""
+    commits = []
+    event.listen(setup.session, "after_commit", lambda s: commits.append(checkpoint_advanced(s)))
+
+    transaction_service = setup.service_factory.create_transaction_service()
+    with transaction_service.transaction():
+        pass
+    setup.session.commit()
+    CheckpointUpdate.record(setup.session)
+    setup.session.rollback()
+    setup.session.commit()
+    assert commits == [True, False, False]
+
+
+def test_checkpoint_compaction(setup):
+    # type: (SetupTest) -> None
+    """Test that compacting the checkpoint updates doesn't change the checkpoint."""
+    checkpoint_repository = setup.repository_factory.create_checkpoint_repository()
+    transaction_service = setup.service_factory.create_transaction_service()
+    for _ in range(3):
+        with transaction_service.transaction():
+            pass
+    checkpoint = checkpoint_repository.get_checkpoint()
+    assert checkpoint.checkpoint == 3
+    assert checkpoint.time > 0
+
+    assert compact_checkpoint_updates(setup.session) == 3
+    setup.session.commit()
+    assert setup.session.query(CheckpointUpdate).count() == 0
+    assert checkpoint_repository.get_checkpoint() == checkpoint
+    assert compact_checkpoint_updates(setup.session) == 0
+    setup.session.commit()
+
+    with transaction_service.transaction():
+        pass
+    assert checkpoint_repository.get_checkpoint().checkpoint == 4
+    assert checkpoint_repository.get_checkpoint().time == checkpoint.time
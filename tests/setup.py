@@ -288,7 +288,7 @@ class SetupTest:
             fingerprint=public_key.hash_md5().replace("MD5:", ""),
             fingerprint_sha256=public_key.hash_sha256().replace("SHA256:", ""),
             key_size=public_key.bits,
-            key_type=public_key.key_type,
+            key_type=public_key.key_type.decode(),
             comment=public_key.comment,
         )
         sql_public_key.add(self.session)
@@ -0,0 +1,48 @@
+from threading import Event, Thread
+
+from grouper.stats import InstrumentedRLock, LatencyHistogram
+
+
+def test_latency_histogram():
+    # type: () -> None
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) == 0.0
+
+    for _ in range(90):
+        histogram.observe(0.003)
+    for _ in range(9):
+        histogram.observe(0.2)
+    histogram.observe(30.0)
+
+    assert histogram.count == 100
+    assert 0.0025 < histogram.percentile(0.5) <= 0.005
+    assert 0.0025 < histogram.percentile(0.9) <= 0.005
+    assert 0.1 < histogram.percentile(0.99) <= 0.25
+    assert histogram.percentile(1.0) == 30.0
+    assert histogram.cumulative_counts()[-1] == 100
+
+
+def test_instrumented_rlock():
+    # type: () -> None
+    lock = InstrumentedRLock()
+    with lock:
+        with lock:
+            pass
+    assert lock.contentions == 0
+
+    started = Event()
+
+    def wait_for_lock():
+        # type: () -> None
+        started.set()
+        with lock:
+            pass
+
+    with lock:
+        thread = Thread(target=wait_for_lock)
+        thread.start()
+        started.wait()
+        thread.join(0.05)
+    thread.join()
+    assert lock.contentions == 1
+    assert lock.wait_time > 0
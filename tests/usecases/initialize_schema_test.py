@@ -1,5 +1,7 @@
 from typing import TYPE_CHECKING
 
+from sqlalchemy import inspect
+
 from grouper.constants import (
     GROUP_ADMIN,
     PERMISSION_ADMIN,
@@ -44,3 +46,17 @@ def test_initialize_schema_twice(setup):
     usecase = setup.usecase_factory.create_initialize_schema_usecase()
     usecase.initialize_schema()
     usecase.initialize_schema()
+
+
+def test_initialize_schema_adds_indexes(setup):
+    # type: (SetupTest) -> None
+    setup.settings.auditors_group = "auditors"
+    usecase = setup.usecase_factory.create_initialize_schema_usecase()
+    usecase.initialize_schema()
+
+    # Indexes added to a model after its table was created are created on the existing table.
+    setup.session.execute("DROP INDEX audit_log_actor_time")
+    setup.session.commit()
+    usecase.initialize_schema()
+    indexes = inspect(setup.session.get_bind()).get_indexes("audit_log")
+    assert "audit_log_actor_time" in [i["name"] for i in indexes]
@@ -189,6 +189,14 @@ def test_view_permissions(setup):
     ]
     assert audit_log_entries == [("gary@a.co", "disable_permission", "disabled-permission")]
 
+    # Fetch the next page of audit log entries.
+    cursor = mock_permission_ui.audit_log_entries[-1].cursor
+    permission_usecase.view_permission("disabled-permission", "gary@a.co", 1, None, cursor)
+    audit_log_entries = [
+        (e.actor, e.action, e.on_permission) for e in mock_permission_ui.audit_log_entries
+    ]
+    assert audit_log_entries == [("gary@a.co", "create_permission", "disabled-permission")]
+
     # Search for permission based on argument with group grants and service account grants.
     group_usecase.view_granted_permission(
         "argumented-permission", "gary@a.co", group_paginate, "foo-arg"